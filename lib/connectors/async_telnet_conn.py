@@ -2,13 +2,10 @@
 
 import asyncio
 import re
-import time
 import telnetlib3
 
-
-def render_commands(templates, **kwargs):
-    """This method is used to render commands and format them"""
-    return [str(t).format(**kwargs) for t in templates]
+from lib.connectors.templates import render_commands
+from lib.connectors.timing import count_bytes, timed
 
 
 class TelnetConnection:
@@ -19,10 +16,12 @@ class TelnetConnection:
         self.port = port
         self.reader = None
         self.writer = None
+        self.encoding = 'utf-8'  # telnetlib3's default, used to count the bytes behind decoded text
 
     def __enter__(self):
         return self
 
+    @timed('telnet.connect')
     async def connect(self):
         """This method is used to connect through telnet and return the reader and writer"""
         self.reader, self.writer = await telnetlib3.open_connection(self.host, self.port)
@@ -30,15 +29,29 @@ class TelnetConnection:
     async def readuntil(self, separator: str):
         """This method is used to read until command is received"""
         response = await self.reader.readuntil(separator.encode())
+        count_bytes(received=len(response))
         return response.decode()
 
     async def read(self, n: int):
         """This method is used to read n bytes"""
-        return await self.reader.read(n)
+        data = await self.reader.read(n)
+        count_bytes(received=len(data.encode(self.encoding)) if isinstance(data, str) else len(data))
+        return data
+
+    async def expect(self, *prompts: str) -> str:
+        """This method is used to read until any of several prompts is received"""
+        output = ''
+        while not any(prompt in output for prompt in prompts):
+            data = await self.read(n=1000)
+            if not data:
+                raise EOFError(f'Connection closed while waiting for {prompts}')
+            output += data
+        return output
 
     def write(self, data: str):
         """This method is used to send commands in CLI"""
         self.writer.write(data + '\n')
+        count_bytes(sent=len(data.encode(self.encoding)) + 1)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.write('\n')
@@ -46,11 +59,11 @@ class TelnetConnection:
     async def execute_commands(self, command: list, prompt):
         """This method is used to execute certain sets of commands in CLI"""
         output = []
-        time.sleep(3)
+        await asyncio.sleep(3)
         self.write('\r')
-        time.sleep(3)
+        await asyncio.sleep(3)
         self.write('\r')
-        time.sleep(3)
+        await asyncio.sleep(3)
         init_prompt = await self.read(n=10000)
         if '>' in init_prompt:
             self.write('en')
@@ -62,41 +75,44 @@ class TelnetConnection:
             output.append(out)
         return output
 
+    @timed('telnet.configure_ssh')
     async def configure_ssh(self, templates, prmt, **kwargs):
         """This method is used to configure SSH on devices"""
         commands = render_commands(templates, **kwargs)
         return await self.execute_commands(commands, prmt)
 
+    @timed('telnet.initialize')
     async def initialize(self):
         """This method is used to initialize CSR"""
         self.write('\r')
-        time.sleep(2)
+        await asyncio.sleep(2)
         self.write('\r')
-        time.sleep(2)
+        await asyncio.sleep(2)
         out = await self.read(n=10000)
         if 'dialog? [yes/no]' in out:
             self.write('no')
-            time.sleep(2)
+            await asyncio.sleep(2)
             out = await self.read(n=1000)
         if 'autoinstall? [yes]' in out:
             self.write('')
-        time.sleep(30)
+        await asyncio.sleep(30)
 
+    @timed('telnet.capture')
     async def get_running_config(self, output_file: str):
         """Extract running configuration from device"""
-        time.sleep(2)
+        await asyncio.sleep(2)
         self.write('\r')
-        time.sleep(3)
+        await asyncio.sleep(3)
         prompt = await self.read(n=20000)
         if '>' in prompt:
             self.write('en')
-            time.sleep(2)
+            await asyncio.sleep(2)
             await self.read(n=5000)
         self.write('terminal length 0')
-        time.sleep(2)
+        await asyncio.sleep(2)
         await self.read(n=5000)
         self.write('show running-config')
-        time.sleep(5)
+        await asyncio.sleep(5)
         out = await self.read(n=50000)
         lines = out.split('\n')
         config_lines = []
@@ -115,27 +131,78 @@ class TelnetConnection:
             f.write('\n'.join(config_lines))
         return output_file
 
+    @timed('telnet.checksum')
+    async def get_config_checksum(self):
+        """Return the MD5 checksum the device reports for its running configuration"""
+        self.write('\r')
+        await asyncio.sleep(2)
+        prompt = await self.read(n=20000)
+        if '>' in prompt:
+            self.write('en')
+            await asyncio.sleep(2)
+            await self.read(n=5000)
+        self.write('verify /md5 system:running-config')
+        await asyncio.sleep(5)
+        out = await self.read(n=5000)
+        result = re.search(r'=\s*(?P<md5>[0-9a-fA-F]{32})', out)
+        return result.group('md5').lower() if result else None
+
+    @timed('telnet.save')
+    async def save_running_config(self, destination: str):
+        """Copy the running configuration to a file on the device, which survives erase and reload"""
+        self.write('\r')
+        await asyncio.sleep(1)
+        await self.read(n=5000)
+        self.write(f'copy running-config {destination}')
+        await asyncio.sleep(2)
+        out = await self.read(n=1000)
+        if 'Destination filename' in out:
+            self.write('')
+            await asyncio.sleep(2)
+            out = await self.read(n=1000)
+        if '[confirm]' in out:
+            self.write('')
+            await asyncio.sleep(2)
+            out += await self.read(n=1000)
+        return 'bytes copied' in out
+
+    @timed('telnet.replace')
+    async def configure_replace(self, source: str):
+        """Replace the running configuration with a file on the device in one operation"""
+        self.write('\r')
+        await asyncio.sleep(1)
+        await self.read(n=5000)
+        self.write(f'configure replace {source} force')
+        out = ''
+        for _ in range(60):
+            await asyncio.sleep(2)
+            out += await self.read(n=20000)
+            if any(marker in out for marker in ('Rollback Done', 'Rollback aborted', 'Invalid input', 'Error')):
+                break
+        return 'Rollback Done' in out
+
+    @timed('telnet.erase_reload')
     async def erase_and_reload(self):
         """Erase startup configuration and reload the device"""
         self.write('\r')
-        time.sleep(1)
+        await asyncio.sleep(1)
         await self.read(n=500)
         self.write('erase startup-config')
-        time.sleep(1)
+        await asyncio.sleep(1)
         await self.readuntil('[confirm]')
         self.write('\r')
-        time.sleep(1)
+        await asyncio.sleep(1)
         await self.read(n=1000)
         self.write('reload')
-        time.sleep(4)
+        await asyncio.sleep(4)
         out = await self.read(n=15000)
         if '[yes/no]:' in out:
             self.write('no')
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=10000)
         if '[confirm]' in out:
             self.write('')
-        time.sleep(20)
+        await asyncio.sleep(20)
 
     def _get_indent_level(self, line: str):
         """Get the indentation level of a line"""
@@ -162,53 +229,54 @@ class TelnetConnection:
                 exits_needed = (current_indent - line_indent) // 1
                 for _ in range(exits_needed):
                     self.write('exit')
-                    time.sleep(0.3)
+                    await asyncio.sleep(0.3)
                     await self.read(n=1000)
             self.write(stripped_line)
-            time.sleep(0.3)
+            await asyncio.sleep(0.3)
             await self.read(n=1000)
             current_indent = line_indent
-        if is_interface_block and current_indent > 0:
+        if is_interface_block and current_indent > 0 and 'no shutdown' not in (l.strip() for l in lines):
             self.write('no shutdown')
-            time.sleep(0.3)
+            await asyncio.sleep(0.3)
             await self.read(n=1000)
         while current_indent > 0:
             self.write('exit')
-            time.sleep(0.3)
+            await asyncio.sleep(0.3)
             await self.read(n=1000)
             current_indent -= 1
 
+    async def apply_global_line(self, line: str):
+        """This method is used to send one global config line, answering the [confirm] of removals like 'no username'"""
+        self.write(line)
+        await asyncio.sleep(0.3)
+        if '[confirm]' in await self.expect('(config)#', '[confirm]'):
+            self.write('')
+            await self.readuntil('(config)#')
+
+    @timed('telnet.restore')
     async def apply_missing_config(self, missing_blocks: dict):
         """Apply missing configuration blocks to restore the device"""
         if not any(missing_blocks.values()):
             return
 
         self.write('conf t')
-        time.sleep(1)
+        await asyncio.sleep(1)
         await self.readuntil('(config)#')
 
         for hostname_line in missing_blocks['hostname']:
-            self.write(hostname_line)
-            time.sleep(0.3)
-            await self.readuntil('(config)#')
+            await self.apply_global_line(hostname_line)
 
         for username_line in missing_blocks['username']:
-            self.write(username_line)
-            time.sleep(0.3)
-            await self.readuntil('(config)#')
+            await self.apply_global_line(username_line)
 
         for domain_line in missing_blocks['ip_domain']:
-            self.write(domain_line)
-            time.sleep(0.3)
-            await self.readuntil('(config)#')
+            await self.apply_global_line(domain_line)
 
         for dhcp_block in missing_blocks['dhcp']:
             await self.apply_config_block(dhcp_block)
 
         for dhcp_excluded_line in missing_blocks['dhcp excluded']:
-            self.write(dhcp_excluded_line)
-            time.sleep(0.3)
-            await self.readuntil('(config)#')
+            await self.apply_global_line(dhcp_excluded_line)
 
         for interface_block in missing_blocks['interfaces']:
             await self.apply_config_block(interface_block)
@@ -223,34 +291,35 @@ class TelnetConnection:
             await self.apply_config_block(line_block)
 
         self.write('end')
-        time.sleep(1)
+        await asyncio.sleep(1)
         await self.readuntil('#')
 
+    @timed('telnet.ftd_console_setup')
     async def configure_ftd(self, hostname, ip, netmask, gateway, password):
         """This method is used to configure FTD initial setup"""
         self.write('')
-        time.sleep(1)
+        await asyncio.sleep(1)
         out = await self.read(n=1000)
-        time.sleep(1)
+        await asyncio.sleep(1)
         result = re.search(r'^\s*(?P<login>firepower login:)', out)
         if result.group('login'):
             self.write('admin')
-            time.sleep(1)
+            await asyncio.sleep(1)
             self.write('Admin123')
-            time.sleep(5)
+            await asyncio.sleep(5)
 
         out = await self.read(n=1000)
-        time.sleep(1)
+        await asyncio.sleep(1)
         if 'Press <ENTER> to display the EULA: ' in out:
             self.write('')
             while True:
-                time.sleep(1)
+                await asyncio.sleep(1)
                 out = await self.read(n=1000)
                 if '--More--' in out:
                     self.write(' ')
                 elif "Please enter 'YES' or press <ENTER> to AGREE to the EULA: " in out:
                     self.write('')
-                    time.sleep(3)
+                    await asyncio.sleep(3)
                     out = await self.read(n=1000)
                     break
                 else:
@@ -258,49 +327,49 @@ class TelnetConnection:
 
         if 'password:' in out:
             self.write(password)
-            time.sleep(3)
+            await asyncio.sleep(3)
             out = await self.read(n=1000)
             if 'password:' in out:
                 self.write(password)
-                time.sleep(5)
+                await asyncio.sleep(5)
                 out = await self.read(n=1000)
 
         if 'IPv4? (y/n) [y]:' in out:
             self.write('')
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if 'IPv6? (y/n) [n]:' in out:
             self.write('')
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if '[manual]:' in out:
             self.write('')
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if '[192.168.45.45]:' in out:
             self.write(ip)
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if '[255.255.255.0]:' in out:
             self.write(netmask)
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if '[192.168.45.1]:' in out:
             self.write(gateway)
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if '[firepower]:' in out:
             self.write(hostname)
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if '::35]:' in out:
             self.write(gateway)
-            time.sleep(1)
+            await asyncio.sleep(1)
             out = await self.read(n=1000)
         if "'none' []:" in out:
             self.write('')
-            time.sleep(15)
+            await asyncio.sleep(15)
             out = await self.read(n=1000)
         if 'Manage the device locally? (yes/no) [yes]:' in out:
             self.write('')
-            time.sleep(15)
+            await asyncio.sleep(15)
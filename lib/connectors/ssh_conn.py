@@ -1,11 +1,9 @@
 """This module represents the connector for SSH connections"""
 
-from netmiko import ConnectHandler
+from netmiko import ConnectHandler, file_transfer
 
-
-def render_commands(templates, **kwargs):
-    """This method is used to render commands and format them"""
-    return [str(t).format(**kwargs) for t in templates]
+from lib.connectors.templates import render_commands
+from lib.connectors.timing import count_bytes, timed
 
 
 class SSHConnection:
@@ -19,6 +17,7 @@ class SSHConnection:
         self.password = password
         self.conn = None
 
+    @timed('ssh.connect')
     def connect(self):
         """This method is used to connect to the device via SSH"""
         self.conn = ConnectHandler(
@@ -29,10 +28,35 @@ class SSHConnection:
             password=self.password,
         )
 
+    @timed('ssh.configure')
     def configure(self, templates, **kwargs):
         """This method is used to send sets of commands to the device"""
         commands = render_commands(templates, **kwargs)
-        return self.conn.send_config_set(commands)
+        output = self.conn.send_config_set(commands)
+        count_bytes(sent=sum(len(c) + 1 for c in commands), received=len(output or ''))
+        return output
+
+    @timed('ssh.execute')
+    def execute(self, command, **kwargs):
+        """This method is used to run an exec mode command on the device and return its output"""
+        output = self.conn.send_command(command, **kwargs)
+        count_bytes(sent=len(command) + 1, received=len(output or ''))
+        return output
+
+    @timed('ssh.replace')
+    def replace_config(self, source_file, dest_file, file_system='flash:'):
+        """This method is used to upload a config over SCP and apply it with configure replace"""
+        transfer = file_transfer(
+            self.conn,
+            source_file=source_file,
+            dest_file=dest_file,
+            file_system=file_system,
+            direction='put',
+            overwrite_file=True,
+        )
+        output = self.conn.send_command_timing(f'configure replace {file_system}{dest_file} force',
+                                               read_timeout=120)
+        return transfer, output
 
     def close(self):
         """This method is used to close the SSH connection"""
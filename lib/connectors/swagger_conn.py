@@ -10,6 +10,8 @@ from bravado.requests_client import RequestsClient
 from pyats.topology import Device
 from urllib3.exceptions import InsecureRequestWarning
 
+from lib.connectors.timing import count_bytes, timed
+
 
 def _ensure_netobj(client, cidr: str):
     """This method is used to create network objects on FTD"""
@@ -41,6 +43,7 @@ class SwaggerConnector:
         self.__token_type = None
         urllib3.disable_warnings(InsecureRequestWarning)
 
+    @timed('swagger.connect')
     def connect(self):
         """This method connects via SWAGGER"""
         host = self.device.connections.swagger.ip
@@ -58,23 +61,33 @@ class SwaggerConnector:
     def __login(self):
         """This method is used to login via SWAGGER with credentials from testbed"""
         endpoint = '/api/fdm/latest/fdm/token'
+        data = json.dumps(
+            {
+                'username': self.device.connections.telnet.credentials.login.username,
+                'password': self.device.connections.telnet.credentials.login.password.plaintext,
+                'grant_type': 'password',
+            }
+        )
         response = requests.post(
             url=self._url + endpoint,
             headers=self._headers,
             verify=False,
-            data=json.dumps(
-                {
-                    'username': self.device.connections.telnet.credentials.login.username,
-                    'password': self.device.connections.telnet.credentials.login.password.plaintext,
-                    'grant_type': 'password',
-                }
-            )
+            data=data
         )
+        count_bytes(sent=len(data), received=len(response.content or b''))
         self.__access_token = response.json()['access_token']
         self.__refresh_token = response.json()['refresh_token']
         self.__token_type = response.json()['token_type']
         self._headers.update({'Authorization': f'{self.__token_type} {self.__access_token}'})
 
+    @staticmethod
+    def _count_response(response, *_args, **_kwargs):
+        """This method is used to add the body sizes of every FDM API request and response to the current span"""
+        body = response.request.body or b''
+        count_bytes(sent=len(body), received=len(response.content or b''))
+        return response
+
+    @timed('swagger.spec')
     def get_swagger_client(self):
         """This method is used to return the SWAGGER client"""
         endpoint = '/apispec/ngfw.json'
@@ -82,6 +95,7 @@ class SwaggerConnector:
         http_client.session.verify = False
         http_client.ssl_verify = False
         http_client.session.headers = self._headers
+        http_client.session.hooks['response'].append(self._count_response)
         self.client = SwaggerClient.from_url(
             spec_url=self._url + endpoint,
             http_client=http_client,
@@ -90,6 +104,7 @@ class SwaggerConnector:
         )
         return self.client
 
+    @timed('swagger.finish_initial_setup')
     def finish_initial_setup(self):
         """This method is used to finish the initial GUI setup"""
 
@@ -103,6 +118,7 @@ class SwaggerConnector:
 
         return self.client.InitialProvision.addInitialProvision(body=body).result()
 
+    @timed('swagger.delete_existing_dhcp_sv')
     def delete_existing_dhcp_sv(self):
         """This method is used to delete the existing DHCP pool"""
         dhcp_servers = self.client.DHCPServerContainer.getDHCPServerContainerList().result()
@@ -116,6 +132,7 @@ class SwaggerConnector:
             ).result()
             return response
 
+    @timed('swagger.configure_ftd_interfaces')
     def configure_ftd_interfaces(self, interface1, interface2):
         """This method is used to configure the other FTD interfaces"""
         existing_interfaces = self.client.Interface.getPhysicalInterfaceList().result()
@@ -148,6 +165,7 @@ class SwaggerConnector:
                 responses.append(response2)
         return responses
 
+    @timed('swagger.configure_new_dhcp_sv')
     def configure_new_dhcp_sv(self, iface):
         """This method is used to configure the new DHCP pool for DockerGuest-1"""
         interface_for_dhcp = None
@@ -179,6 +197,7 @@ class SwaggerConnector:
             ).result()
             return response
 
+    @timed('swagger.configure_ospf')
     def configure_ospf(self, vrf_id, name, process_id,
                        area_id, if_to_cidr):
         """This method is used to create new network objects and assign them in the OSPF process"""
@@ -243,6 +262,7 @@ class SwaggerConnector:
 
         return self.client.OSPF.addOSPF(vrfId=vrf_id, body=body).result()
 
+    @timed('swagger.deploy')
     def deploy(self):
         """This method is used to deploy current configuration on FTD"""
         res = self.client.Deployment.addDeployment(body={"forceDeploy": True}).result()
@@ -257,6 +277,7 @@ class SwaggerConnector:
                 break
             time.sleep(2)
 
+    @timed('swagger.add_allow_rule')
     def add_allow_rule(self, inside_interface, outside_interface, policy_name="NGFW-Access-Policy"):
         """This method is used to create security zones and add bidirectional access rules"""
         ref_model = self.client.get_model("ReferenceModel")
@@ -325,6 +346,7 @@ class SwaggerConnector:
 
         return result
 
+    @timed('swagger.add_attacker_rule')
     def add_attacker_rule(self, cidrs, policy_name='NGFW-Access-Policy', rule_name='DENY_ATTACKER'):
         """This method is used to add a rule against Attacker"""
         ref_model = self.client.get_model("ReferenceModel")
@@ -0,0 +1,90 @@
+"""This module compiles command templates once and renders them for many devices and interfaces"""
+
+import re
+import string
+
+SEPARATOR = '\x1f'
+_TEMPLATES = {}
+
+
+def _field_roots(text: str, line: str) -> set:
+    """This method is used to return the names of the placeholders in text, including those nested in format specs"""
+    roots = set()
+    for _, field_name, format_spec, _ in string.Formatter().parse(text):
+        if field_name is None:
+            continue
+        root = re.split(r'[.\[]', field_name, maxsplit=1)[0]
+        if not root or root.isdigit():
+            raise ValueError(f'Template line {line!r} uses a positional placeholder, name it instead')
+        roots.add(root)
+        if format_spec:
+            roots.update(_field_roots(format_spec, line))
+    return roots
+
+
+class CommandTemplate:
+    """This class represents a list of command lines with {placeholders}, parsed and validated once
+
+    All lines are joined into one format string, so rendering is a single format_map call
+    and a split instead of one str.format call per line.
+    """
+
+    def __init__(self, templates):
+        self.lines = tuple(str(t) for t in templates)
+        fields = set()
+        for line in self.lines:
+            if SEPARATOR in line:
+                raise ValueError(f'Template line {line!r} contains the reserved separator')
+            fields.update(_field_roots(line, line))
+        self.fields = frozenset(fields)
+        self._format = SEPARATOR.join(self.lines)
+        # lines without placeholders are rendered once here, so {{ and }} are unescaped like in the other lines
+        self._constant = None if fields else [line.format_map({}) for line in self.lines]
+
+    def missing(self, values) -> set:
+        """This method is used to return the placeholders that values does not provide"""
+        return self.fields.difference(values)
+
+    def validate(self, values):
+        """This method is used to reject a set of values before anything is rendered or sent"""
+        missing = self.missing(values)
+        if missing:
+            first = self.lines[0] if self.lines else ''
+            raise KeyError(f"Missing value(s) for {', '.join(sorted(missing))} in template starting with {first!r}")
+
+    def _render(self, values) -> list:
+        rendered = self._format.format_map(values).split(SEPARATOR)
+        if len(rendered) != len(self.lines):
+            # a value contained the separator, fall back to one format call per line
+            return [line.format_map(values) for line in self.lines]
+        return rendered
+
+    def render(self, **values) -> list:
+        """This method is used to render every line with one set of values"""
+        self.validate(values)
+        return self._render(values) if self._constant is None else list(self._constant)
+
+    def render_many(self, rows) -> list:
+        """This method is used to render the template once per set of values, e.g. per interface, into one list"""
+        rows = list(rows)
+        for values in rows:
+            self.validate(values)
+        commands = []
+        for values in rows:
+            commands.extend(self._render(values))
+        return commands
+
+
+def compile_template(templates) -> CommandTemplate:
+    """This method is used to return the compiled form of a template list, compiling it only the first time"""
+    if isinstance(templates, CommandTemplate):
+        return templates
+    key = tuple(str(t) for t in templates)
+    if key not in _TEMPLATES:
+        _TEMPLATES[key] = CommandTemplate(key)
+    return _TEMPLATES[key]
+
+
+def render_commands(templates, **kwargs):
+    """This method is used to render commands and format them"""
+    return compile_template(templates).render(**kwargs)
@@ -0,0 +1,132 @@
+"""This module records how long each provisioning phase takes and how many bytes it moves"""
+
+import contextvars
+import csv
+import functools
+import inspect
+import json
+import os
+import time
+
+_CURRENT_SPAN = contextvars.ContextVar('current_span', default=None)
+FIELDS = ['name', 'device', 'parent', 'start', 'duration', 'bytes_sent', 'bytes_received', 'error']
+
+
+class Span:
+    """This class represents one timed phase; nested spans inherit the device of their parent"""
+
+    def __init__(self, recorder, name, device=None):
+        self.recorder = recorder
+        self.parent = None
+        self.record = dict.fromkeys(FIELDS)
+        self.record.update(name=name, device=device, bytes_sent=0, bytes_received=0)
+        self._perf_start = None
+        self._token = None
+
+    @property
+    def device(self):
+        """This method is used to return the device the span belongs to"""
+        return self.record['device']
+
+    def add_bytes(self, sent=0, received=0):
+        """This method is used to add transferred bytes to the span"""
+        self.record['bytes_sent'] += sent
+        self.record['bytes_received'] += received
+
+    def __enter__(self):
+        self.parent = _CURRENT_SPAN.get()
+        if self.parent is not None:
+            self.record['parent'] = self.parent.record['name']
+            if self.record['device'] is None:
+                self.record['device'] = self.parent.device
+        self._token = _CURRENT_SPAN.set(self)
+        self.record['start'] = round(time.time(), 6)
+        self._perf_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.record['duration'] = round(time.perf_counter() - self._perf_start, 6)
+        self.record['error'] = exc_type.__name__ if exc_type else None
+        _CURRENT_SPAN.reset(self._token)
+        if self.parent is not None:
+            self.parent.add_bytes(self.record['bytes_sent'], self.record['bytes_received'])
+        self.recorder.spans.append(self)
+
+
+class Recorder:
+    """This class collects finished spans and exports them as JSON or CSV"""
+
+    def __init__(self):
+        self.spans = []
+
+    def span(self, name, device=None):
+        """This method is used to open a new span"""
+        return Span(self, name, device)
+
+    def rows(self, device=None):
+        """This method is used to return the finished spans, optionally for one device"""
+        return [dict(s.record) for s in self.spans if device is None or s.device == device]
+
+    def export(self, path_prefix, device=None):
+        """This method is used to write <prefix>.json and <prefix>.csv and return their paths"""
+        rows = self.rows(device)
+        directory = os.path.dirname(path_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f'{path_prefix}.json', 'w', encoding='utf-8') as file:
+            json.dump(rows, file, indent=2)
+        with open(f'{path_prefix}.csv', 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return f'{path_prefix}.json', f'{path_prefix}.csv'
+
+    def clear(self, device=None):
+        """This method is used to drop recorded spans, optionally only those of one device"""
+        self.spans = [s for s in self.spans if device is not None and s.device != device]
+
+
+RECORDER = Recorder()
+
+
+def span(name, device=None):
+    """This method is used to open a span on the default recorder"""
+    return RECORDER.span(name, device)
+
+
+def count_bytes(sent=0, received=0):
+    """This method is used to add transferred bytes to the current span, if any"""
+    current = _CURRENT_SPAN.get()
+    if current is not None:
+        current.add_bytes(sent, received)
+
+
+def timed(name):
+    """This decorator is used to run a connector method, sync or async, inside a span
+
+    Span names are '<layer>.<phase>': telnet.*, ssh.* and swagger.* for the connectors,
+    diagnose.* for self-diagnose and task.* for scheduler tasks.
+    Without a device from an enclosing span, the span is labelled with the connector's host:port
+    or its testbed device name.
+    """
+    def decorator(func):
+        def device_of(self):
+            if _CURRENT_SPAN.get() is not None:
+                return None
+            if hasattr(self, 'host'):
+                return f'{self.host}:{self.port}'
+            return str(getattr(getattr(self, 'device', None), 'name', type(self).__name__))
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                with span(name, device_of(self)):
+                    return await func(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with span(name, device_of(self)):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,125 @@
+"""Timeline-driven attack scenarios: actions start at fixed offsets and their output is merged into one log"""
+import argparse
+import asyncio
+import os
+import time
+
+import yaml
+
+LOG_DIR = 'scenario_logs'
+
+
+class Action:
+    """One command of a scenario, started at an offset from the scenario start, locally or on the remote host"""
+
+    def __init__(self, name: str, start: float, argv, remote: bool = False, duration: float = None):
+        self.name = name
+        self.start = float(start)
+        self.argv = [str(arg) for arg in argv]
+        self.remote = remote
+        self.duration = duration
+
+    @classmethod
+    def from_dict(cls, entry: dict):
+        """Build an action from a timeline entry: name, at, run, and optionally remote and for"""
+        return cls(entry['name'], entry.get('at', 0), entry['run'], entry.get('remote', False), entry.get('for'))
+
+    def command(self, host=None) -> list:
+        """Return the command line to launch, bounded by timeout when the action has a duration"""
+        argv = self.argv
+        if self.duration is not None:
+            argv = ['timeout', f'{self.duration:g}s', *argv]
+        if self.remote:
+            if host is None:
+                raise ValueError(f'Action {self.name} is remote but the scenario has no remote host')
+            return host.command(argv)
+        return argv
+
+
+def load_timeline(path: str) -> list:
+    """Read a YAML or JSON list of timeline entries and return its actions ordered by start"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return sorted((Action.from_dict(entry) for entry in yaml.safe_load(file)), key=lambda a: a.start)
+
+
+async def run_action(action: Action, origin: float, records: list, host=None, on_line=None):
+    """Wait for the action's offset, run it and record every output line with its time since origin"""
+    loop = asyncio.get_running_loop()
+
+    def record(line: str):
+        entry = (loop.time() - origin, action.name, line.rstrip('\r\n').replace('\n', '\\n'))
+        records.append(entry)
+        if on_line:
+            on_line(entry)
+
+    await asyncio.sleep(max(0.0, origin + action.start - loop.time()))
+    record(f"started: {' '.join(action.argv)} (scheduled at {action.start:.3f}s)")
+    try:
+        proc = await asyncio.create_subprocess_exec(*action.command(host), stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.STDOUT,
+                                                    stdin=asyncio.subprocess.DEVNULL)
+    except OSError as e:
+        record(f'failed to start: {e}')
+        return None
+
+    async def pump():
+        async for line in proc.stdout:
+            record(line.decode(errors='replace'))
+        return await proc.wait()
+
+    try:
+        # the remote side is bounded by timeout; the grace period covers the channel teardown
+        limit = action.duration + 5 if action.duration is not None else None
+        returncode = await asyncio.wait_for(pump(), limit)
+    except asyncio.TimeoutError:
+        proc.kill()
+        returncode = await proc.wait()
+    record(f'exited with {returncode}')
+    return returncode
+
+
+async def run_scenario(actions, host=None, on_line=None) -> list:
+    """Run every action on its own schedule and return the merged (seconds, action, line) records"""
+    records = []
+    origin = asyncio.get_running_loop().time()
+    await asyncio.gather(*(run_action(action, origin, records, host, on_line) for action in actions))
+    return sorted(records, key=lambda entry: entry[0])
+
+
+def format_record(entry) -> str:
+    """Return one log line: offset in seconds, action name and output"""
+    seconds, name, line = entry
+    return f'{seconds:9.3f}s [{name}] {line}'
+
+
+def write_log(records, path: str = None) -> str:
+    """Write the merged records to a log file and return its path"""
+    if path is None:
+        path = os.path.join(LOG_DIR, f"scenario_{time.strftime('%Y%m%d_%H%M%S')}.log")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.writelines(f'{format_record(entry)}\n' for entry in records)
+    return path
+
+
+def play(actions, host=None, log_path: str = None, echo: bool = True) -> tuple:
+    """Run a scenario from synchronous code, printing lines as they arrive, and return the log path and records"""
+    if host is not None and any(action.remote for action in actions):
+        host.start()
+    records = asyncio.run(run_scenario(actions, host, (lambda entry: print(format_record(entry))) if echo else None))
+    return write_log(records, log_path), records
+
+
+def main():
+    """Run a timeline file against the lab and save the merged log"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('timeline', help='YAML or JSON list of {name, at, run, remote, for} entries')
+    parser.add_argument('--log', help=f'log file, defaults to a timestamped file in {LOG_DIR}/')
+    args = parser.parse_args()
+
+    from project.pings_and_attacks import ATTACKER  # pylint: disable=import-outside-toplevel
+    print(f'Scenario log written to {play(load_timeline(args.timeline), ATTACKER, args.log)[0]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Microbenchmark of fleet-scale command rendering: per-line str.format against the compiled templates"""
+import argparse
+import itertools
+import timeit
+
+from lib.connectors.templates import compile_template
+from project.int_config import add_ips
+from project.ospf_config import ospf_commands
+from project.ssh_config import commands
+
+
+def fleet(devices: int, interfaces: int) -> tuple:
+    """Return the bootstrap values of every device and the values of every interface of the fleet"""
+    bootstrap = [{'interface': 'GigabitEthernet0/0', 'ip': f'10.{d // 250}.{d % 250}.1', 'sm': '255.255.255.0',
+                  'hostname': f'R{d}', 'domain': 'example.com', 'username': 'admin', 'password': 'secret'}
+                 for d in range(devices)]
+    per_interface = [{'interface': f'GigabitEthernet0/{i + 1}', 'ip': f'172.{16 + i % 16}.{d // 250}.{d % 250}',
+                      'sm': '255.255.255.0'}
+                     for d in range(devices) for i in range(interfaces)]
+    return bootstrap, per_interface
+
+
+def render_legacy(bootstrap, per_interface) -> list:
+    """Render the fleet the way the connectors used to, one str.format call per line and device"""
+    lines = []
+    for values in bootstrap:
+        lines += [str(t).format(**values) for t in commands]
+    for values in per_interface:
+        lines += [str(t).format(**values) for t in add_ips]
+        lines += [str(t).format(**values) for t in ospf_commands]
+    return lines
+
+
+def render_compiled(bootstrap, per_interface) -> list:
+    """Render the fleet with the compiled templates, validating every value set up front"""
+    lines = compile_template(commands).render_many(bootstrap)
+    lines += compile_template(add_ips).render_many(per_interface)
+    lines += compile_template(ospf_commands).render_many(per_interface)
+    return lines
+
+
+def main():
+    """Time both renderers on a generated fleet and print the best run of each"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--devices', type=int, default=1000)
+    parser.add_argument('--interfaces', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    bootstrap, per_interface = fleet(args.devices, args.interfaces)
+    legacy, compiled = sorted(render_legacy(bootstrap, per_interface)), sorted(render_compiled(bootstrap, per_interface))
+    if legacy != compiled:
+        first = next((a, b) for a, b in itertools.zip_longest(legacy, compiled) if a != b)
+        raise SystemExit(f'Renderers disagree ({len(legacy)} legacy vs {len(compiled)} compiled lines), '
+                         f'first difference: {first[0]!r} != {first[1]!r}')
+    lines = len(compiled)
+    results = {}
+    for name, func in (('legacy', render_legacy), ('compiled', render_compiled)):
+        results[name] = min(timeit.repeat(lambda f=func: f(bootstrap, per_interface), number=1, repeat=args.repeat))
+        print(f'{name:<10}{results[name] * 1000:10.1f} ms{lines / results[name]:14.0f} lines/s')
+    print(f"{'speedup':<10}{results['legacy'] / results['compiled']:10.2f} x")
+
+
+if __name__ == '__main__':
+    main()
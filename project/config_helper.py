@@ -1,60 +1,508 @@
 """Configuration parser helper module"""
+import collections
+import contextlib
+import hashlib
+import io
+import itertools
+import marshal
+import mmap
+import os
 import re
+import shutil
+import tempfile
+import zlib
+
+
+class ConfigNode:
+    """A configuration line together with the lines indented under it"""
+
+    __slots__ = ('line', 'children', 'parent')
+
+    def __init__(self, line: str = None, parent: 'ConfigNode' = None):
+        self.line = line
+        self.children = []
+        self.parent = parent
+
+    @property
+    def text(self) -> str:
+        """Return the line without indentation and line ending"""
+        return self.line.strip() if self.line is not None else ''
+
+    def iter_lines(self):
+        """Yield this line and every line below it, in file order"""
+        if self.line is not None:
+            yield self.line
+        for child in self.children:
+            yield from child.iter_lines()
+
+    def to_config(self) -> str:
+        """Serialize this node and its children back to configuration text"""
+        return ''.join(self.iter_lines())
+
+    def __repr__(self):
+        return f'ConfigNode({self.text!r}, children={len(self.children)})'
+
+
+def normalize(text: str) -> str:
+    """Collapse whitespace so spacing differences do not count as changes"""
+    return ' '.join(text.split())
+
+
+def _as_line(line: str) -> str:
+    return line if line.endswith('\n') else line + '\n'
+
+
+def negate(text: str) -> str:
+    """Return the command that removes a configuration line"""
+    return text[3:] if text.startswith('no ') else f'no {text}'
+
+
+def diff_children(golden: ConfigNode, current: ConfigNode, ordered: bool = False):
+    """Return the child lines that turn current into golden, or None if an ordered section must be replaced
+
+    Extra lines in current are negated first, then lines missing from current follow in golden order.
+    Nested sections are diffed recursively, so only the changed sub-lines are emitted.
+    """
+    golden_children = {normalize(c.text): c for c in golden.children if c.text and not c.text.startswith('!')}
+    current_children = {normalize(c.text): c for c in current.children if c.text and not c.text.startswith('!')}
+    if ordered:
+        return None if list(golden_children) != list(current_children) else []
+
+    patch = []
+    for key, child in current_children.items():
+        if key in golden_children:
+            continue
+        if key.startswith('no ') and any(g.startswith(key[3:]) for g in golden_children):
+            continue
+        indent = child.line[:len(child.line) - len(child.line.lstrip(' '))]
+        patch.append(f'{indent}{negate(key)}\n')
+    for key, child in golden_children.items():
+        other = current_children.get(key)
+        if other is None:
+            patch.extend(_as_line(line) for line in child.iter_lines())
+        elif child.children:
+            sub_patch = diff_children(child, other)
+            if sub_patch:
+                patch.append(_as_line(child.line))
+                patch.extend(sub_patch)
+    return patch
+
+
+def diff_block(golden: ConfigNode, current: ConfigNode, ordered: bool = False) -> str:
+    """Return the minimal block that turns the current section into the golden one, '' if they match
+
+    Sections whose child order matters (ACLs) are removed and re-added in full when they differ.
+    """
+    if current is None:
+        return ''.join(_as_line(line) for line in golden.iter_lines())
+    patch = diff_children(golden, current, ordered)
+    if patch is None:
+        return f'{negate(golden.text)}\n' + ''.join(_as_line(line) for line in golden.iter_lines())
+    if not patch:
+        return ''
+    return _as_line(golden.line) + ''.join(patch)
+
+
+PLATFORM_RULES = {
+    ('iou', 'iosv'): [(r'Ethernet(\d+)/(\d+)', r'GigabitEthernet\1/\2')],
+    ('iosv', 'iou'): [(r'GigabitEthernet(\d+)/(\d+)', r'Ethernet\1/\2')],
+    ('iosv', 'iosxe'): [(r'GigabitEthernet0/(\d+)', lambda m: f'GigabitEthernet{int(m.group(1)) + 1}')],
+    ('iosxe', 'iosv'): [(r'GigabitEthernet(\d+)', lambda m: f'GigabitEthernet0/{int(m.group(1)) - 1}')],
+}
+
+
+class InterfaceRenamer:
+    """Rename interface references with a single compiled alternation regex
+
+    mapping holds exact old->new names; rules are (pattern, replacement) pairs where the
+    replacement is a re template or a callable taking the match. Exact names win over rules.
+    """
+
+    def __init__(self, mapping: dict = None, rules=()):
+        self.mapping = dict(mapping or {})
+        self.rules = [(re.compile(pattern), replacement) for pattern, replacement in rules]
+        alternatives = [re.escape(name) for name in sorted(self.mapping, key=len, reverse=True)]
+        alternatives += [f'(?P<rule{i}>{rule.pattern})' for i, (rule, _) in enumerate(self.rules)]
+        if not alternatives:
+            alternatives = ['(?!)']
+        self.regex = re.compile(rf'(?<![\w-])(?:{"|".join(alternatives)})(?![\d/])')
+
+    def _replace(self, match) -> str:
+        name = match.group(0)
+        if name in self.mapping:
+            return self.mapping[name]
+        for i, (rule, replacement) in enumerate(self.rules):
+            if match.group(f'rule{i}') is not None:
+                rule_match = rule.fullmatch(name)
+                return replacement(rule_match) if callable(replacement) else rule_match.expand(replacement)
+        return name
+
+    def rename(self, line: str) -> str:
+        """Return the line with every interface reference renamed"""
+        return self.regex.sub(self._replace, line)
+
+    def stage(self, lines):
+        """Pipeline stage that renames interfaces on every line"""
+        return (self.regex.sub(self._replace, line) for line in lines)
+
+
+def build_sections(lines, root: ConfigNode = None):
+    """Yield one top-level ConfigNode at a time, with its indented lines attached as children
+
+    Only the section being built is held in memory, so this works on a lazy stream of lines.
+    """
+    section = None
+    stack = []
+    for line in lines:
+        indent = len(line) - len(line.lstrip(' '))
+        if section is None or indent == 0:
+            if section is not None:
+                yield section
+            section = ConfigNode(line, root)
+            stack = [(indent, section)]
+            continue
+        while len(stack) > 1 and stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+        node = ConfigNode(line, parent)
+        parent.children.append(node)
+        stack.append((indent, node))
+    if section is not None:
+        yield section
+
+
+def drop_comments(lines):
+    """Pipeline stage that removes '!' separator lines"""
+    return (line for line in lines if not line.startswith('!'))
+
+
+def _dump_tree(root: ConfigNode) -> tuple:
+    """Flatten a tree into its lines in file order and the index of each line's parent, 0 being the root"""
+    lines = []
+    parents = []
+    stack = [(child, 0) for child in reversed(root.children)]
+    while stack:
+        node, parent = stack.pop()
+        lines.append(node.line)
+        parents.append(parent)
+        stack.extend((child, len(lines)) for child in reversed(node.children))
+    return tuple(lines), tuple(parents)
+
+
+def _load_tree(lines, parents) -> ConfigNode:
+    """Rebuild a tree from _dump_tree output with one flat loop, no recursion"""
+    root = ConfigNode()
+    nodes = [root]
+    for line, parent_index in zip(lines, parents):
+        parent = nodes[parent_index]
+        node = ConfigNode(line, parent)
+        parent.children.append(node)
+        nodes.append(node)
+    return root
+
+
+class ParseCache:
+    """LRU cache of parsed config trees keyed by the SHA-256 of the raw file bytes and the applied stage keys
+
+    Trees are kept in memory and, when a directory is given, also written there as zlib-compressed
+    marshal data (flat lines and parent indices) so later runs can skip parsing unchanged configs.
+    The directory is scanned once; after that its LRU order is tracked in memory.
+    """
+
+    def __init__(self, max_entries: int = 32, directory: str = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._stored = None
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """Return the cache key for some file content"""
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f'{digest}.tree')
+
+    def _remember(self, digest: str, root: ConfigNode):
+        self._entries[digest] = root
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _stored_entries(self) -> collections.OrderedDict:
+        """Return the digests stored in the directory, least recently used first, scanning it on first use"""
+        if self._stored is None:
+            stored = []
+            with contextlib.suppress(FileNotFoundError):
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith('.tree'):
+                        with contextlib.suppress(FileNotFoundError):
+                            stored.append((entry.stat().st_mtime, entry.name[:-len('.tree')]))
+            self._stored = collections.OrderedDict((digest, None) for _, digest in sorted(stored))
+        return self._stored
+
+    def get(self, digest: str):
+        """Return the cached tree root for a content digest, or None"""
+        root = self._entries.get(digest)
+        if root is None and self.directory:
+            try:
+                with open(self._path(digest), 'rb') as file:
+                    root = _load_tree(*marshal.loads(zlib.decompress(file.read())))
+                os.utime(self._path(digest))
+                self._stored_entries()[digest] = None
+                self._stored.move_to_end(digest)
+            except FileNotFoundError:
+                pass
+            except (zlib.error, ValueError, EOFError, TypeError, IndexError):
+                # a truncated or corrupt entry is a miss; drop it so the next put rewrites it
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._path(digest))
+                self._stored_entries().pop(digest, None)
+        if root is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(digest, root)
+        return root
+
+    def put(self, digest: str, root: ConfigNode):
+        """Store a tree root under a content digest, evicting the least recently used ones"""
+        self._remember(digest, root)
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        stored = self._stored_entries()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(zlib.compress(marshal.dumps(_dump_tree(root)), 1))
+        os.replace(tmp_path, self._path(digest))
+        stored[digest] = None
+        stored.move_to_end(digest)
+        while len(stored) > self.max_entries:
+            old_digest, _ = stored.popitem(last=False)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._path(old_digest))
+
 
 class ParseConfig:
-    """Parse and manipulate network device configurations"""
+    """Parse and manipulate network device configurations
+
+    With streaming=True the file is never loaded as a whole: reduce_config and rename_interfaces
+    are queued as pipeline stages and applied lazily by stream(), iter_sections() and rewrite_file().
+    """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, streaming: bool = False, use_mmap: bool = False, cache: 'ParseCache' = None):
         self.path = path
-        self.lines = []
+        self.streaming = streaming
+        self.use_mmap = use_mmap
+        self.cache = cache
+        self._digest = None
+        self._stages = []
+        self._lines = []
+        self._pending = None
+        self._root = None
+        self._index = {}
+        self._by_keyword = {}
 
     def __enter__(self):
-        with open(self.path, 'r', encoding='utf-8') as file:
-            for line in file.readlines():
-                self.lines.append(line)
+        if self.streaming:
+            return self
+        if self.cache is None:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.lines = file.readlines()
+            return self
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        # the raw bytes are only decoded if the lines are needed; a cache hit never touches them
+        self._defer(lambda: io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').readlines())
+        self._digest = ParseCache.digest(data)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.lines.clear()
+        self._stages = []
+        self.lines = []
+
+    @property
+    def lines(self) -> list:
+        """Return the configuration lines, producing deferred ones on first use"""
+        if self._pending is not None:
+            self._lines = self._pending()
+            self._pending = None
+        return self._lines
+
+    @lines.setter
+    def lines(self, value: list):
+        """Replace the configuration lines and drop the stale tree"""
+        self._lines = value
+        self._pending = None
+        self._digest = None
+        self._root = None
+        self._index = {}
+        self._by_keyword = {}
+
+    def _defer(self, produce):
+        """Drop the current lines and tree; produce() returns the new lines when they are first needed"""
+        self.lines = []
+        self._pending = produce
+
+    def _read_lines(self):
+        """Yield the file lines lazily, through mmap when requested"""
+        if not self.use_mmap:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                yield from file
+            return
+        with open(self.path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for raw_line in iter(mapped.readline, b''):
+                    yield raw_line.decode('utf-8')
+
+    def add_stage(self, stage, key: str = None):
+        """Apply a stage (a callable taking and returning an iterable of lines) now, or queue it when streaming
+
+        A deterministic stage can pass a key, so its output tree is cached under the input hash plus that key;
+        such a stage is applied lazily, only if the tree is not cached or the lines are read.
+        """
+        if self.streaming:
+            self._stages.append(stage)
+            self.lines = []
+            return self
+        if key and self._digest and self.cache is not None:
+            previous = self._pending or (lambda lines=self._lines: lines)
+            digest = ParseCache.digest(f'{self._digest}:{key}'.encode())
+            self._defer(lambda: list(stage(previous())))
+            self._digest = digest
+            return self
+        lines = list(stage(self.lines))
+        if lines == self._lines:
+            return self
+        self.lines = lines
+        return self
+
+    def stream(self):
+        """Return an iterator over the configuration lines with every pipeline stage applied"""
+        if not self.streaming:
+            return iter(self.lines)
+        lines = self._read_lines()
+        for stage in self._stages:
+            lines = stage(lines)
+        return lines
+
+    def iter_sections(self):
+        """Yield the top-level sections one at a time from the stream"""
+        return build_sections(self.stream())
+
+    @property
+    def tree(self) -> ConfigNode:
+        """Return the root of the configuration tree, building it on first use"""
+        if self._root is None:
+            self._build_tree()
+        return self._root
+
+    def _build_tree(self):
+        """Build the parent/child tree in one pass over the lines, or load it from the cache by content hash"""
+        if self.cache is not None and self._digest:
+            root = self.cache.get(self._digest)
+            if root is not None:
+                self._set_tree(root)
+                return
+        root = ConfigNode()
+        root.children.extend(build_sections(self.stream(), root))
+        self._set_tree(root)
+        if self.cache is not None and self._digest:
+            self.cache.put(self._digest, root)
+
+    def _set_tree(self, root: ConfigNode):
+        """Install a tree and index its top-level sections by header and by keyword"""
+        index = {}
+        by_keyword = {}
+        for node in root.children:
+            if node.text and not node.text.startswith('!'):
+                index.setdefault(node.text, node)
+                by_keyword.setdefault(node.text.split()[0], []).append(node)
+        self._root = root
+        self._index = index
+        self._by_keyword = by_keyword
+
+    def get_node(self, header: str):
+        """Return the top-level node whose line is exactly the given header"""
+        if self._root is None:
+            self._build_tree()
+        return self._index.get(header.strip())
+
+    def sections(self, prefix: str = ''):
+        """Yield the top-level nodes whose line starts with the given prefix"""
+        if not prefix:
+            yield from (n for n in self.tree.children if n.text)
+            return
+        if self._root is None:
+            self._build_tree()
+        for node in self._by_keyword.get(prefix.split()[0], ()):
+            if node.text.startswith(prefix):
+                yield node
+
+    def line_set(self) -> set:
+        """Return the whitespace-normalized top-level lines as a set for O(1) membership checks"""
+        return {normalize(node.text) for node in self.sections()}
 
     def get_config_block(self, start: str):
         """Extract a configuration block starting from a given line"""
-        out = []
-        block_start = False
-
-        for line in self.lines:
-            if line.startswith(start):
-                block_start = True
-                out.append(line)
-                continue
-            if block_start:
-                if line and not line.startswith(' '):
-                    break
-                out.append(line)
-
-        if block_start and out:
-            return ''.join(out)
-        return None
+        node = self.get_node(start)
+        if node is None:
+            node = next((n for n in self.sections(start.strip()) if n.line.startswith(start)), None)
+        if node is None:
+            return None
+        return node.to_config()
+
+    def to_config(self) -> str:
+        """Serialize the whole configuration from the tree"""
+        return self.tree.to_config()
 
     def reduce_config(self):
         """Remove unnecessary configuration lines"""
-        self.lines = list(filter(lambda line: not line.startswith('!'), self.lines))
+        self.add_stage(drop_comments, key='reduce')
 
     def rename_interfaces(self, old_int_pattern: str, new_int: str, new_index: int):
-        """Rename interfaces in configuration using regex pattern"""
-        def generator(new_interface, start_index):
-            i = start_index
-            while i < 10:
-                yield f'{new_interface}{i}'
-                i += 1
-        interface_generator = generator(new_int, new_index)
-        self.lines = list(map(lambda x: re.sub(old_int_pattern, lambda _: next(interface_generator), x), self.lines))
+        """Rename interfaces in configuration using regex pattern
+
+        Every distinct match gets the next number from new_index on, and later references
+        to the same interface reuse it.
+        """
+        pattern = re.compile(old_int_pattern)
+
+        def stage(lines):
+            numbers = itertools.count(new_index)
+            renamed = {}
+
+            def replace(match):
+                if match.group(0) not in renamed:
+                    renamed[match.group(0)] = f'{new_int}{next(numbers)}'
+                return renamed[match.group(0)]
+            return (pattern.sub(replace, line) for line in lines)
+        self.add_stage(stage)
+
+    def translate_interfaces(self, mapping: dict = None, platforms: tuple = None):
+        """Rewrite every interface reference from an old->new mapping and/or platform rules in one pass"""
+        rules = PLATFORM_RULES[platforms] if platforms else ()
+        self.add_stage(InterfaceRenamer(mapping, rules).stage)
 
     def rewrite_file(self):
-        """Rewrite the configuration file with current lines"""
-        with open(self.path, 'w', encoding='utf-8') as file:
-            for line in self.lines:
-                file.write(line)
+        """Atomically rewrite the configuration file with current lines"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.writelines(self.stream())
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._stages = []
+
 
 if __name__ == '__main__':
     with ParseConfig('../hw/iou1_running_config.txt') as config_file1:
@@ -0,0 +1,471 @@
+"""Local stand-in for the FDM REST API used to run FTD provisioning offline"""
+import argparse
+import collections
+import functools
+import json
+import re
+import ssl
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BASE_PATH = '/api/fdm/latest'
+DEFAULT_INTERFACES = ('GigabitEthernet0/0', 'GigabitEthernet0/1', 'GigabitEthernet0/2')
+DEFAULT_POLICY = 'NGFW-Access-Policy'
+
+
+def _obj(**properties):
+    """Return a permissive object schema with the given properties"""
+    return {'type': 'object', 'properties': properties}
+
+
+def _ref(name):
+    return {'$ref': f'#/definitions/{name}'}
+
+
+def _list_of(name):
+    return _obj(items={'type': 'array', 'items': _ref(name)}, paging={'type': 'object'})
+
+
+def _param(name, location='path', required=True, schema=None):
+    param = {'name': name, 'in': location, 'required': required}
+    if schema:
+        param['schema'] = schema
+    else:
+        param['type'] = 'string'
+    return param
+
+
+def _op(tag, operation_id, params=(), response=None):
+    """Return a swagger operation for the given tag and operationId"""
+    responses = {'200': {'description': 'OK'}} if response else {'204': {'description': 'No Content'}}
+    if response:
+        responses['200']['schema'] = _ref(response)
+    return {'tags': [tag], 'operationId': operation_id, 'parameters': list(params), 'responses': responses}
+
+
+BODY_PARAM = _param('body', 'body', schema={'type': 'object'})
+NGFW_SPEC = {
+    'swagger': '2.0',
+    'info': {'title': 'FDM stand-in', 'version': 'latest'},
+    'basePath': BASE_PATH,
+    'consumes': ['application/json'],
+    'produces': ['application/json'],
+    'definitions': {
+        'ReferenceModel': _obj(id={'type': 'string'}, name={'type': 'string'}, type={'type': 'string'},
+                               hardwareName={'type': 'string'}),
+        'IPv4Address': _obj(ipAddress={'type': 'string'}, netmask={'type': 'string'}, type={'type': 'string'}),
+        'InterfaceIPv4': _obj(ipType={'type': 'string'}, dhcp={'type': 'boolean'},
+                              ipAddress=_ref('IPv4Address'), type={'type': 'string'}),
+        'PhysicalInterface': _obj(id={'type': 'string'}, name={'type': 'string'},
+                                  hardwareName={'type': 'string'}, enable={'type': 'boolean'},
+                                  ipv4=_ref('InterfaceIPv4'), type={'type': 'string'}),
+        'PhysicalInterfaceList': _list_of('PhysicalInterface'),
+        'NetworkObject': _obj(id={'type': 'string'}, name={'type': 'string'}, subType={'type': 'string'},
+                              value={'type': 'string'}, type={'type': 'string'}),
+        'NetworkObjectList': _list_of('NetworkObject'),
+        'SecurityZone': _obj(id={'type': 'string'}, name={'type': 'string'}, mode={'type': 'string'},
+                             interfaces={'type': 'array', 'items': _ref('ReferenceModel')},
+                             type={'type': 'string'}),
+        'SecurityZoneList': _list_of('SecurityZone'),
+        'AccessPolicy': _obj(id={'type': 'string'}, name={'type': 'string'}, type={'type': 'string'}),
+        'AccessPolicyList': _list_of('AccessPolicy'),
+        'AccessRule': _obj(id={'type': 'string'}, name={'type': 'string'}, type={'type': 'string'},
+                           ruleAction={'type': 'string'}, enabled={'type': 'boolean'}),
+        'AccessRuleList': _list_of('AccessRule'),
+        'DHCPServer': _obj(addressPool={'type': 'string'}, enableDHCP={'type': 'boolean'},
+                           interface=_ref('ReferenceModel'), type={'type': 'string'}),
+        'DHCPServerContainer': _obj(id={'type': 'string'}, name={'type': 'string'},
+                                    servers={'type': 'array', 'items': _ref('DHCPServer')},
+                                    type={'type': 'string'}),
+        'DHCPServerContainerList': _list_of('DHCPServerContainer'),
+        'OSPF': _obj(id={'type': 'string'}, name={'type': 'string'}, processId={'type': 'string'},
+                     type={'type': 'string'}),
+        'InitialProvision': _obj(id={'type': 'string'}, type={'type': 'string'}),
+        'DeploymentStatus': _obj(id={'type': 'string'}, state={'type': 'string'},
+                                 statusMessage={'type': 'string'}, type={'type': 'string'}),
+    },
+    'paths': {
+        '/devices/default/action/provision': {
+            'post': _op('InitialProvision', 'addInitialProvision', [BODY_PARAM], 'InitialProvision'),
+        },
+        '/devices/default/interfaces': {
+            'get': _op('Interface', 'getPhysicalInterfaceList', [], 'PhysicalInterfaceList'),
+        },
+        '/devices/default/interfaces/{objId}': {
+            'put': _op('Interface', 'editPhysicalInterface', [_param('objId'), BODY_PARAM], 'PhysicalInterface'),
+        },
+        '/object/networks': {
+            'get': _op('NetworkObject', 'getNetworkObjectList',
+                       [_param('filter', 'query', required=False)], 'NetworkObjectList'),
+            'post': _op('NetworkObject', 'addNetworkObject', [BODY_PARAM], 'NetworkObject'),
+        },
+        '/object/securityzones': {
+            'get': _op('SecurityZone', 'getSecurityZoneList', [], 'SecurityZoneList'),
+            'post': _op('SecurityZone', 'addSecurityZone', [BODY_PARAM], 'SecurityZone'),
+        },
+        '/policy/accesspolicies': {
+            'get': _op('AccessPolicy', 'getAccessPolicyList', [], 'AccessPolicyList'),
+        },
+        '/policy/accesspolicies/{parentId}/accessrules': {
+            'get': _op('AccessPolicy', 'getAccessRuleList', [_param('parentId')], 'AccessRuleList'),
+            'post': _op('AccessPolicy', 'addAccessRule', [_param('parentId'), BODY_PARAM], 'AccessRule'),
+        },
+        '/policy/accesspolicies/{parentId}/accessrules/{objId}': {
+            'delete': _op('AccessPolicy', 'deleteAccessRule', [_param('parentId'), _param('objId')]),
+        },
+        '/devicesettings/default/dhcpservercontainers': {
+            'get': _op('DHCPServerContainer', 'getDHCPServerContainerList', [], 'DHCPServerContainerList'),
+        },
+        '/devicesettings/default/dhcpservercontainers/{objId}': {
+            'put': _op('DHCPServerContainer', 'editDHCPServerContainer',
+                       [_param('objId'), BODY_PARAM], 'DHCPServerContainer'),
+        },
+        '/devices/default/routing/virtualrouters/{vrfId}/ospf': {
+            'post': _op('OSPF', 'addOSPF', [_param('vrfId'), BODY_PARAM], 'OSPF'),
+        },
+        '/operational/deploy': {
+            'post': _op('Deployment', 'addDeployment', [BODY_PARAM], 'DeploymentStatus'),
+        },
+        '/operational/deploy/{objId}': {
+            'get': _op('Deployment', 'getDeployment', [_param('objId')], 'DeploymentStatus'),
+        },
+    },
+}
+
+
+class FdmState:
+    """In-memory FDM object store shared by all request handlers"""
+
+    def __init__(self, interfaces=DEFAULT_INTERFACES, deploy_seconds: float = 0.0):
+        self.lock = threading.Lock()
+        self.deploy_seconds = deploy_seconds
+        self.objects = collections.defaultdict(dict)
+        self.calls = collections.Counter()
+        self.requests = []
+        for hw_name in interfaces:
+            self.add('interfaces', {
+                'type': 'physicalinterface', 'name': '', 'hardwareName': hw_name, 'enable': False,
+                'ipv4': {'type': 'interfaceipv4', 'ipType': 'STATIC', 'dhcp': False,
+                         'ipAddress': {'type': 'haipv4address', 'ipAddress': None, 'netmask': None}},
+            })
+        self.add('accesspolicies', {'type': 'accesspolicy', 'name': DEFAULT_POLICY})
+        self.add('dhcpservercontainers', {
+            'type': 'dhcpservercontainer', 'name': 'dhcpservercontainer',
+            'servers': [{'type': 'dhcpserver', 'addressPool': '192.168.45.46-192.168.45.254',
+                         'enableDHCP': True, 'interface': None}],
+        })
+
+    def add(self, collection: str, body: dict):
+        """Store a new object in a collection and return it"""
+        obj = dict(body)
+        obj['id'] = str(uuid.uuid4())
+        self.objects[collection][obj['id']] = obj
+        return obj
+
+    def items(self, collection: str):
+        """Return every object of a collection"""
+        return list(self.objects[collection].values())
+
+
+class FdmRequestHandler(BaseHTTPRequestHandler):
+    """Serve the subset of the FDM API used by SwaggerConnector"""
+
+    server_version = 'FDMStandIn/1.0'
+    routes = [
+        ('POST', r'/fdm/token$', 'token'),
+        ('POST', r'/devices/default/action/provision$', 'provision'),
+        ('GET', r'/devices/default/interfaces$', 'list_interfaces'),
+        ('PUT', r'/devices/default/interfaces/(?P<obj_id>[^/]+)$', 'replace_interface'),
+        ('GET', r'/object/networks$', 'list_networks'),
+        ('POST', r'/object/networks$', 'add_network'),
+        ('GET', r'/object/securityzones$', 'list_zones'),
+        ('POST', r'/object/securityzones$', 'add_zone'),
+        ('GET', r'/policy/accesspolicies$', 'list_policies'),
+        ('GET', r'/policy/accesspolicies/(?P<parent_id>[^/]+)/accessrules$', 'list_rules'),
+        ('POST', r'/policy/accesspolicies/(?P<parent_id>[^/]+)/accessrules$', 'add_rule'),
+        ('DELETE', r'/policy/accesspolicies/(?P<parent_id>[^/]+)/accessrules/(?P<obj_id>[^/]+)$', 'delete_rule'),
+        ('GET', r'/devicesettings/default/dhcpservercontainers$', 'list_dhcp'),
+        ('PUT', r'/devicesettings/default/dhcpservercontainers/(?P<obj_id>[^/]+)$', 'replace_dhcp'),
+        ('POST', r'/devices/default/routing/virtualrouters/(?P<vrf_id>[^/]+)/ospf$', 'add_ospf'),
+        ('POST', r'/operational/deploy$', 'add_deployment'),
+        ('GET', r'/operational/deploy/(?P<obj_id>[^/]+)$', 'get_deployment'),
+    ]
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep benchmark output quiet"""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Dispatch GET requests"""
+        self._dispatch('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Dispatch POST requests"""
+        self._dispatch('POST')
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        """Dispatch PUT requests"""
+        self._dispatch('PUT')
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """Dispatch DELETE requests"""
+        self._dispatch('DELETE')
+
+    @property
+    def state(self) -> FdmState:
+        """Return the shared object store"""
+        return self.server.state
+
+    def _dispatch(self, method: str):
+        """Find the handler for the request, apply latency and send the JSON reply"""
+        url = urlsplit(self.path)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if method == 'GET' and url.path == '/apispec/ngfw.json':
+            self._reply(200, NGFW_SPEC)
+            return
+        if url.path.startswith(BASE_PATH):
+            path = url.path[len(BASE_PATH):]
+            for route_method, pattern, handler in self.routes:
+                match = re.match(pattern, path)
+                if route_method == method and match:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    body = json.loads(self.rfile.read(length)) if length else {}
+                    query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                    with self.state.lock:
+                        self.state.calls[handler] += 1
+                        if method != 'GET' and handler != 'token':
+                            self.state.requests.append({'method': method, 'path': path, 'body': body})
+                        status, payload = getattr(self, handler)(body, query, **match.groupdict())
+                    self._reply(status, payload)
+                    return
+        self._reply(404, {'error': {'messages': [{'description': f'No route for {method} {url.path}'}]}})
+
+    def _reply(self, status: int, payload):
+        data = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def _listing(items):
+        return 200, {'items': items, 'paging': {'offset': 0, 'limit': len(items), 'count': len(items)}}
+
+    def _replace(self, collection, obj_id, body):
+        if obj_id not in self.state.objects[collection]:
+            return 404, {'error': {'messages': [{'description': f'{obj_id} not found'}]}}
+        body['id'] = obj_id
+        self.state.objects[collection][obj_id] = body
+        return 200, body
+
+    def token(self, body, _query):
+        """Issue a password grant token"""
+        if body.get('grant_type') != 'password':
+            return 400, {'message': 'Unsupported grant_type'}
+        return 200, {'access_token': uuid.uuid4().hex, 'refresh_token': uuid.uuid4().hex,
+                     'token_type': 'Bearer', 'expires_in': 1800}
+
+    def provision(self, body, _query):
+        """Accept the EULA once, like FDM does"""
+        if self.state.items('provision'):
+            return 422, {'error': {'messages': [{'description': 'Initial provisioning already done'}]}}
+        return 200, self.state.add('provision', body)
+
+    def list_interfaces(self, _body, _query):
+        """Return the physical interfaces"""
+        return self._listing(self.state.items('interfaces'))
+
+    def replace_interface(self, body, _query, obj_id):
+        """Replace a physical interface"""
+        return self._replace('interfaces', obj_id, body)
+
+    def list_networks(self, _body, query):
+        """Return network objects, honouring the name filter"""
+        items = self.state.items('networks')
+        name = query.get('filter', '').partition('name:')[2]
+        if name:
+            items = [i for i in items if i.get('name') == name]
+        return self._listing(items)
+
+    def add_network(self, body, _query):
+        """Create a network object"""
+        return 200, self.state.add('networks', body)
+
+    def list_zones(self, _body, _query):
+        """Return the security zones"""
+        return self._listing(self.state.items('securityzones'))
+
+    def add_zone(self, body, _query):
+        """Create a security zone"""
+        return 200, self.state.add('securityzones', body)
+
+    def list_policies(self, _body, _query):
+        """Return the access policies"""
+        return self._listing(self.state.items('accesspolicies'))
+
+    def list_rules(self, _body, _query, parent_id):
+        """Return the rules of an access policy"""
+        return self._listing([r for r in self.state.items('accessrules') if r['parent_id'] == parent_id])
+
+    def add_rule(self, body, _query, parent_id):
+        """Add a rule to an access policy"""
+        return 200, self.state.add('accessrules', dict(body, parent_id=parent_id))
+
+    def delete_rule(self, _body, _query, parent_id, obj_id):
+        """Delete a rule from an access policy"""
+        rule = self.state.objects['accessrules'].get(obj_id)
+        if not rule or rule['parent_id'] != parent_id:
+            return 404, {'error': {'messages': [{'description': f'{obj_id} not found'}]}}
+        del self.state.objects['accessrules'][obj_id]
+        return 204, None
+
+    def list_dhcp(self, _body, _query):
+        """Return the DHCP server containers"""
+        return self._listing(self.state.items('dhcpservercontainers'))
+
+    def replace_dhcp(self, body, _query, obj_id):
+        """Replace a DHCP server container"""
+        return self._replace('dhcpservercontainers', obj_id, body)
+
+    def add_ospf(self, body, _query, vrf_id):
+        """Create an OSPF process in a virtual router"""
+        return 200, self.state.add('ospf', dict(body, vrf_id=vrf_id))
+
+    def add_deployment(self, body, _query):
+        """Start a deployment"""
+        deployment = self.state.add('deployments', dict(body, type='deploymentstatus', started=time.time()))
+        return 200, dict(deployment, state='QUEUED', statusMessage='Deployment queued')
+
+    def get_deployment(self, _body, _query, obj_id):
+        """Report a deployment, finished once deploy_seconds have passed"""
+        deployment = self.state.objects['deployments'].get(obj_id)
+        if not deployment:
+            return 404, {'error': {'messages': [{'description': f'{obj_id} not found'}]}}
+        if time.time() - deployment['started'] >= self.state.deploy_seconds:
+            return 200, dict(deployment, state='DEPLOYED', statusMessage='Deployed successfully')
+        return 200, dict(deployment, state='DEPLOYING', statusMessage='Deployment in progress')
+
+
+class FdmStandIn:
+    """Run the FDM stand-in server in a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency: float = 0.0, state: FdmState = None):
+        self.server = ThreadingHTTPServer((host, port), FdmRequestHandler)
+        self.server.latency = latency
+        self.server.state = state or FdmState()
+        self.protocol = 'http'
+        self._thread = None
+
+    @property
+    def state(self) -> FdmState:
+        """Return the in-memory object store"""
+        return self.server.state
+
+    @property
+    def address(self):
+        """Return the (host, port) the server listens on"""
+        return self.server.server_address[:2]
+
+    def enable_tls(self, certfile: str, keyfile: str = None):
+        """Serve HTTPS with the given certificate, like a real FDM"""
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.protocol = 'https'
+
+    def start(self):
+        """Start serving in a daemon thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket"""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def point_device(self, device):
+        """Point a testbed device's swagger connection at this stand-in"""
+        host, port = self.address
+        device.connections.swagger['ip'] = host
+        device.connections.swagger['port'] = port
+        device.connections.swagger['protocol'] = self.protocol
+        return device
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def run_provisioning(device, defence: bool = True):
+    """Run the swagger steps of the configure script, then the defence script, on the device's testbed and time each"""
+    # pylint: disable=import-outside-toplevel
+    from pyats.aetest.steps import Steps
+    import pyats_add_defense_ftd
+    import pyats_configure_devices
+    from topology_index import TopologyIndex
+    configure = pyats_configure_devices.CommonSetup()
+    configure.tb = device.testbed
+    configure.index = TopologyIndex(device.testbed)
+    steps = configure.swagger_steps()
+    if defence:
+        defend = pyats_add_defense_ftd.CommonSetup()
+        defend.tb = device.testbed
+        steps += [
+            ("Add rule against attacker on FTD", functools.partial(defend.add_attacker_rule, Steps())),
+            ("Deploy FTD configuration", functools.partial(defend.swagger_deploy, Steps())),
+        ]
+    timings = []
+    for name, step in steps:
+        start = time.perf_counter()
+        step()
+        timings.append((name, time.perf_counter() - start))
+    return timings
+
+
+def main():
+    """Serve the stand-in, or benchmark the FTD provisioning flow against it"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--certfile', help='serve HTTPS with this certificate')
+    parser.add_argument('--keyfile')
+    parser.add_argument('--benchmark', action='store_true', help='run the provisioning flow and exit')
+    parser.add_argument('--testbed', default='main_testbed.yaml')
+    args = parser.parse_args()
+
+    stand_in = FdmStandIn(args.host, args.port, latency=args.latency)
+    if args.certfile:
+        stand_in.enable_tls(args.certfile, args.keyfile)
+    if not args.benchmark:
+        print(f'FDM stand-in listening on {stand_in.protocol}://{args.host}:{stand_in.address[1]}')
+        stand_in.server.serve_forever()
+        return
+
+    from pyats import topology  # pylint: disable=import-outside-toplevel
+    testbed = topology.loader.load(args.testbed)
+    device = next(d for d in testbed.devices.values() if d.custom.role == 'firewall')
+    with stand_in:
+        stand_in.point_device(device)
+        start = time.perf_counter()
+        timings = run_provisioning(device)
+        total = time.perf_counter() - start
+    for name, duration in timings:
+        print(f'{name:<42}{duration * 1000:10.1f} ms')
+    print(f'{"total":<42}{total * 1000:10.1f} ms')
+    for handler, count in sorted(stand_in.state.calls.items()):
+        print(f'{handler:<42}{count:10d} calls')
+    print(f'{"total":<42}{sum(stand_in.state.calls.values()):10d} calls')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Compare golden and current configs for a whole fleet in parallel and write one drift report"""
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from project.config_helper import ParseCache
+from project.self_diagnose import SelfDiagnose
+
+CONFIG_FILE = re.compile(r'^(?P<kind>golden|current)_running_config_(?P<device>.+)\.txt$')
+FLEET_CACHE_ENTRIES = 256
+_WORKER_CACHES = {}
+
+
+def find_config_pairs(directory: str) -> dict:
+    """Map every device found in a directory to its golden and current config paths"""
+    pairs = {}
+    for name in os.listdir(directory):
+        match = CONFIG_FILE.match(name)
+        if match:
+            pairs.setdefault(match.group('device'), {})[match.group('kind')] = os.path.join(directory, name)
+    return pairs
+
+
+def worker_cache(cache_dir: str = None) -> ParseCache:
+    """Return this process's parse cache for the fleet run: in memory, or in cache_dir when given
+
+    It is separate from self_diagnose's cache, so workers never write into the caller's
+    working directory or evict the trees of interactive self-diagnose runs.
+    """
+    if cache_dir not in _WORKER_CACHES:
+        _WORKER_CACHES[cache_dir] = ParseCache(max_entries=FLEET_CACHE_ENTRIES, directory=cache_dir)
+    return _WORKER_CACHES[cache_dir]
+
+
+def compare_device(device: str, golden: str, current: str, cache_dir: str = None) -> tuple:
+    """Diff one device's configs; runs inside a worker process"""
+    start = time.perf_counter()
+    missing_blocks = SelfDiagnose(None, None, device).compare_configs(golden, current, cache=worker_cache(cache_dir))
+    drift = {section: blocks for section, blocks in missing_blocks.items() if blocks}
+    return device, {
+        'drift': bool(drift),
+        'sections': drift,
+        'lines': sum(block.count('\n') or 1 for blocks in drift.values() for block in blocks),
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+
+
+def compare_fleet(directory: str, workers: int = None, cache_dir: str = None) -> dict:
+    """Diff every golden/current pair of a directory across a process pool"""
+    start = time.perf_counter()
+    pairs = find_config_pairs(directory)
+    complete = sorted(d for d, files in pairs.items() if len(files) == 2)
+    devices = {}
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(complete) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(compare_device, complete,
+                               [pairs[d]['golden'] for d in complete],
+                               [pairs[d]['current'] for d in complete],
+                               [cache_dir] * len(complete),
+                               chunksize=chunksize)
+        for device, result in results:
+            devices[device] = result
+    return {
+        'directory': os.path.abspath(directory),
+        'compared': len(devices),
+        'drifted': sorted(d for d, result in devices.items() if result['drift']),
+        'incomplete': {d: sorted(files) for d, files in sorted(pairs.items()) if len(files) != 2},
+        'seconds': round(time.perf_counter() - start, 4),
+        'devices': devices,
+    }
+
+
+def main():
+    """Run the fleet comparison from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('directory', help='directory holding golden_/current_running_config_<device>.txt files')
+    parser.add_argument('--output', default='drift_report.json')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to the CPU count')
+    parser.add_argument('--cache-dir', default=None, help='keep parsed trees here between runs, in memory if omitted')
+    args = parser.parse_args()
+
+    report = compare_fleet(args.directory, args.workers, args.cache_dir)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    for device in report['drifted']:
+        result = report['devices'][device]
+        print(f"{device:<24}{result['lines']:6d} lines  {', '.join(result['sections'])}")
+    print(f"{len(report['drifted'])}/{report['compared']} devices drifted in {report['seconds']}s"
+          f" -> {args.output}")
+    for device, files in report['incomplete'].items():
+        print(f"Skipped {device}: only {', '.join(files)} config found")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Batch Genie configuration for one device into a single configure session"""
+import textwrap
+
+from genie.libs.conf.interface.iosxe import Interface
+from genie.libs.conf.ospf import Ospf
+
+
+class ConfigBatch:
+    """Collect Genie conf objects, built configs and raw snippets, then push them with one configure call
+
+    Every unicon configure enters and leaves config mode and waits for its prompts, so pushing
+    the whole batch at once pays that cost once per device instead of once per feature.
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self.lines = []
+
+    def add(self, config):
+        """Queue a Genie conf object (built with apply=False), a built CliConfig or a list of lines"""
+        if hasattr(config, 'build_config'):
+            config = config.build_config(apply=False)
+        if hasattr(config, 'cli_config'):
+            config = config.cli_config.data
+        if isinstance(config, str):
+            return self.add_snippet(config)
+        self.lines.extend(line for line in config if line.strip())
+        return self
+
+    def add_snippet(self, text: str):
+        """Queue a raw CLI snippet; the indentation of a triple-quoted block is removed"""
+        self.lines.extend(line for line in textwrap.dedent(text).splitlines() if line.strip())
+        return self
+
+    def render(self) -> str:
+        """Return the queued configuration as one text block"""
+        return '\n'.join(self.lines)
+
+    def push(self):
+        """Send everything queued in a single configure session and empty the batch"""
+        if not self.lines:
+            return None
+        output = self.device.configure(self.render())
+        self.lines = []
+        return output
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.push()
+
+
+def add_interfaces(batch: ConfigBatch, dev, interfaces):
+    """Queue the addressing of interfaces taken from the testbed, enabling them"""
+    for testbed_intf in interfaces:
+        intf = Interface(name=testbed_intf.name)
+        intf.device = dev
+        intf.ipv4 = testbed_intf.ipv4
+        intf.enabled = True
+        batch.add(intf)
+    return batch
+
+
+def add_ospf(batch: ConfigBatch, dev, interface_names, process_id: str = '1', area: str = '0'):
+    """Queue an OSPF process with the given interfaces in one area"""
+    ospf = Ospf()
+    da = ospf.device_attr[dev]
+    va = da.vrf_attr['default']
+    va.instance = process_id
+    for ifname in interface_names:
+        ia = va.area_attr[area].interface_attr[ifname]
+        ia.if_admin_control = True
+    return batch.add(da)
+
+
+def add_ssh_acl(batch: ConfigBatch, container_ip: str):
+    """Queue the SSH ACL that only lets the automation container reach the vty lines"""
+    return batch.add_snippet(f"""
+        ip access-list standard SSH
+         permit host {container_ip}
+         deny any
+        line vty 0 4
+         access-class SSH in
+         transport input ssh
+        """)
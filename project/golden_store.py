@@ -0,0 +1,125 @@
+"""Versioned, content-addressed store for golden device configurations"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+def _atomic_write(path: str, data: bytes):
+    """Write a file through a temporary file and a rename, so readers never see it half written"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class GoldenStore:
+    """Keep every golden config version per device, deduplicated by SHA-256 and gzip-compressed
+
+    Layout: objects/<sha256>.gz holds each distinct config once, devices/<name>.json holds
+    the ordered version history of a device, the last entry being the latest.
+    """
+
+    def __init__(self, root: str = 'golden_store'):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.devices_dir = os.path.join(root, 'devices')
+
+    def _history_path(self, device: str) -> str:
+        return os.path.join(self.devices_dir, f'{device}.json')
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, f'{digest}.gz')
+
+    def history(self, device: str) -> list:
+        """Return every stored version of a device, oldest first"""
+        try:
+            with open(self._history_path(device), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+
+    def latest(self, device: str):
+        """Return the latest version entry of a device, or None"""
+        history = self.history(device)
+        return history[-1] if history else None
+
+    def find(self, device: str, checksum: str):
+        """Return the newest version captured while the device reported this config checksum"""
+        if not checksum:
+            return None
+        return next((entry for entry in reversed(self.history(device)) if entry.get('checksum') == checksum), None)
+
+    def put(self, device: str, text: str, checksum: str = None) -> dict:
+        """Store a config for a device and return its version entry
+
+        Content already stored is not written again, and identical consecutive captures
+        reuse the latest version instead of adding a new one.
+        """
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.devices_dir, exist_ok=True)
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self._object_path(digest)):
+            _atomic_write(self._object_path(digest), gzip.compress(data))
+        history = self.history(device)
+        if history and history[-1]['digest'] == digest:
+            if checksum and history[-1].get('checksum') != checksum:
+                history[-1]['checksum'] = checksum
+                _atomic_write(self._history_path(device), json.dumps(history, indent=1).encode())
+            return history[-1]
+        entry = {
+            'version': history[-1]['version'] + 1 if history else 1,
+            'digest': digest,
+            'checksum': checksum,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        history.append(entry)
+        _atomic_write(self._history_path(device), json.dumps(history, indent=1).encode())
+        return entry
+
+    def get(self, device: str, version: int = None) -> str:
+        """Return the config text of a version, the latest one by default"""
+        history = self.history(device)
+        if version is None:
+            entry = history[-1] if history else None
+        else:
+            entry = next((e for e in history if e['version'] == version), None)
+        if entry is None:
+            raise KeyError(f'No golden config version {version or "latest"} for {device}')
+        with open(self._object_path(entry['digest']), 'rb') as file:
+            return gzip.decompress(file.read()).decode('utf-8')
+
+    def checkout(self, device: str, path: str, version: int = None) -> str:
+        """Write a stored version to a config file, e.g. the golden config used by SelfDiagnose"""
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.get(device, version))
+        return path
+
+
+def main():
+    """Query the golden config store from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('command', choices=['history', 'show'])
+    parser.add_argument('device')
+    parser.add_argument('--version', type=int)
+    parser.add_argument('--root', default='golden_store')
+    args = parser.parse_args()
+
+    store = GoldenStore(args.root)
+    if args.command == 'history':
+        for entry in store.history(args.device):
+            print(f"v{entry['version']:<4}{entry['timestamp']}  {entry['digest'][:12]}  {entry['checksum'] or '-'}")
+    else:
+        print(store.get(args.device, args.version), end='')
+
+
+if __name__ == '__main__':
+    main()
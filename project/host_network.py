@@ -0,0 +1,73 @@
+"""Program the automation host's addresses and routes from the testbed in one ip -batch call"""
+import argparse
+import json
+import subprocess
+
+from project.testbed_cache import DEFAULT_TESTBED
+from project.topology_index import load_index
+
+
+def testbed_state(index) -> dict:
+    """Return the addresses the host needs and one route per data subnet, taken from the topology index"""
+    server = index.devices[index.server]
+    return {
+        'addresses': {name: str(intf.ipv4) for name, intf in server.interfaces.items()},
+        'routes': dict(index.host_gateways),
+    }
+
+
+def kernel_state(run=subprocess.run) -> dict:
+    """Read the current IPv4 addresses, link states and routes of the host; needs no root"""
+    links = json.loads(run(['ip', '-j', '-4', 'addr', 'show'], capture_output=True, text=True, check=True).stdout)
+    routes = json.loads(run(['ip', '-j', '-4', 'route', 'show'], capture_output=True, text=True, check=True).stdout)
+    return {
+        'addresses': {link['ifname']: {f"{a['local']}/{a['prefixlen']}" for a in link.get('addr_info', [])}
+                      for link in links},
+        'up': {link['ifname'] for link in links if 'UP' in link.get('flags', [])},
+        'routes': {route['dst']: route.get('gateway') for route in routes},
+    }
+
+
+def plan(desired: dict, current: dict) -> list:
+    """Return the ip -batch commands that bring the kernel to the desired state, nothing if it already is"""
+    commands = []
+    for ifname, cidr in desired['addresses'].items():
+        if cidr not in current['addresses'].get(ifname, ()):
+            commands.append(f'addr replace {cidr} dev {ifname}')
+        if ifname not in current['up']:
+            commands.append(f'link set dev {ifname} up')
+    for subnet, gateway in desired['routes'].items():
+        if current['routes'].get(subnet) != gateway:
+            commands.append(f'route replace {subnet} via {gateway}')
+    return commands
+
+
+def apply(commands: list, dry_run: bool = False) -> str:
+    """Run all commands in a single privileged ip -batch process, or only return them with dry_run"""
+    batch = ''.join(f'{command}\n' for command in commands)
+    if dry_run or not commands:
+        return batch
+    subprocess.run(['sudo', 'ip', '-batch', '-'], input=batch, text=True, check=True)
+    return batch
+
+
+def sync(index, dry_run: bool = False, current: dict = None) -> list:
+    """Diff the testbed against the kernel tables and apply the difference"""
+    commands = plan(testbed_state(index), current if current is not None else kernel_state())
+    apply(commands, dry_run)
+    return commands
+
+
+def main():
+    """Show or apply the host networking changes from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--testbed', default=DEFAULT_TESTBED)
+    parser.add_argument('--dry-run', action='store_true', help='print the ip -batch commands without running them')
+    args = parser.parse_args()
+
+    commands = sync(load_index(args.testbed), dry_run=args.dry_run)
+    print(''.join(f'{command}\n' for command in commands) or 'Host networking already up to date')
+
+
+if __name__ == '__main__':
+    main()
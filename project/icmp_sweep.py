@@ -0,0 +1,102 @@
+"""Asyncio ICMP sweep that pings many addresses at once and parses loss and RTT into structured results"""
+import argparse
+import asyncio
+import json
+import math
+import re
+import time
+
+PING = 'ping'
+PACKETS_RE = re.compile(r'(?P<sent>\d+) packets transmitted, (?P<received>\d+) (?:packets )?received')
+RTT_RE = re.compile(r'= (?P<min>[\d.]+)/(?P<avg>[\d.]+)/(?P<max>[\d.]+)/(?P<mdev>[\d.]+) ms')
+FIELDS = ['target', 'status', 'sent', 'received', 'loss', 'rtt_min', 'rtt_avg', 'rtt_max', 'rtt_mdev', 'seconds']
+
+
+def parse_ping(target: str, output: str) -> dict:
+    """Return the sent/received counts, loss percentage and RTT statistics of one iputils ping run"""
+    result = dict.fromkeys(FIELDS)
+    result.update(target=target, status='unreachable', sent=0, received=0, loss=100.0)
+    packets = PACKETS_RE.search(output)
+    if packets:
+        sent, received = int(packets['sent']), int(packets['received'])
+        result.update(sent=sent, received=received, loss=round(100.0 * (sent - received) / sent, 1) if sent else 100.0)
+        if received:
+            result['status'] = 'reachable' if received == sent else 'lossy'
+    rtt = RTT_RE.search(output)
+    if rtt:
+        result.update({f'rtt_{key}': float(value) for key, value in rtt.groupdict().items()})
+    return result
+
+
+async def probe(target: str, semaphore: asyncio.Semaphore, count: int = 2, timeout: float = 1.0,
+                interval: float = 0.2) -> dict:
+    """Ping one address once a slot of the semaphore is free, never waiting longer than the deadline"""
+    deadline = math.ceil(timeout + interval * (count - 1))
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                PING, '-n', '-c', str(count), '-i', f'{interval:g}', '-W', f'{timeout:g}', '-w', str(deadline), target,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            result = parse_ping(target, '')
+            result.update(status='error', seconds=0.0)
+            print(f'Could not run {PING} for {target}: {e}')
+            return result
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), deadline + 1)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            stdout = b''
+        result = parse_ping(target, stdout.decode(errors='replace'))
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        return result
+
+
+async def sweep(targets, concurrency: int = 256, count: int = 2, timeout: float = 1.0) -> list:
+    """Probe every target with at most concurrency pings running, results in target order"""
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(probe(target, semaphore, count, timeout) for target in dict.fromkeys(targets)))
+
+
+def run_sweep(targets, concurrency: int = 256, count: int = 2, timeout: float = 1.0) -> list:
+    """Run a sweep from synchronous code such as the main menu"""
+    return asyncio.run(sweep(targets, concurrency, count, timeout))
+
+
+def format_table(results) -> str:
+    """Return the results as an aligned text table"""
+    lines = [f"{'target':<18}{'status':<13}{'sent':>5}{'recv':>5}{'loss %':>8}{'min':>9}{'avg':>9}{'max':>9}"]
+    for r in results:
+        rtts = ''.join(f'{r[key]:9.2f}' if r[key] is not None else f"{'-':>9}"
+                       for key in ('rtt_min', 'rtt_avg', 'rtt_max'))
+        lines.append(f"{r['target']:<18}{r['status']:<13}{r['sent']:5d}{r['received']:5d}{r['loss']:8.1f}{rtts}")
+    return '\n'.join(lines)
+
+
+def main():
+    """Sweep the given addresses, or every testbed address, and print a table or JSON"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('targets', nargs='*', help='addresses to ping, defaults to every testbed address')
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--count', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=1.0, help='seconds to wait for each reply')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if not args.targets:
+        from project.pings_and_attacks import ping_targets  # pylint: disable=import-outside-toplevel
+        args.targets = ping_targets()
+    start = time.perf_counter()
+    results = run_sweep(args.targets, args.concurrency, args.count, args.timeout)
+    if args.json:
+        print(json.dumps(results, indent=1))
+    else:
+        print(format_table(results))
+        print(f'{len(results)} targets in {time.perf_counter() - start:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Unit tests for the timed attack scenarios"""
+import os
+import sys
+import tempfile
+import unittest
+import warnings
+from unittest.mock import MagicMock
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+TICKER = 'import time\nfor i in range(3):\n    print("{0}", i, flush=True)\n    time.sleep(0.1)'
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for scheduling actions and merging their output"""
+
+    def test_scenario_is_timed_and_merged(self):
+        """Test actions start at their offsets, run together and end up in one time-ordered log"""
+        from project.attack_scenario import Action, play
+        actions = [Action('ping', 0, [sys.executable, '-c', TICKER.format('ping')]),
+                   Action('dos', 0.15, [sys.executable, '-c', TICKER.format('dos')])]
+        with tempfile.TemporaryDirectory() as tmp:
+            path, records = play(actions, log_path=os.path.join(tmp, 'run.log'), echo=False)
+            with open(path, 'r', encoding='utf-8') as file:
+                lines = file.read().splitlines()
+        offsets = [float(line.split('s [', 1)[0]) for line in lines]
+        self.assertEqual(sorted(offsets), offsets)
+        dos_start = next(o for o, line in zip(offsets, lines) if '[dos] started' in line)
+        self.assertAlmostEqual(0.15, dos_start, delta=0.1)
+        self.assertEqual(10, len(lines))
+        self.assertEqual(10, len(records))
+        names = [line.split('[', 1)[1].split(']', 1)[0] for line in lines]
+        self.assertLess(names.index('dos'), len(names) - 1 - names[::-1].index('ping'))
+
+    def test_duration_and_remote(self):
+        """Test a duration bounds the command with timeout and remote actions go through the host"""
+        from project.attack_scenario import Action
+        host = MagicMock()
+        host.command.side_effect = lambda argv: ['ssh', 'attacker', *argv]
+        action = Action('dos', 3.5, ['sudo', '-n', 'hping3', '--flood'], remote=True, duration=10)
+        self.assertEqual(['ssh', 'attacker', 'timeout', '10s', 'sudo', '-n', 'hping3', '--flood'], action.command(host))
+        with self.assertRaises(ValueError):
+            action.command()
+
+    def test_load_timeline(self):
+        """Test the example timeline is read and ordered by start"""
+        from project.attack_scenario import load_timeline
+        actions = load_timeline(os.path.join(os.path.dirname(__file__), 'attack_timeline.yaml'))
+        self.assertEqual(['ping', 'dos', 'nmap'], [a.name for a in actions])
+        self.assertEqual((3.5, 10, True), (actions[1].start, actions[1].duration, actions[1].remote))
+        self.assertEqual('20', actions[0].argv[2])
@@ -0,0 +1,239 @@
+"""Unit tests for config helper"""
+import os
+import tempfile
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+SAMPLE_CONFIG = """!
+hostname IOU1
+!
+ip dhcp pool GUEST
+ network 192.168.201.0 255.255.255.0
+ default-router 192.168.201.1
+!
+interface Ethernet0/1
+ ip address 192.168.201.1 255.255.255.0
+ ip ospf 1 area 0
+!
+interface Ethernet0/10
+ shutdown
+!
+router ospf 1
+!
+line vty 0 4
+ access-class SSH in
+ login local
+ transport input ssh
+!
+end
+"""
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for ParseConfig"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(SAMPLE_CONFIG)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_get_config_block(self):
+        """Test block lookup by exact section header"""
+        from project.config_helper import ParseConfig
+        with ParseConfig(self.path) as config:
+            block = config.get_config_block('interface Ethernet0/1')
+            self.assertEqual(
+                'interface Ethernet0/1\n'
+                ' ip address 192.168.201.1 255.255.255.0\n'
+                ' ip ospf 1 area 0\n',
+                block
+            )
+            self.assertIsNone(config.get_config_block('interface Ethernet0/2'))
+
+    def test_sections(self):
+        """Test iteration by section type"""
+        from project.config_helper import ParseConfig
+        with ParseConfig(self.path) as config:
+            headers = [node.text for node in config.sections('interface ')]
+            self.assertEqual(['interface Ethernet0/1', 'interface Ethernet0/10'], headers)
+            line_vty = config.get_node('line vty 0 4')
+            self.assertEqual(['access-class SSH in', 'login local', 'transport input ssh'],
+                             [child.text for child in line_vty.children])
+
+    def test_reduce_config_rebuilds_tree(self):
+        """Test the tree follows line changes and serializes back"""
+        from project.config_helper import ParseConfig
+        with ParseConfig(self.path) as config:
+            self.assertEqual(SAMPLE_CONFIG, config.to_config())
+            config.reduce_config()
+            self.assertNotIn('!', config.to_config())
+            self.assertEqual(' default-router 192.168.201.1\n',
+                             config.get_node('ip dhcp pool GUEST').children[-1].line)
+
+    def test_diff_block(self):
+        """Test only changed lines and negations end up in the patch"""
+        from project.config_helper import ConfigNode, diff_block
+        golden = ConfigNode('interface Ethernet0/1\n')
+        current = ConfigNode('interface Ethernet0/1\n')
+        for line in (' ip address 192.168.201.1 255.255.255.0\n', ' ip ospf 1 area 0\n'):
+            golden.children.append(ConfigNode(line, golden))
+        for line in (' shutdown\n', ' no ip address\n', ' ip  ospf 1 area 0\n'):
+            current.children.append(ConfigNode(line, current))
+        self.assertEqual(
+            'interface Ethernet0/1\n'
+            ' no shutdown\n'
+            ' ip address 192.168.201.1 255.255.255.0\n',
+            diff_block(golden, current)
+        )
+        self.assertEqual('', diff_block(golden, golden))
+
+    def test_diff_block_ordered(self):
+        """Test order-sensitive sections are replaced in full"""
+        from project.config_helper import ConfigNode, diff_block
+        golden = ConfigNode('ip access-list standard SSH\n')
+        current = ConfigNode('ip access-list standard SSH\n')
+        for line in (' permit host 192.168.200.254\n', ' deny any\n'):
+            golden.children.append(ConfigNode(line, golden))
+        for line in (' deny any\n', ' permit host 192.168.200.254\n'):
+            current.children.append(ConfigNode(line, current))
+        self.assertEqual(
+            'no ip access-list standard SSH\n'
+            'ip access-list standard SSH\n'
+            ' permit host 192.168.200.254\n'
+            ' deny any\n',
+            diff_block(golden, current, ordered=True)
+        )
+
+    def test_streaming_pipeline(self):
+        """Test queued stages are applied lazily and written back atomically"""
+        from project.config_helper import ParseConfig
+        for use_mmap in (False, True):
+            with ParseConfig(self.path, streaming=True, use_mmap=use_mmap) as config:
+                config.reduce_config()
+                self.assertEqual([], config.lines)
+                headers = [section.text for section in config.iter_sections()]
+                self.assertEqual('hostname IOU1', headers[0])
+                self.assertIn('line vty 0 4', headers)
+                self.assertNotIn('!', headers)
+        with ParseConfig(self.path, streaming=True) as config:
+            config.reduce_config()
+            config.rewrite_file()
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(SAMPLE_CONFIG.replace('!\n', ''), file.read())
+
+    def test_rename_interfaces(self):
+        """Test pattern renaming numbers distinct interfaces past ten matches"""
+        from project.config_helper import ParseConfig
+        with ParseConfig(self.path) as config:
+            config.lines = [f'interface Ethernet1/{i}\n' for i in range(12)] + ['router ospf 1\n',
+                                                                              ' passive-interface Ethernet1/11\n']
+            config.rename_interfaces(r'Ethernet1/\d+', 'GigabitEthernet0/', 0)
+            self.assertEqual('interface GigabitEthernet0/11\n', config.lines[11])
+            self.assertEqual(' passive-interface GigabitEthernet0/11\n', config.lines[-1])
+
+    def test_translate_interfaces(self):
+        """Test mapping and platform rules rewrite every reference in one pass"""
+        from project.config_helper import ParseConfig
+        with ParseConfig(self.path) as config:
+            config.translate_interfaces({'Ethernet0/10': 'Loopback0'}, platforms=('iou', 'iosv'))
+            self.assertIsNotNone(config.get_node('interface GigabitEthernet0/1'))
+            self.assertIsNotNone(config.get_node('interface Loopback0'))
+            self.assertIsNone(config.get_node('interface Ethernet0/1'))
+
+    def test_parse_cache(self):
+        """Test unchanged content is served from memory and from disk"""
+        from project.config_helper import ParseCache, ParseConfig
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParseCache(max_entries=1, directory=directory)
+            with ParseConfig(self.path, cache=cache) as config:
+                config.reduce_config()
+                block = config.get_config_block('line vty 0 4')
+            with ParseConfig(self.path, cache=cache) as config:
+                config.reduce_config()
+                self.assertIsNotNone(config.get_node('hostname IOU1'))
+            self.assertEqual(1, cache.hits)
+            disk_cache = ParseCache(directory=directory)
+            with ParseConfig(self.path, cache=disk_cache) as config:
+                config.reduce_config()
+                self.assertEqual(block, config.get_config_block('line vty 0 4'))
+            self.assertEqual(1, disk_cache.hits)
+            self.assertEqual(1, len([f for f in os.listdir(directory) if f.endswith('.tree')]))
+
+    def test_parse_cache_corrupt_entry(self):
+        """Test a corrupt or truncated cached tree is a miss, is removed and gets rewritten"""
+        import marshal
+        import zlib
+        from project.config_helper import ParseCache, ParseConfig
+        with open(self.path, 'rb') as file:
+            digest = ParseCache.digest(f'{ParseCache.digest(file.read())}:reduce'.encode())
+        for garbage in (b'not a zlib stream', zlib.compress(b'\x00garbage'), zlib.compress(marshal.dumps(42))[:-4],
+                        zlib.compress(marshal.dumps((None, ('line',))))):
+            with tempfile.TemporaryDirectory() as directory:
+                tree = os.path.join(directory, f'{digest}.tree')
+                with open(tree, 'wb') as file:
+                    file.write(garbage)
+                cache = ParseCache(directory=directory)
+                with ParseConfig(self.path, cache=cache) as config:
+                    config.reduce_config()
+                    self.assertIsNotNone(config.get_node('hostname IOU1'))
+                self.assertEqual((0, 1), (cache.hits, cache.misses))
+                rerun = ParseCache(directory=directory)
+                with ParseConfig(self.path, cache=rerun) as config:
+                    config.reduce_config()
+                    self.assertIsNotNone(config.get_node('hostname IOU1'))
+                self.assertEqual(1, rerun.hits)
+
+    def test_parse_cache_warm_hit(self):
+        """Test a warm disk hit skips decoding and parsing and is faster than parsing a large config"""
+        import gc
+        import time
+        from unittest.mock import patch
+        from project.config_helper import ParseCache, ParseConfig
+
+        def load(cache):
+            start = time.perf_counter()
+            with ParseConfig(path, cache=cache) as config:
+                config.reduce_config()
+                node = config.get_node('interface Ethernet174/15')
+                pending = config._pending is not None
+            return time.perf_counter() - start, node, pending
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'large_config.txt')
+            with open(path, 'w', encoding='utf-8') as file:
+                for i in range(2800):
+                    file.write(f'interface Ethernet{i // 16}/{i % 16}\n description link {i}\n'
+                               f' ip address 10.{i // 250}.{i % 250}.1 255.255.255.0\n ip ospf 1 area 0\n!\n')
+            cache_dir = os.path.join(directory, 'cache')
+            load(ParseCache(directory=cache_dir))
+            with patch('project.config_helper.build_sections') as build_mock:
+                _, node, pending = load(ParseCache(directory=cache_dir))
+            build_mock.assert_not_called()
+            self.assertTrue(pending)
+            self.assertEqual(3, len(node.children))
+            gc.disable()  # like timeit, so a collection does not land on one side only
+            try:
+                parse = min(load(None)[0] for _ in range(7))
+                warm = min(load(ParseCache(directory=cache_dir))[0] for _ in range(7))
+            finally:
+                gc.enable()
+        self.assertLess(warm, parse)
+
+    def test_parse_cache_lru_in_memory(self):
+        """Test the cache directory is scanned once and the least recently used trees are evicted"""
+        from unittest.mock import patch
+        from project.config_helper import ConfigNode, ParseCache
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParseCache(max_entries=2, directory=directory)
+            with patch('project.config_helper.os.scandir', wraps=os.scandir) as scandir_mock:
+                for digest in ('a', 'b', 'c', 'd'):
+                    cache.put(digest, ConfigNode())
+            self.assertEqual(1, scandir_mock.call_count)
+            self.assertIsNotNone(ParseCache(directory=directory).get('c'))
+            self.assertEqual(['c.tree', 'd.tree'], sorted(os.listdir(directory)))
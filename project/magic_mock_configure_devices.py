@@ -0,0 +1,33 @@
+"""Unit tests for the device configuration script"""
+import io
+import unittest
+import warnings
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for the console steps of the configuration script"""
+
+    def _setup(self):
+        from pyats_configure_devices import CommonSetup
+        setup = CommonSetup.__new__(CommonSetup)
+        setup.tb = MagicMock()
+        setup.index = MagicMock()
+        conn_class = MagicMock(side_effect=ConnectionRefusedError('console busy'))
+        setup.tb.devices['CSR'].connections.get.return_value = {'class': conn_class}
+        return setup, conn_class
+
+    def test_console_errors_are_logged(self):
+        """Test a console error during CSR initialisation or SSH setup is printed instead of failing the chain"""
+        setup, conn_class = self._setup()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            setup.initial_setup_csr()
+            setup.configure_ssh('CSR')
+        self.assertEqual(2, conn_class.call_count)
+        self.assertEqual(2, output.getvalue().count('Failed to connect to device'))
+        self.assertIn('console busy', output.getvalue())
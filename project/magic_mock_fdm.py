@@ -0,0 +1,91 @@
+"""Unit tests for the swagger connector against the FDM stand-in"""
+import io
+import os
+import unittest
+import warnings
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+TESTBED = os.path.join(os.path.dirname(__file__), 'main_testbed.yaml')
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for the FDM stand-in server"""
+
+    def setUp(self):
+        from project.fdm_stand_in import FdmStandIn
+        self.stand_in = FdmStandIn().start()
+        host, port = self.stand_in.address
+        self.mock_device = MagicMock()
+        self.mock_device.connections.swagger.ip = host
+        self.mock_device.connections.swagger.port = port
+        self.mock_device.connections.swagger.protocol = 'http'
+        self.mock_device.connections.telnet.credentials.login.username = 'admin'
+        self.mock_device.connections.telnet.credentials.login.password.plaintext = 'password123'
+
+    def tearDown(self):
+        self.stand_in.stop()
+
+    def test_connect_and_get_swagger_client(self):
+        """Test token login and spec download"""
+        from lib.connectors.swagger_conn import SwaggerConnector
+        conn = SwaggerConnector(self.mock_device)
+        conn.connect()
+        client = conn.get_swagger_client()
+        self.assertTrue(conn.connected)
+        self.assertTrue(conn._headers['Authorization'].startswith('Bearer '))
+        self.assertIsNotNone(client.get_model('AccessRule'))
+        self.assertEqual(1, self.stand_in.state.calls['token'])
+
+    def test_configure_ftd_interfaces(self):
+        """Test interface edits are kept in memory"""
+        from lib.connectors.swagger_conn import SwaggerConnector
+        conn = SwaggerConnector(self.mock_device)
+        conn.connect()
+        conn.get_swagger_client()
+        outside = MagicMock()
+        outside.name = 'GigabitEthernet0/0'
+        outside.alias = 'outside'
+        outside.ipv4.ip.compressed = '192.168.204.4'
+        outside.ipv4.netmask.exploded = '255.255.255.0'
+        inside = MagicMock()
+        inside.name = 'GigabitEthernet0/1'
+        inside.alias = 'inside'
+        inside.ipv4.ip.compressed = '192.168.205.4'
+        inside.ipv4.netmask.exploded = '255.255.255.0'
+        result = conn.configure_ftd_interfaces(outside, inside)
+        self.assertEqual(2, len(result))
+        names = {i['hardwareName']: i['name'] for i in self.stand_in.state.items('interfaces')}
+        self.assertEqual('outside', names['GigabitEthernet0/0'])
+        self.assertEqual('inside', names['GigabitEthernet0/1'])
+        self.assertEqual(2, self.stand_in.state.calls['replace_interface'])
+
+    def test_deploy(self):
+        """Test deployment reaches a terminal state"""
+        from lib.connectors.swagger_conn import SwaggerConnector
+        conn = SwaggerConnector(self.mock_device)
+        conn.connect()
+        conn.get_swagger_client()
+        conn.deploy()
+        self.assertEqual(1, self.stand_in.state.calls['add_deployment'])
+        self.assertEqual(1, self.stand_in.state.calls['get_deployment'])
+
+    def test_run_provisioning_drives_scripts(self):
+        """Test the benchmark runs the configure and defence script steps against the stand-in"""
+        from pyats import topology
+        from project.fdm_stand_in import run_provisioning
+        testbed = topology.loader.load(TESTBED)
+        device = testbed.devices['FTD']
+        self.stand_in.point_device(device)
+        with redirect_stdout(io.StringIO()):
+            timings = run_provisioning(device)
+        names = [name for name, _ in timings]
+        self.assertEqual('Connect to FTD and finish initial setup', names[0])
+        self.assertEqual(['Add rule against attacker on FTD', 'Deploy FTD configuration'], names[-2:])
+        rules = {rule['name']: rule for rule in self.stand_in.state.items('accessrules')}
+        self.assertEqual('DENY', rules['DENY_ATTACKER']['ruleAction'])
+        self.assertEqual(2, self.stand_in.state.calls['add_deployment'])
+        self.assertEqual(1, self.stand_in.state.calls['provision'])
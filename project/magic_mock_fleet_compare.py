@@ -0,0 +1,80 @@
+"""Unit tests for the fleet config comparison"""
+import os
+import tempfile
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+GOLDEN = """!
+hostname {device}
+!
+interface Ethernet0/1
+ ip address 192.168.201.1 255.255.255.0
+ ip ospf 1 area 0
+!
+router ospf 1
+!
+end
+"""
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for pairing fleet configs and reporting drift"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        for device in ('R1', 'R2', 'R3'):
+            self._write(f'golden_running_config_{device}.txt', GOLDEN.format(device=device))
+        self._write('current_running_config_R1.txt', GOLDEN.format(device='R1'))
+        self._write('current_running_config_R2.txt',
+                    GOLDEN.format(device='R2').replace(' ip ospf 1 area 0\n', ''))
+        self._write('notes.txt', 'not a config')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, text):
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as file:
+            file.write(text)
+
+    def test_find_config_pairs(self):
+        """Test golden and current files are paired per device and other files are ignored"""
+        from project.fleet_compare import find_config_pairs
+        pairs = find_config_pairs(self.directory)
+        self.assertEqual({'R1', 'R2', 'R3'}, set(pairs))
+        self.assertEqual({'golden', 'current'}, set(pairs['R2']))
+        self.assertEqual(['golden'], list(pairs['R3']))
+        self.assertEqual(os.path.join(self.directory, 'current_running_config_R2.txt'), pairs['R2']['current'])
+
+    def test_compare_fleet_report(self):
+        """Test the report flags the drifted device, skips the incomplete one and leaves the CWD alone"""
+        import json
+        from project.fleet_compare import compare_fleet
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as run_dir:
+            os.chdir(run_dir)
+            try:
+                report = json.loads(json.dumps(compare_fleet(self.directory, workers=1)))
+                self.assertEqual([], os.listdir(run_dir))
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(2, report['compared'])
+        self.assertEqual(['R2'], report['drifted'])
+        self.assertEqual({'R3': ['golden']}, report['incomplete'])
+        self.assertFalse(report['devices']['R1']['drift'])
+        self.assertEqual({}, report['devices']['R1']['sections'])
+        r2 = report['devices']['R2']
+        self.assertTrue(r2['drift'])
+        self.assertIn('interfaces', r2['sections'])
+        self.assertIn('ip ospf 1 area 0', ''.join(r2['sections']['interfaces']))
+        self.assertGreater(r2['lines'], 0)
+
+    def test_cache_dir(self):
+        """Test a fleet run with a cache directory keeps its trees there"""
+        from project.fleet_compare import compare_fleet
+        with tempfile.TemporaryDirectory() as cache_dir:
+            compare_fleet(self.directory, workers=1, cache_dir=cache_dir)
+            self.assertTrue(any(name.endswith('.tree') for name in os.listdir(cache_dir)))
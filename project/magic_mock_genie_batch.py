@@ -0,0 +1,44 @@
+"""Unit tests for the Genie config batch"""
+import unittest
+import warnings
+from unittest.mock import MagicMock
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for ConfigBatch"""
+
+    def test_single_configure(self):
+        """Test Genie objects and raw snippets are pushed in one configure call"""
+        from genie.conf.base import Device, Testbed
+        from genie.libs.conf.interface.iosxe import Interface
+        from project.genie_batch import ConfigBatch
+        dev = Device('CSR', os='iosxe', testbed=Testbed())
+        dev.configure = MagicMock(return_value='')
+        intf = Interface(name='GigabitEthernet2', device=dev)
+        intf.ipv4 = '192.168.203.2/24'
+        intf.enabled = True
+        with ConfigBatch(dev) as batch:
+            batch.add(intf)
+            batch.add_snippet("""
+            line vty 0 4
+             transport input ssh
+            """)
+        dev.configure.assert_called_once()
+        sent = dev.configure.call_args.args[0].splitlines()
+        self.assertEqual('interface GigabitEthernet2', sent[0])
+        self.assertIn(' ip address 192.168.203.2 255.255.255.0', sent)
+        self.assertEqual(['line vty 0 4', ' transport input ssh'], sent[-2:])
+        self.assertIsNone(batch.push())
+
+    def test_no_push_on_error(self):
+        """Test a failing build leaves the device untouched"""
+        from project.genie_batch import ConfigBatch
+        dev = MagicMock()
+        with self.assertRaises(KeyError):
+            with ConfigBatch(dev) as batch:
+                batch.add(['router ospf 1'])
+                raise KeyError('GigabitEthernet4')
+        dev.configure.assert_not_called()
@@ -0,0 +1,46 @@
+"""Unit tests for golden config store"""
+import os
+import tempfile
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for GoldenStore"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_deduplicates(self):
+        """Test identical captures reuse the latest version and objects are stored once"""
+        from project.golden_store import GoldenStore
+        store = GoldenStore(self.directory.name)
+        first = store.put('IOU1', 'hostname IOU1\n', checksum='a' * 32)
+        again = store.put('IOU1', 'hostname IOU1\n', checksum='a' * 32)
+        second = store.put('IOU1', 'hostname R1\n')
+        store.put('IOSv', 'hostname IOU1\n')
+        self.assertEqual(1, again['version'])
+        self.assertEqual(first, again)
+        self.assertEqual(2, second['version'])
+        self.assertEqual(second, store.latest('IOU1'))
+        self.assertEqual(2, len(os.listdir(os.path.join(self.directory.name, 'objects'))))
+
+    def test_get_and_checkout(self):
+        """Test older versions can be read back and written out for a rollback"""
+        from project.golden_store import GoldenStore
+        store = GoldenStore(self.directory.name)
+        store.put('IOU1', 'hostname IOU1\n', checksum='b' * 32)
+        store.put('IOU1', 'hostname R1\n')
+        self.assertEqual('hostname R1\n', store.get('IOU1'))
+        self.assertEqual(1, store.find('IOU1', 'b' * 32)['version'])
+        path = store.checkout('IOU1', os.path.join(self.directory.name, 'golden.txt'), version=1)
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual('hostname IOU1\n', file.read())
+        with self.assertRaises(KeyError):
+            store.get('IOSv')
@@ -0,0 +1,60 @@
+"""Unit tests for host networking"""
+import os
+import unittest
+import warnings
+from unittest.mock import MagicMock, patch
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+TESTBED = os.path.join(os.path.dirname(__file__), 'main_testbed.yaml')
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for the host networking diff"""
+
+    def setUp(self):
+        from project.topology_index import load_index
+        self.index = load_index(TESTBED)
+
+    def test_routes_match_baseline(self):
+        """Test shared subnets go via the last attached router and the FTD subnets via CSR, as before the index"""
+        self.assertEqual({
+            '192.168.201.0/24': '192.168.200.1',
+            '192.168.202.0/24': '192.168.200.2',
+            '192.168.203.0/24': '192.168.200.3',
+            '192.168.204.0/24': '192.168.200.3',
+            '192.168.205.0/24': '192.168.200.3',
+        }, self.index.host_gateways)
+
+    def test_dry_run_plan(self):
+        """Test each subnet gets one route from the topology graph and only missing state is planned"""
+        from project.host_network import sync
+        current = {
+            'addresses': {'ens4': {'192.168.200.254/24'}},
+            'up': {'ens4'},
+            'routes': {'192.168.201.0/24': '192.168.200.1', '192.168.202.0/24': '192.168.200.1'},
+        }
+        with patch('project.host_network.subprocess.run') as run_mock:
+            commands = sync(self.index, dry_run=True, current=current)
+        run_mock.assert_not_called()
+        self.assertEqual([
+            'route replace 192.168.202.0/24 via 192.168.200.2',
+            'route replace 192.168.203.0/24 via 192.168.200.3',
+            'route replace 192.168.204.0/24 via 192.168.200.3',
+            'route replace 192.168.205.0/24 via 192.168.200.3',
+        ], commands)
+
+    def test_apply_single_batch(self):
+        """Test a fresh host is programmed with one ip -batch process"""
+        from project.host_network import kernel_state, sync
+        links = '[{"ifname": "ens4", "flags": ["BROADCAST"], "addr_info": []}]'
+        run_mock = MagicMock(side_effect=[MagicMock(stdout=links), MagicMock(stdout='[]')])
+        current = kernel_state(run=run_mock)
+        with patch('project.host_network.subprocess.run') as apply_mock:
+            commands = sync(self.index, current=current)
+        apply_mock.assert_called_once()
+        self.assertEqual(['sudo', 'ip', '-batch', '-'], apply_mock.call_args.args[0])
+        self.assertEqual(''.join(f'{c}\n' for c in commands), apply_mock.call_args.kwargs['input'])
+        self.assertEqual(['addr replace 192.168.200.254/24 dev ens4', 'link set dev ens4 up'], commands[:2])
+        self.assertEqual(7, len(commands))
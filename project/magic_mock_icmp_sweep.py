@@ -0,0 +1,76 @@
+"""Unit tests for the asyncio ICMP sweep"""
+import asyncio
+import time
+import unittest
+import warnings
+from unittest.mock import MagicMock, patch
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+REPLY = """PING 192.168.205.100 (192.168.205.100) 56(84) bytes of data.
+64 bytes from 192.168.205.100: icmp_seq=1 ttl=62 time=1.84 ms
+64 bytes from 192.168.205.100: icmp_seq=2 ttl=62 time=1.12 ms
+
+--- 192.168.205.100 ping statistics ---
+2 packets transmitted, 2 received, 0% packet loss, time 201ms
+rtt min/avg/max/mdev = 1.120/1.480/1.840/0.360 ms
+"""
+PARTIAL = """--- 192.168.202.2 ping statistics ---
+2 packets transmitted, 1 received, 50% packet loss, time 1001ms
+rtt min/avg/max/mdev = 3.000/3.000/3.000/0.000 ms
+"""
+TIMEOUT = """--- 192.168.209.9 ping statistics ---
+2 packets transmitted, 0 received, 100% packet loss, time 1020ms
+"""
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for parsing ping output and running probes concurrently"""
+
+    def test_parse_ping(self):
+        """Test loss and RTT are parsed for full, partial and no replies"""
+        from project.icmp_sweep import parse_ping
+        reply = parse_ping('192.168.205.100', REPLY)
+        self.assertEqual(('reachable', 2, 2, 0.0), (reply['status'], reply['sent'], reply['received'], reply['loss']))
+        self.assertEqual((1.12, 1.48, 1.84, 0.36),
+                         (reply['rtt_min'], reply['rtt_avg'], reply['rtt_max'], reply['rtt_mdev']))
+        partial = parse_ping('192.168.202.2', PARTIAL)
+        self.assertEqual(('lossy', 50.0, 3.0), (partial['status'], partial['loss'], partial['rtt_avg']))
+        lost = parse_ping('192.168.209.9', TIMEOUT)
+        self.assertEqual(('unreachable', 100.0, None), (lost['status'], lost['loss'], lost['rtt_avg']))
+
+    def test_sweep_is_concurrent_and_capped(self):
+        """Test probes overlap up to the concurrency cap and results keep the target order"""
+        from project.icmp_sweep import format_table, run_sweep
+        running = {'now': 0, 'peak': 0}
+
+        async def fake_exec(*args, **_kwargs):
+            proc = MagicMock()
+
+            async def communicate():
+                running['now'] += 1
+                running['peak'] = max(running['peak'], running['now'])
+                await asyncio.sleep(0.05)
+                running['now'] -= 1
+                return (REPLY if args[-1].endswith('.100') else TIMEOUT).encode(), b''
+            proc.communicate = communicate
+            return proc
+
+        targets = [f'10.0.{i // 250}.{i % 250 + 1}' for i in range(200)] + ['192.168.205.100']
+        with patch('project.icmp_sweep.asyncio.create_subprocess_exec', side_effect=fake_exec):
+            start = time.perf_counter()
+            results = run_sweep(targets, concurrency=50)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(targets, [r['target'] for r in results])
+        self.assertEqual(50, running['peak'])
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual('reachable', results[-1]['status'])
+        self.assertIn('192.168.205.100   reachable', format_table(results))
+
+    def test_missing_ping_binary(self):
+        """Test a probe that cannot start reports an error instead of raising"""
+        from project.icmp_sweep import run_sweep
+        with patch('project.icmp_sweep.asyncio.create_subprocess_exec', side_effect=FileNotFoundError('ping')):
+            results = run_sweep(['192.168.200.1'])
+        self.assertEqual('error', results[0]['status'])
@@ -0,0 +1,39 @@
+"""Unit tests for the menu's in-process pyATS runs"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+import warnings
+from unittest.mock import MagicMock, patch
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for running pyATS scripts from the menu"""
+
+    def test_preload_finishes_before_chdir(self):
+        """Test a running preload sees the original working directory and the script runs from its own"""
+        import main_menu
+        cwd = os.getcwd()
+        seen = {}
+
+        def preload():
+            time.sleep(0.1)
+            seen['preload'] = os.getcwd()
+
+        with tempfile.TemporaryDirectory() as directory:
+            script = MagicMock(__file__=os.path.join(directory, 'script.py'))
+            main = MagicMock()
+            main.return_value.run.side_effect = lambda **_kwargs: seen.setdefault('script', os.getcwd())
+            thread = threading.Thread(target=preload)
+            thread.start()
+            with patch.object(main_menu, 'PRELOAD_THREADS', [thread]), \
+                    patch.object(main_menu.aetest, 'Main', main), \
+                    patch.object(main_menu.importlib, 'import_module', return_value=script):
+                main_menu.run_pyats_script('script')
+            self.assertEqual(os.path.realpath(directory), os.path.realpath(seen['script']))
+        self.assertEqual(cwd, seen['preload'])
+        self.assertEqual(cwd, os.getcwd())
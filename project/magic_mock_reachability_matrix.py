@@ -0,0 +1,114 @@
+"""Unit tests for the all-pairs reachability matrix"""
+import os
+import sys
+import time
+import unittest
+import warnings
+from unittest.mock import MagicMock, patch
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+TESTBED = os.path.join(os.path.dirname(__file__), 'main_testbed.yaml')
+IOS_OK = "Sending 2, 100-byte ICMP Echos to 192.168.202.2, timeout is 1 seconds:\n!!\n" \
+         "Success rate is 100 percent (2/2), round-trip min/avg/max = 1/2/4 ms"
+IOS_FAIL = "Sending 2, 100-byte ICMP Echos to 192.168.205.100, timeout is 1 seconds:\n..\n" \
+           "Success rate is 0 percent (0/2)"
+LINUX_OK = "2 packets transmitted, 2 received, 0% packet loss, time 201ms\n" \
+           "rtt min/avg/max/mdev = 0.500/0.750/1.000/0.250 ms"
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for probing every address from every vantage point"""
+
+    def test_parse_ios_ping(self):
+        """Test IOS success rate lines become the same result form as Linux ping"""
+        from project.reachability_matrix import parse_ios_ping
+        ok = parse_ios_ping('192.168.202.2', IOS_OK)
+        self.assertEqual(('reachable', 0.0, 2.0), (ok['status'], ok['loss'], ok['rtt_avg']))
+        failed = parse_ios_ping('192.168.205.100', IOS_FAIL)
+        self.assertEqual(('unreachable', 100.0, None), (failed['status'], failed['loss'], failed['rtt_avg']))
+
+    def test_parse_fan_out(self):
+        """Test the sections of the remote fan-out are split per target"""
+        from project.reachability_matrix import parse_fan_out
+        results = parse_fan_out(f'### 192.168.201.1\n{LINUX_OK}\n### 192.168.205.4\n'
+                                '2 packets transmitted, 0 received, 100% packet loss\n')
+        self.assertEqual('reachable', results['192.168.201.1']['status'])
+        self.assertEqual('unreachable', results['192.168.205.4']['status'])
+
+    def test_matrix_probes_concurrently(self):
+        """Test every source probes every destination and the sources run at the same time"""
+        from project.icmp_sweep import parse_ping
+        from project.reachability_matrix import destinations, format_matrix, run_matrix
+        from project.topology_index import load_index
+        targets = destinations(load_index(TESTBED), ['192.168.205.100'])
+
+        async def fake_sweep(targets, **_kwargs):
+            return [parse_ping(t, LINUX_OK) for t in targets]
+
+        sessions = []
+
+        def fake_connection(device):
+            sessions.append(device)
+            conn = MagicMock()
+
+            def execute(command, **_kwargs):
+                time.sleep(0.02)
+                return IOS_FAIL if '192.168.205.100' in command else IOS_OK
+            conn.execute.side_effect = execute
+            return conn
+
+        sections = ''.join(f'### {t}\n{LINUX_OK}\n' for t in targets)
+        host = MagicMock()
+        host.command.side_effect = lambda _args: [sys.executable, '-c', f'import time; time.sleep(0.2); print({sections!r})']
+        with patch('project.reachability_matrix.sweep', side_effect=fake_sweep), \
+                patch('project.reachability_matrix.router_connection', side_effect=fake_connection):
+            start = time.perf_counter()
+            matrix, targets, index = run_matrix(host, ['192.168.205.100'], TESTBED)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(['container', 'attacker', 'IOU1', 'IOSV', 'CSR'], list(matrix))
+        for results in matrix.values():
+            self.assertEqual(set(targets), set(results))
+        self.assertEqual('unreachable', matrix['CSR']['192.168.205.100']['status'])
+        self.assertEqual('reachable', matrix['attacker']['192.168.205.100']['status'])
+        # every router pings one address per data subnet, one session each, so a single 20 ms round
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(4 + 5 + 5, len(sessions))
+        self.assertEqual({'status': 'skipped', 'via': '192.168.205.100'},
+                         {k: matrix['CSR']['192.168.205.4'][k] for k in ('status', 'via')})
+        self.assertIsNone(matrix['CSR']['192.168.200.1']['via'])
+        table = format_matrix(matrix, targets, index)
+        self.assertIn('IOU1:1', table.splitlines()[0])
+        self.assertTrue(table.splitlines()[-1].startswith('CSR'))
+        self.assertEqual(['-', 'x'], table.splitlines()[-1].split()[-2:])
+
+    def test_router_targets(self):
+        """Test a router pings one address per data subnet, a guest first, and never its own or management addresses"""
+        from project.reachability_matrix import VTY_LINES, destinations, router_targets
+        from project.topology_index import load_index
+        index = load_index(TESTBED)
+        targets = destinations(index, ['192.168.205.100'])
+        picked = router_targets(index, 'IOSV', targets)
+        self.assertEqual(['192.168.201.1', '192.168.202.1', '192.168.203.3', '192.168.204.3', '192.168.205.100'],
+                         list(picked))
+        self.assertEqual(['192.168.205.4', '192.168.205.100'], picked['192.168.205.100'])
+        for router in index.with_role('router'):
+            self.assertLessEqual(len(router_targets(index, router, targets)), VTY_LINES)
+
+    def test_empty_targets(self):
+        """Test an empty destination list gives a header-only table and opens no router session"""
+        from project.reachability_matrix import format_matrix, probe_router
+        with patch('project.reachability_matrix.router_connection') as connection_mock:
+            self.assertEqual({}, probe_router(MagicMock(), [], count=2, timeout=1.0))
+        connection_mock.assert_not_called()
+        self.assertEqual(['from / to', 'CSR'], [line.strip() for line in format_matrix({'CSR': {}}, []).splitlines()])
+
+    def test_sessions_sized_from_targets(self):
+        """Test a router opens one session per target when there are fewer targets than sessions"""
+        from project.reachability_matrix import probe_router
+        with patch('project.reachability_matrix.router_connection') as connection_mock:
+            connection_mock.return_value.execute.return_value = IOS_OK
+            results = probe_router(MagicMock(), ['192.168.202.2', '192.168.203.3'], count=2, timeout=1.0)
+        self.assertEqual(2, connection_mock.call_count)
+        self.assertEqual({'reachable'}, {result['status'] for result in results.values()})
@@ -0,0 +1,72 @@
+"""Unit tests for the multiplexed SSH session"""
+import subprocess
+import threading
+import time
+import unittest
+import warnings
+from unittest.mock import MagicMock, patch
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for running commands over one ControlMaster connection"""
+
+    def setUp(self):
+        from project.remote_exec import RemoteHost
+        self.host = RemoteHost('osboxes@192.168.201.100', '/tmp/key')
+
+    def test_command_reuses_master(self):
+        """Test every command attaches to the same control socket and keeps it open"""
+        command = self.host.command(['ping', '-c', '2', '192.168.205.100'])
+        self.assertEqual(['ssh', '-i', '/tmp/key'], command[:3])
+        self.assertIn('ControlMaster=auto', command)
+        self.assertIn(f'ControlPath={self.host.control_path}', command)
+        self.assertIn('ControlPersist=600', command)
+        self.assertEqual(['osboxes@192.168.201.100', 'ping', '-c', '2', '192.168.205.100'], command[-5:])
+
+    @patch('project.remote_exec.subprocess.run')
+    def test_start_only_when_down(self, run_mock):
+        """Test start opens a background master only when none is alive"""
+        run_mock.return_value = MagicMock(returncode=0)
+        self.assertTrue(self.host.start())
+        self.assertEqual(1, run_mock.call_count)
+        self.assertIn('check', run_mock.call_args[0][0])
+
+        run_mock.reset_mock()
+        run_mock.side_effect = [MagicMock(returncode=255), MagicMock(returncode=0), MagicMock(returncode=0)]
+        self.assertTrue(self.host.start())
+        opened = run_mock.call_args_list[1][0][0]
+        self.assertIn('-f', opened)
+        self.assertIn('-N', opened)
+
+    def test_run_many_is_concurrent(self):
+        """Test commands run together on separate channels instead of one after another"""
+        active = {'now': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def fake_run(args, **_kwargs):
+            if '-O' in args:
+                return MagicMock(returncode=0)
+            with lock:
+                active['now'] += 1
+                active['peak'] = max(active['peak'], active['now'])
+            time.sleep(0.05)
+            with lock:
+                active['now'] -= 1
+            return subprocess.CompletedProcess(args, 0, stdout=args[-1])
+
+        with patch('project.remote_exec.subprocess.run', side_effect=fake_run):
+            results = self.host.run_many([['echo', str(i)] for i in range(4)], capture_output=True, text=True)
+        self.assertEqual(['0', '1', '2', '3'], [r.stdout for r in results])
+        self.assertEqual(4, active['peak'])
+
+    @patch('project.remote_exec.subprocess.Popen')
+    def test_stream(self, popen_mock):
+        """Test output lines are yielded as the remote command produces them"""
+        proc = popen_mock.return_value.__enter__.return_value
+        proc.stdout = iter(['64 bytes from 192.168.205.100\n', 'rtt min/avg/max\n'])
+        self.assertEqual(['64 bytes from 192.168.205.100\n', 'rtt min/avg/max\n'],
+                         list(self.host.stream(['ping', '192.168.205.100'])))
+        proc.wait.assert_called_once()
@@ -0,0 +1,35 @@
+"""Unit tests for the offline config render"""
+import os
+import tempfile
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+TESTBED = os.path.join(os.path.dirname(__file__), 'main_testbed.yaml')
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for rendering every device without connecting to it"""
+
+    def test_render_all(self):
+        """Test every router and the firewall get a file with their commands and no real password"""
+        from project.render_configs import SECRET, render_all
+        with tempfile.TemporaryDirectory() as out_dir:
+            results = {result['device']: result for result in render_all(out_dir, TESTBED)}
+            self.assertEqual({'IOU1', 'IOSV', 'CSR', 'FTD'}, set(results))
+            rendered = {}
+            for name, result in results.items():
+                with open(result['path'], 'r', encoding='utf-8') as file:
+                    rendered[name] = file.read()
+                self.assertGreater(result['commands'], 0)
+        self.assertIn('ip add 192.168.201.1 255.255.255.0', rendered['IOU1'])
+        self.assertIn('ip dhcp pool GUEST', rendered['IOU1'])
+        self.assertNotIn('ip dhcp pool GUEST', rendered['IOSV'])
+        self.assertIn(' ip address 192.168.204.3 255.255.255.0', rendered['CSR'])
+        self.assertIn(' permit host 192.168.200.254', rendered['CSR'])
+        self.assertIn('"path": "/operational/deploy"', rendered['FTD'])
+        for text in rendered.values():
+            self.assertIn(SECRET, text)
+            self.assertNotIn('Cisco!23', text)
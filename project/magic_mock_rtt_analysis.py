@@ -0,0 +1,66 @@
+"""Unit tests for the RTT and loss analysis"""
+import csv
+import os
+import tempfile
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+def ping_records(lost=(), slow=(), count=12):
+    """Build scenario records of a one probe per second ping with some probes lost or slowed down"""
+    records = []
+    for seq in range(1, count + 1):
+        if seq in lost:
+            records.append((seq + 0.99, 'ping', f'no answer yet for icmp_seq={seq}'))
+        else:
+            rtt = 40.0 if seq in slow else 1.0 + seq % 2 * 0.5
+            records.append((seq + rtt / 1000, 'ping', f'64 bytes from 192.168.205.100: icmp_seq={seq} ttl=62 time={rtt} ms'))
+    records.append((count + 1.0, 'ping', f'{count} packets transmitted, {count - len(lost)} received'))
+    return records
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for parsing a ping stream and comparing attack phases"""
+
+    def test_parse_and_loss_windows(self):
+        """Test lost probes become NaN, trailing losses come from the summary and windows group consecutive losses"""
+        import numpy as np
+        from project.rtt_analysis import loss_windows, parse_ping_stream
+        records = [(s, line) for s, _, line in ping_records(lost=(4, 5, 6, 9))][:-2]
+        records.append((13.0, '12 packets transmitted, 8 received'))
+        seq, rtt, times = parse_ping_stream(records)
+        self.assertEqual(list(range(1, 13)), seq.tolist())
+        self.assertEqual(5, int(np.isnan(rtt).sum()))
+        self.assertAlmostEqual(12.0, times[-1], delta=0.1)
+        windows = [(a, b, round(c, 2), round(d, 2), n) for a, b, c, d, n in loss_windows(seq, rtt, times)]
+        self.assertEqual([(4, 6, 4.99, 6.99, 3), (9, 9, 9.99, 9.99, 1)], windows[:2])
+        self.assertEqual((12, 12, 1), (windows[2][0], windows[2][1], windows[2][4]))
+
+    def test_summarize(self):
+        """Test loss, percentiles and jitter of one series"""
+        from project.rtt_analysis import summarize
+        summary = summarize([1.0, 2.0, float('nan'), 3.0])
+        self.assertEqual((4, 3, 25.0), (summary['sent'], summary['received'], summary['loss']))
+        self.assertEqual((1.0, 2.0, 3.0, 1.0), (summary['min'], summary['p50'], summary['max'], summary['jitter']))
+        self.assertIsNone(summarize([float('nan')])['p90'])
+
+    def test_attack_impact_and_csv(self):
+        """Test the during-attack phase shows the extra loss and RTT growth, and every probe is exported"""
+        from project.rtt_analysis import analyse_scenario
+        records = sorted(ping_records(lost=(6, 7), slow=(5, 8)) + [(3.5, 'dos', 'started: hping3'),
+                                                                     (13.6, 'dos', 'exited with 124')])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'probes.csv')
+            phases = analyse_scenario(records, duration=5, csv_path=path)
+            with open(path, 'r', encoding='utf-8') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual((3, 5, 4), tuple(phases[name]['sent'] for name in ('before', 'during', 'after')))
+        self.assertEqual(0.0, phases['before']['loss'])
+        self.assertEqual(40.0, phases['impact']['loss_increase'])
+        self.assertGreater(phases['impact']['p90_ratio'], 10)
+        self.assertEqual([(6, 7, 2)], [(a, b, n) for a, b, _, _, n in phases['loss_windows']])
+        self.assertEqual(12, len(rows))
+        self.assertEqual(('6', '', '1', 'during'), (rows[5]['seq'], rows[5]['rtt_ms'], rows[5]['lost'], rows[5]['phase']))
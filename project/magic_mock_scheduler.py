@@ -0,0 +1,121 @@
+"""Unit tests for the provisioning scheduler"""
+import threading
+import time
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for ProvisioningScheduler"""
+
+    def test_pipelines_run_in_parallel(self):
+        """Test independent chains overlap while each chain keeps its order"""
+        from project.provisioning_scheduler import ProvisioningScheduler
+        scheduler = ProvisioningScheduler(max_workers=4)
+        events = []
+        lock = threading.Lock()
+
+        def work(name):
+            def run():
+                time.sleep(0.2)
+                with lock:
+                    events.append(name)
+                return name
+            return run
+
+        ready = scheduler.chain('server', [('routes', work('routes'))])
+        for device in ('R1', 'R2', 'R3'):
+            scheduler.chain(device, [(f'{device} ssh', work(f'{device} ssh')),
+                                     (f'{device} ospf', work(f'{device} ospf'))], after=ready)
+        reported = []
+        start = time.perf_counter()
+        results = scheduler.run(on_done=lambda task, result: reported.append(task.name))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual('routes', events[0])
+        for device in ('R1', 'R2', 'R3'):
+            self.assertLess(events.index(f'{device} ssh'), events.index(f'{device} ospf'))
+            self.assertEqual('passed', results[f'{device} ospf']['status'])
+        self.assertCountEqual(events, reported)
+
+    def test_failure_blocks_dependents(self):
+        """Test a failed task skips its dependents but not the other pipelines"""
+        from project.provisioning_scheduler import ProvisioningScheduler
+        scheduler = ProvisioningScheduler()
+
+        def console():
+            raise ConnectionError('console busy')
+
+        scheduler.chain('FTD', [('console', console), ('swagger', lambda: None), ('deploy', lambda: None)])
+        scheduler.add('IOU1', lambda: 'ok')
+        results = scheduler.run()
+        self.assertEqual('failed', results['console']['status'])
+        self.assertEqual('ConnectionError: console busy', results['console']['error'])
+        self.assertEqual('blocked', results['swagger']['status'])
+        self.assertEqual('blocked', results['deploy']['status'])
+        self.assertEqual('ok', results['IOU1']['value'])
+
+    def test_invalid_dependencies(self):
+        """Test unknown dependencies and cycles are rejected before anything runs"""
+        from project.provisioning_scheduler import ProvisioningScheduler
+        scheduler = ProvisioningScheduler()
+        scheduler.add('a', lambda: None, after=['missing'])
+        with self.assertRaises(ValueError):
+            scheduler.run()
+        scheduler = ProvisioningScheduler()
+        scheduler.add('a', lambda: None, after=['b'])
+        scheduler.add('b', lambda: None, after=['a'])
+        with self.assertRaises(ValueError):
+            scheduler.order()
+
+    def test_resume_from_journal(self):
+        """Test completed tasks are resumed unless their inputs changed or they are forced"""
+        import os
+        import tempfile
+        from project.provisioning_scheduler import ProvisioningJournal, ProvisioningScheduler
+        runs = []
+
+        def build(template, force=()):
+            scheduler = ProvisioningScheduler(journal=ProvisioningJournal(path), force=force)
+            scheduler.chain('CSR', [('init', lambda: runs.append('init')),
+                                    ('ospf', lambda: runs.append('ospf'), template)])
+            scheduler.chain('FTD', [('console', lambda: runs.append('console'))])
+            return scheduler.run()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'journal.json')
+            build(['router ospf 1'])
+            self.assertCountEqual(['init', 'ospf', 'console'], runs)
+            runs.clear()
+            results = build(['router ospf 1'])
+            self.assertEqual([], runs)
+            self.assertEqual('resumed', results['ospf']['status'])
+            build(['router ospf 2'])
+            self.assertEqual(['ospf'], runs)
+            runs.clear()
+            build(['router ospf 2'], force=['FTD'])
+            self.assertEqual(['console'], runs)
+
+    def test_unjournaled_task_always_runs(self):
+        """Test a task added with journaled=False runs on every resume while its dependents stay resumed"""
+        import os
+        import tempfile
+        from project.provisioning_scheduler import ProvisioningJournal, ProvisioningScheduler
+        runs = []
+
+        def build():
+            scheduler = ProvisioningScheduler(journal=ProvisioningJournal(path))
+            network = scheduler.chain('UbuntuServer', [('routes', lambda: runs.append('routes'))], journaled=False)
+            scheduler.chain('CSR', [('ospf', lambda: runs.append('ospf'))], after=network)
+            return scheduler.run()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'journal.json')
+            build()
+            runs.clear()
+            results = build()
+            self.assertEqual(['routes'], runs)
+            self.assertEqual(('passed', 'resumed'), (results['routes']['status'], results['ospf']['status']))
+            self.assertNotIn('routes', ProvisioningJournal(path).entries)
@@ -0,0 +1,143 @@
+"""Unit tests for the self-diagnose fleet run and drift check"""
+import asyncio
+import os
+import tempfile
+import unittest
+import warnings
+from unittest.mock import AsyncMock, MagicMock, patch
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+GOLDEN = """!
+hostname R1
+!
+interface Ethernet0/1
+ ip address 192.168.201.1 255.255.255.0
+ ip ospf 1 area 0
+!
+end
+"""
+DRIFTED = """!
+hostname R1
+!
+interface Ethernet0/1
+ ip address 192.168.201.1 255.255.255.0
+!
+router ospf 1
+!
+end
+"""
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for self-diagnose"""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _drift_check(self, current, apply_delta=False, ssh_conn=None):
+        """Run a drift check of R1 against GOLDEN with a mocked telnet connection returning the current config"""
+        from project.config_helper import ParseCache
+        from project.golden_store import GoldenStore
+        from project.self_diagnose import SelfDiagnose
+        store = GoldenStore('golden_store')
+        store.put('R1', GOLDEN)
+
+        async def get_running_config(output_file):
+            with open(output_file, 'w', encoding='utf-8') as file:
+                file.write(current)
+
+        conn = MagicMock()
+        conn.connect = AsyncMock()
+        conn.get_running_config = AsyncMock(side_effect=get_running_config)
+        conn.apply_missing_config = AsyncMock()
+        with patch('project.self_diagnose.TelnetConnection', return_value=conn), \
+                patch('project.self_diagnose.GOLDEN_STORE', store), \
+                patch('project.self_diagnose.PARSE_CACHE', ParseCache()):
+            diagnose = SelfDiagnose('10.0.0.1', 5001, 'R1')
+            missing_blocks = asyncio.run(diagnose.run_drift_check(apply_delta=apply_delta, ssh_conn=ssh_conn))
+        return missing_blocks, conn
+
+    def test_fleet_concurrency_limits(self):
+        """Test the fleet run respects the global and per console host caps and reports a failed device"""
+        from project.self_diagnose import run_fleet_diagnose
+        devices = {f'R{i}': {'host': f'10.0.0.{i % 2}', 'port': 5000 + i} for i in range(8)}
+        running = {'all': 0, 'peak': 0, 'hosts': {}, 'host_peaks': {}}
+
+        async def fake_diagnose(device_name, device_info):
+            host = device_info['host']
+            running['all'] += 1
+            running['hosts'][host] = running['hosts'].get(host, 0) + 1
+            running['peak'] = max(running['peak'], running['all'])
+            running['host_peaks'][host] = max(running['host_peaks'].get(host, 0), running['hosts'][host])
+            try:
+                await asyncio.sleep(0.02)
+                if device_name == 'R3':
+                    raise ConnectionError('console refused')
+                return 2 if device_name == 'R4' else 0
+            finally:
+                running['all'] -= 1
+                running['hosts'][host] -= 1
+
+        with patch('project.self_diagnose.run_device_diagnose', side_effect=fake_diagnose):
+            results = asyncio.run(run_fleet_diagnose(devices, max_concurrent=3, per_host=2))
+        self.assertLessEqual(running['peak'], 3)
+        self.assertGreater(running['peak'], 1)
+        self.assertEqual({'10.0.0.0': 2, '10.0.0.1': 2}, running['host_peaks'])
+        rows = {name: (status, restored) for name, status, restored, _ in results}
+        self.assertEqual(list(devices), [name for name, *_ in results])
+        self.assertEqual(('failed: console refused', 0), rows['R3'])
+        self.assertEqual(('restored', 2), rows['R4'])
+        self.assertEqual(6, sum(status == 'clean' for status, _ in rows.values()))
+
+    def test_drift_check_clean(self):
+        """Test a device matching its golden config reports no drift and gets nothing pushed"""
+        missing_blocks, conn = self._drift_check(GOLDEN, apply_delta=True)
+        self.assertFalse(any(missing_blocks.values()))
+        conn.apply_missing_config.assert_not_called()
+        with open('golden_running_config_R1.txt', 'r', encoding='utf-8') as file:
+            self.assertEqual(GOLDEN, file.read())
+
+    def test_drift_check_report_only(self):
+        """Test missing and extra blocks are reported and nothing is pushed without apply_delta"""
+        missing_blocks, conn = self._drift_check(DRIFTED)
+        self.assertEqual(['no router ospf 1'], missing_blocks['router_ospf'])
+        self.assertEqual(1, len(missing_blocks['interfaces']))
+        self.assertIn('ip ospf 1 area 0', missing_blocks['interfaces'][0])
+        self.assertEqual([], missing_blocks['hostname'])
+        conn.apply_missing_config.assert_not_called()
+
+    def test_drift_check_apply_delta(self):
+        """Test apply_delta pushes only the delta blocks"""
+        missing_blocks, conn = self._drift_check(DRIFTED, apply_delta=True)
+        conn.apply_missing_config.assert_awaited_once_with(missing_blocks)
+        pushed = conn.apply_missing_config.await_args.args[0]
+        self.assertEqual(2, sum(len(blocks) for blocks in pushed.values()))
+        self.assertNotIn('ip address 192.168.201.1', ''.join(pushed['interfaces']))
+
+    def test_drift_check_replace_over_ssh(self):
+        """Test a reachable device gets the stored golden config by configure replace instead of the telnet delta"""
+        from lib.connectors.ssh_conn import SSHConnection
+        ssh_conn = MagicMock(spec=SSHConnection)
+        ssh_conn.replace_config.return_value = ({'file_verified': True}, 'Rollback Done')
+        _, conn = self._drift_check(DRIFTED, apply_delta=True, ssh_conn=ssh_conn)
+        ssh_conn.replace_config.assert_called_once_with('golden_running_config_R1.txt', 'golden.cfg', 'flash:')
+        conn.apply_missing_config.assert_not_called()
+        with open('golden_running_config_R1.txt', 'r', encoding='utf-8') as file:
+            self.assertEqual(GOLDEN, file.read())
+
+    def test_drift_check_replace_fallback(self):
+        """Test a failed configure replace falls back to pushing the delta over telnet"""
+        from lib.connectors.ssh_conn import SSHConnection
+        ssh_conn = MagicMock(spec=SSHConnection)
+        ssh_conn.replace_config.return_value = ({'file_verified': True}, '%Invalid input detected')
+        missing_blocks, conn = self._drift_check(DRIFTED, apply_delta=True, ssh_conn=ssh_conn)
+        ssh_conn.replace_config.assert_called_once()
+        conn.apply_missing_config.assert_awaited_once_with(missing_blocks)
@@ -44,6 +44,19 @@ class TestCase(unittest.TestCase):
         ])
         self.assertEqual('Config applied successfully', result)
 
+    @patch('lib.connectors.ssh_conn.ConnectHandler')
+    def test_execute(self, connect_handler_mock):
+        """Test SSH execute method"""
+        from lib.connectors.ssh_conn import SSHConnection
+        mock_conn = MagicMock()
+        mock_conn.send_command.return_value = 'Success rate is 100 percent (2/2)'
+        connect_handler_mock.return_value = mock_conn
+        conn = SSHConnection('10.10.10.10', 22, 'admin', 'password123')
+        conn.connect()
+        result = conn.execute('ping 192.168.1.1 repeat 2', read_timeout=10)
+        mock_conn.send_command.assert_called_once_with('ping 192.168.1.1 repeat 2', read_timeout=10)
+        self.assertEqual('Success rate is 100 percent (2/2)', result)
+
     @patch('lib.connectors.ssh_conn.ConnectHandler')
     def test_close(self, connect_handler_mock):
         """Test SSH close method"""
@@ -62,3 +75,28 @@ class TestCase(unittest.TestCase):
         templates = ['hostname {name}', 'interface {iface}', 'no shutdown']
         result = render_commands(templates, name='Router1', iface='Ethernet0')
         self.assertEqual(['hostname Router1', 'interface Ethernet0', 'no shutdown'], result)
+
+    @patch('lib.connectors.ssh_conn.file_transfer')
+    @patch('lib.connectors.ssh_conn.ConnectHandler')
+    def test_replace_config(self, connect_handler_mock, file_transfer_mock):
+        """Test SSH replace_config method"""
+        from lib.connectors.ssh_conn import SSHConnection
+        mock_conn = MagicMock()
+        mock_conn.send_command_timing.return_value = 'Rollback Done'
+        connect_handler_mock.return_value = mock_conn
+        file_transfer_mock.return_value = {'file_transferred': True, 'file_verified': True}
+        conn = SSHConnection('10.10.10.10', 22, 'admin', 'password123')
+        conn.connect()
+        transfer, output = conn.replace_config('golden.txt', 'golden.cfg', 'flash0:')
+        file_transfer_mock.assert_called_once_with(
+            mock_conn,
+            source_file='golden.txt',
+            dest_file='golden.cfg',
+            file_system='flash0:',
+            direction='put',
+            overwrite_file=True,
+        )
+        mock_conn.send_command_timing.assert_called_once_with('configure replace flash0:golden.cfg force',
+                                                              read_timeout=120)
+        self.assertTrue(transfer['file_verified'])
+        self.assertEqual('Rollback Done', output)
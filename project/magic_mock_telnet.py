@@ -79,3 +79,26 @@ class TestCase(unittest.TestCase):
         result = asyncio.run(conn.read(1024))
         mock_reader.read.assert_called_once_with(1024)
         self.assertEqual(b'Sample output', result)
+
+    @patch('lib.connectors.async_telnet_conn.asyncio.sleep', new_callable=AsyncMock)
+    def test_apply_username_negation(self, _sleep_mock):
+        """Test a 'no username' line gets its [confirm] answered instead of waiting for the config prompt"""
+        import asyncio
+        from lib.connectors.async_telnet_conn import TelnetConnection
+        conn = TelnetConnection('10.10.10.10', 23)
+        conn.reader = AsyncMock()
+        conn.writer = MagicMock()
+        conn.reader.readuntil = AsyncMock(return_value=b'R1(config)#')
+        conn.reader.read = AsyncMock(side_effect=[
+            'no username guest\r\nThis operation will remove all username related configurations with same name.',
+            'Do you want to continue? [confirm]',
+            'R1(config)#',
+        ])
+        blocks = dict.fromkeys(['hostname', 'dhcp', 'dhcp excluded', 'interfaces', 'router_ospf', 'access_list',
+                                'ip_domain', 'line'], [])
+        blocks['username'] = ['no username guest', 'username admin privilege 15 secret admin']
+        asyncio.run(asyncio.wait_for(conn.apply_missing_config(blocks), timeout=5))
+        written = [c.args[0] for c in conn.writer.write.call_args_list]
+        self.assertEqual(['conf t\n', 'no username guest\n', '\n', 'username admin privilege 15 secret admin\n', 'end\n'],
+                         written)
+        self.assertEqual(3, conn.reader.read.await_count)
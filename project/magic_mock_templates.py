@@ -0,0 +1,73 @@
+"""Unit tests for the compiled command templates"""
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for compiling, validating and rendering command templates"""
+
+    def test_compile_once(self):
+        """Test the same template list is compiled once and its placeholders are collected"""
+        from lib.connectors.templates import compile_template
+        from project.int_config import add_ips
+        template = compile_template(add_ips)
+        self.assertIs(template, compile_template(list(add_ips)))
+        self.assertIs(template, compile_template(template))
+        self.assertEqual({'interface', 'ip', 'sm'}, template.fields)
+
+    def test_missing_placeholder_rejected_before_render(self):
+        """Test a missing value is reported for the whole batch before any line is rendered"""
+        from lib.connectors.templates import compile_template
+        template = compile_template(['int {interface}', 'ip add {ip} {sm}'])
+        with self.assertRaises(KeyError) as ctx:
+            template.render_many([{'interface': 'e0/0', 'ip': '10.0.0.1', 'sm': '255.0.0.0'},
+                                  {'interface': 'e0/1', 'ip': '10.0.1.1'}])
+        self.assertIn('sm', str(ctx.exception))
+
+    def test_positional_placeholder_rejected(self):
+        """Test positional placeholders cannot be compiled"""
+        from lib.connectors.templates import CommandTemplate
+        with self.assertRaises(ValueError):
+            CommandTemplate(['hostname {}'])
+
+    def test_render_many(self):
+        """Test a template renders once per set of values, keeping constant lines and format specs"""
+        from lib.connectors.templates import compile_template
+        template = compile_template(['\n', 'interface {intf.name}', 'mtu {mtu:>5}', 'exit'])
+        intf = type('Intf', (), {'name': 'Gi1'})
+        self.assertEqual(['\n', 'interface Gi1', 'mtu  1500', 'exit', '\n', 'interface Gi1', 'mtu  9000', 'exit'],
+                         template.render_many([{'intf': intf, 'mtu': 1500}, {'intf': intf, 'mtu': 9000}]))
+
+    def test_escaped_braces(self):
+        """Test doubled braces are unescaped whether or not the template has placeholders"""
+        from lib.connectors.templates import render_commands
+        self.assertEqual(['banner motd {lab}'], render_commands(['banner motd {{lab}}']))
+        self.assertEqual(['banner motd {lab} R1'], render_commands(['banner motd {{lab}} {name}'], name='R1'))
+
+    def test_nested_placeholder_validated(self):
+        """Test a placeholder nested in a format spec is collected and checked before rendering"""
+        from lib.connectors.templates import CommandTemplate
+        template = CommandTemplate(['description {text:>{width}}'])
+        self.assertEqual({'text', 'width'}, template.fields)
+        self.assertEqual(['description ' + 'ab'.rjust(6)], template.render(text='ab', width=6))
+        with self.assertRaises(KeyError) as ctx:
+            template.render(text='ab')
+        self.assertIn('width', str(ctx.exception))
+        with self.assertRaises(ValueError):
+            CommandTemplate(['description {text:>{}}'])
+
+    def test_value_with_separator(self):
+        """Test a value containing the internal separator still renders line by line"""
+        from lib.connectors.templates import SEPARATOR, render_commands
+        self.assertEqual([f'description a{SEPARATOR}b', 'exit'],
+                         render_commands(['description {text}', 'exit'], text=f'a{SEPARATOR}b'))
+
+    def test_benchmark_renderers_agree(self):
+        """Test the legacy and compiled renderers of the benchmark produce the same commands"""
+        from project.benchmark_templates import fleet, render_compiled, render_legacy
+        bootstrap, per_interface = fleet(3, 2)
+        self.assertEqual(sorted(render_legacy(bootstrap, per_interface)),
+                         sorted(render_compiled(bootstrap, per_interface)))
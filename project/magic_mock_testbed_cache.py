@@ -0,0 +1,49 @@
+"""Unit tests for testbed snapshots"""
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from unittest.mock import patch
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+TESTBED = os.path.join(os.path.dirname(__file__), 'main_testbed.yaml')
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for the testbed snapshot cache"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'testbed.yaml')
+        shutil.copy(TESTBED, self.path)
+        self.cache_dir = os.path.join(self.directory, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_snapshot_reused(self):
+        """Test the YAML is parsed once, from memory and from disk, and each load is a new Testbed"""
+        from project import testbed_cache
+        first = testbed_cache.load_testbed(self.path, self.cache_dir)
+        testbed_cache._SNAPSHOTS.clear()
+        with patch('project.testbed_cache.topology.loader.load', wraps=testbed_cache.topology.loader.load) as load:
+            second = testbed_cache.load_testbed(self.path, self.cache_dir)
+            testbed_cache.load_testbed(self.path, self.cache_dir)
+        self.assertTrue(all(isinstance(call.args[0], dict) for call in load.call_args_list))
+        self.assertIsNot(first, second)
+        self.assertEqual('192.168.200.3', str(second.devices['CSR'].interfaces['GigabitEthernet1'].ipv4.ip))
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+    def test_invalidated_on_change(self):
+        """Test editing the YAML produces a new snapshot"""
+        from project.testbed_cache import load_testbed, snapshot
+        digest = snapshot(self.path, self.cache_dir)[0]
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write('\n# edited\n')
+        os.utime(self.path, ns=(0, 0))
+        self.assertNotEqual(digest, snapshot(self.path, self.cache_dir)[0])
+        self.assertEqual('FTD', load_testbed(self.path, self.cache_dir).devices['FTD'].name)
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
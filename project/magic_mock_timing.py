@@ -0,0 +1,95 @@
+"""Unit tests for phase timing"""
+import csv
+import json
+import os
+import tempfile
+import unittest
+import warnings
+from unittest.mock import AsyncMock, MagicMock
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for the span recorder"""
+
+    def test_connector_spans_and_bytes(self):
+        """Test nested spans inherit the device and their bytes roll up to the parent"""
+        import asyncio
+        from lib.connectors.async_telnet_conn import TelnetConnection
+        from lib.connectors.timing import RECORDER, span
+        conn = TelnetConnection('10.10.10.10', 23)
+        conn.reader = AsyncMock()
+        conn.reader.readuntil = AsyncMock(return_value=b'Router#')
+        conn.writer = MagicMock()
+
+        async def run():
+            with span('diagnose.run', 'R1'):
+                conn.write('show clock')
+                with span('telnet.capture'):
+                    await conn.readuntil('#')
+                await conn.readuntil('#')
+
+        asyncio.run(run())
+        rows = {row['name']: row for row in RECORDER.rows('R1')}
+        RECORDER.clear('R1')
+        self.assertEqual('diagnose.run', rows['telnet.capture']['parent'])
+        self.assertEqual('R1', rows['telnet.capture']['device'])
+        self.assertEqual(len('show clock\n'), rows['diagnose.run']['bytes_sent'])
+        self.assertEqual(len(b'Router#'), rows['telnet.capture']['bytes_received'])
+        self.assertEqual(len(b'Router#') * 2, rows['diagnose.run']['bytes_received'])
+        self.assertEqual([], RECORDER.rows('R1'))
+
+    def test_export(self):
+        """Test the report is written as JSON and CSV with an error column"""
+        from lib.connectors.timing import Recorder
+        recorder = Recorder()
+        with recorder.span('telnet.restore', 'R2'):
+            pass
+        with self.assertRaises(ValueError):
+            with recorder.span('swagger.deploy', 'R2'):
+                raise ValueError('deployment failed')
+        with tempfile.TemporaryDirectory() as directory:
+            json_path, csv_path = recorder.export(os.path.join(directory, 'run'), device='R2')
+            with open(json_path, encoding='utf-8') as file:
+                rows = json.load(file)
+            with open(csv_path, encoding='utf-8') as file:
+                self.assertEqual(2, len(list(csv.DictReader(file))))
+        self.assertEqual(['telnet.restore', 'swagger.deploy'], [row['name'] for row in rows])
+        self.assertEqual('ValueError', rows[1]['error'])
+        self.assertGreaterEqual(rows[0]['duration'], 0)
+
+    def test_swagger_counts_every_request(self):
+        """Test the swagger session hook adds each API request and response body to the current span"""
+        from lib.connectors.swagger_conn import SwaggerConnector
+        from lib.connectors.timing import Recorder
+        recorder = Recorder()
+        response = MagicMock(content=b'{"items": []}')
+        response.request.body = b'{"name": "inside"}'
+        with recorder.span('swagger.configure_ospf', 'FTD') as current:
+            self.assertIs(response, SwaggerConnector._count_response(response))
+            response.request.body = None
+            SwaggerConnector._count_response(response)
+        self.assertEqual(len(b'{"name": "inside"}'), current.record['bytes_sent'])
+        self.assertEqual(len(b'{"items": []}') * 2, current.record['bytes_received'])
+
+    def test_telnet_counts_bytes(self):
+        """Test decoded telnet text is counted in encoded bytes, like the SSH and FDM connectors"""
+        import asyncio
+        from lib.connectors.async_telnet_conn import TelnetConnection
+        from lib.connectors.timing import Recorder
+        conn = TelnetConnection('10.10.10.10', 23)
+        conn.reader = AsyncMock()
+        conn.reader.read = AsyncMock(return_value='Ü ok')
+        conn.writer = MagicMock()
+
+        async def run():
+            with Recorder().span('telnet.capture', 'R1') as current:
+                conn.write('description Zürich')
+                await conn.read(100)
+            return current
+
+        record = asyncio.run(run()).record
+        self.assertEqual(len('description Zürich'.encode()) + 1, record['bytes_sent'])
+        self.assertEqual(5, record['bytes_received'])
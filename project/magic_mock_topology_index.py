@@ -0,0 +1,36 @@
+"""Unit tests for the topology index"""
+import os
+import unittest
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+TESTBED = os.path.join(os.path.dirname(__file__), 'main_testbed.yaml')
+
+
+class TestCase(unittest.TestCase):
+    """Test cases for TopologyIndex"""
+
+    def setUp(self):
+        from project.topology_index import load_index
+        self.index = load_index(TESTBED)
+
+    def test_lookups(self):
+        """Test role, management and address lookups"""
+        self.assertEqual('UbuntuServer', self.index.server)
+        self.assertEqual(['IOU1', 'IOSV', 'CSR'], self.index.with_role('router'))
+        self.assertEqual('Management1/1', self.index.management_interface('FTD').name)
+        self.assertEqual('192.168.200.254', self.index.management_ip('UbuntuServer'))
+        self.assertEqual(['GigabitEthernet2', 'GigabitEthernet3'],
+                         [intf.name for intf in self.index.data_interfaces('CSR')])
+        self.assertEqual('CSR', self.index.owner('192.168.204.3')[0])
+
+    def test_paths_and_gateways(self):
+        """Test shortest paths ignore the management segment and firewall subnets route via a router"""
+        self.assertEqual(['IOU1', 'IOSV', 'CSR', 'FTD'], self.index.path('IOU1', 'FTD'))
+        self.assertEqual('CSR', self.index.next_hop('FTD', 'IOU1'))
+        self.assertEqual('192.168.200.3', self.index.host_gateways['192.168.205.0/24'])
+        self.assertEqual(['192.168.201.1', '192.168.202.2', '192.168.203.3'],
+                         [self.index.ingress_address(d, '192.168.201.0/24') for d in self.index.with_role('router')])
+        self.assertNotIn('192.168.205.4', self.index.data_addresses())
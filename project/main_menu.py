@@ -1,25 +1,63 @@
 """This module displays a menu and interacts with the user"""
 
-import sys
-import subprocess
-import pathlib
-import unittest
 import asyncio
+import importlib
+import os
+import threading
+import time
+import unittest
+
+from pyats import aetest
 from pings_and_attacks import run_ping_1, run_ping_2, run_nmap, run_dos, ping_and_dos, test_all_ssh_acl, run_all_pings
+from pings_and_attacks import ATTACKER, GUEST_IPS
+from project.reachability_matrix import format_matrix, router_connection, run_matrix
 from check_pylint import run
-from self_diagnose import SelfDiagnose, DEVICES
+from self_diagnose import SelfDiagnose, DEVICES, run_fleet_diagnose
+from project.testbed_cache import load_testbed
+
+
+PYATS_SCRIPTS = ('pyats_configure_devices', 'pyats_add_defense_ftd')
+PRELOAD_THREADS = []
+
+
+def preload_scripts():
+    """This method imports the pyats scripts, compiles the testbed and opens the Attacker SSH master in the background"""
+    def preload():
+        for name in PYATS_SCRIPTS:
+            importlib.import_module(name)
+        load_testbed()
+        ATTACKER.start()
+
+    thread = threading.Thread(target=preload, daemon=True)
+    thread.start()
+    PRELOAD_THREADS.append(thread)
+    return thread
+
+
+def run_pyats_script(name, **parameters):
+    """This method runs a pyats script inside the menu process, reusing its already imported modules"""
+    # the preload resolves relative paths against the working directory, so it must finish before the chdir
+    for thread in PRELOAD_THREADS:
+        thread.join()
+    start = time.perf_counter()
+    script = importlib.import_module(name)
+    print(f"{name} ready in {time.perf_counter() - start:.2f}s")
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(script.__file__)))
+    try:
+        return aetest.Main(commandline=False).run(testable=script, **parameters)
+    finally:
+        os.chdir(cwd)
 
 
 def configure_devices():
     """This method runs the pyats script that configures the devices"""
-    script = pathlib.Path("/tmp/pycharm_project_844/project/pyats_configure_devices.py")
-    subprocess.run([sys.executable, str(script)], check=False)
+    run_pyats_script('pyats_configure_devices')
 
 
 def configure_ftd_defence():
     """This method runs the pyats script that configures FTD defence policies"""
-    script = pathlib.Path("/tmp/pycharm_project_844/project/pyats_add_defense_ftd.py")
-    subprocess.run([sys.executable, str(script)], check=False)
+    run_pyats_script('pyats_add_defense_ftd')
 
 
 def run_connector_unittests():
@@ -48,10 +86,54 @@ def run_self_diagnose():
 
     device_info = DEVICES[router]
     print(f"\n=== Starting self-diagnose for {router} ===")
-    diagnose = SelfDiagnose(device_info['host'], device_info['port'], router)
+    diagnose = SelfDiagnose(device_info['host'], device_info['port'], router, device_info['file_system'])
     asyncio.run(diagnose.run_self_diagnose(router))
 
 
+def run_drift_check():
+    """This method compares a router's running-config with its golden config without reloading it"""
+    router = input("\nEnter router name (IOU1 or IOSv): ").strip()
+    if router not in DEVICES:
+        print(f"Error: '{router}' is not a valid router. Please choose IOU1 or IOSv.")
+        return
+    version = input("Golden config version to compare against [latest]: ").strip()
+    apply_delta = input("Push the missing configuration if drift is found? [y/N]: ").strip().lower() == 'y'
+    device_info = DEVICES[router]
+    diagnose = SelfDiagnose(device_info['host'], device_info['port'], router, device_info['file_system'])
+    ssh_conn = open_ssh(router) if apply_delta else None
+    try:
+        asyncio.run(diagnose.run_drift_check(apply_delta=apply_delta, version=int(version) if version else None,
+                                             ssh_conn=ssh_conn))
+    finally:
+        if ssh_conn is not None:
+            ssh_conn.close()
+
+
+def open_ssh(router):
+    """This method returns an SSH connection to a router of the testbed, or None when it is not reachable"""
+    device = load_testbed().devices.get(router.upper())
+    if device is None:
+        return None
+    try:
+        return router_connection(device)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        print(f"SSH to {router} unavailable ({e}), the delta will be replayed over telnet")
+        return None
+
+
+def run_fleet_self_diagnose():
+    """This method runs self-diagnose on every router at the same time"""
+    asyncio.run(run_fleet_diagnose(DEVICES))
+
+
+def run_reachability_matrix():
+    """This method pings every address from the container, Attacker and every router at the same time"""
+    start = time.perf_counter()
+    matrix, targets, index = run_matrix(ATTACKER, GUEST_IPS)
+    print(format_matrix(matrix, targets, index))
+    print(f"{len(matrix)} sources x {len(targets)} destinations in {time.perf_counter() - start:.2f}s")
+
+
 def display_menu():
     """This method displays the menu and calls the desired function"""
     while True:
@@ -69,6 +151,9 @@ def display_menu():
         10) Self-diagnose router
         11) Run Pylint
         12) Run unittests for connectors
+        13) Self-diagnose all routers concurrently
+        14) Check router config drift (no reload)
+        15) Reachability matrix from every vantage point
         0) Exit
         ############### MENU ###############
         """)
@@ -136,9 +221,26 @@ def display_menu():
                 run_connector_unittests()
             except Exception as e:
                 print('Failed to run unittests', e)
+        elif choice == '13':
+            try:
+                run_fleet_self_diagnose()
+            except Exception as e:
+                print('Failed to run fleet self-diagnose', e)
+        elif choice == '14':
+            try:
+                run_drift_check()
+            except Exception as e:
+                print('Failed to check config drift', e)
+        elif choice == '15':
+            try:
+                run_reachability_matrix()
+            except Exception as e:
+                print('Failed to build reachability matrix', e)
         elif choice == '0':
+            ATTACKER.close()
             break
 
 
 if __name__ == '__main__':
+    preload_scripts()
     display_menu()
@@ -1,55 +1,52 @@
 """This module is used to define every attack"""
 
+import os
 import subprocess
 import threading
 import time
 
+from project.attack_scenario import Action, play
+from project.icmp_sweep import format_table, run_sweep
+from project.remote_exec import RemoteHost
+from project.rtt_analysis import analyse_scenario, format_report, parse_ping_stream, summarize
+from project.topology_index import load_index
+
 REMOTE = 'osboxes@192.168.201.100'
 SSH_KEY = "/home/osboxes/.ssh/guest2_ed25519"
-IPS = ["192.168.201.1",
-       "192.168.201.100",
-       "192.168.202.1",
-       "192.168.202.2",
-       "192.168.203.2",
-       "192.168.203.3",
-       "192.168.204.3",
-       "192.168.204.4",
-       "192.168.205.100", ]
-SSH_IPS = ['192.168.201.1',
-           '192.168.202.2',
-           '192.168.203.3', ]
+ATTACKER_SUBNET = '192.168.201.0/24'
+GUEST_IPS = ['192.168.201.100', '192.168.205.100']
+ATTACKER = RemoteHost(REMOTE, SSH_KEY)
+PING_AND_DOS = [
+    Action('ping', 0, ['ping', '-O', '-c', '15', '192.168.205.100']),
+    Action('dos', 3.5, ['sudo', '-n', 'hping3', '-S', '-p', '80', '--flood', '-q', '192.168.205.100'],
+           remote=True, duration=10),
+]
+
+
+def ping_targets():
+    """This method returns every device address reachable from the main container, plus the guests"""
+    return load_index().data_addresses() + GUEST_IPS
+
+
+def ssh_targets():
+    """This method returns, for every router, the address SSH from the attacker's subnet arrives on"""
+    index = load_index()
+    return [index.ingress_address(device, ATTACKER_SUBNET) for device in index.with_role('router')]
 
 
 def test_ssh_acl(ip):
     """This method is used to try the SSH ACL made on given IP"""
-    ssh_acl = subprocess.run(
-        [
-            'ssh',
-            '-i', SSH_KEY,
-            '-o', 'BatchMode=yes',
-            '-o', 'StrictHostKeyChecking=no',
-            REMOTE,
-            'ssh', '-l', 'admin', ip
-        ],
-        capture_output=True,
-        text=True,
-    )
+    ssh_acl = ATTACKER.run(['ssh', '-l', 'admin', ip], capture_output=True, text=True)
     for line in ssh_acl.stderr.splitlines():
         if 'stdin' not in line:
             print(line)
 
 
-def ping(ip):
-    """This method is used to launch a basic ping to a given IP"""
-    p = subprocess.run(['ping', '-c', '2', ip],
-                       capture_output=True,
-                       text=True)
-    print(p.stdout)
-
-
 def run_ping_1():
     """This method is used to send a ping from the main container to DockerGuest-1"""
-    with (subprocess.Popen(['ping', '-c', '15', '192.168.205.100'],
+    start = time.monotonic()
+    entries = []
+    with (subprocess.Popen(['ping', '-O', '-c', '15', '192.168.205.100'],
                            stdout=subprocess.PIPE,
                            stderr=subprocess.PIPE,
                            stdin=subprocess.PIPE,
@@ -57,38 +54,23 @@ def run_ping_1():
                            )
     ) as p:
         for line in p.stdout:
+            entries.append((time.monotonic() - start, line))
             print(line, end='')
         p.wait()
+    summary = summarize(parse_ping_stream(entries)[1])
+    print(f"loss {summary['loss']}%, p50 {summary['p50']} ms, p90 {summary['p90']} ms, jitter {summary['jitter']} ms")
 
 
 def run_ping_2():
     """This method is used to send a ping from Attacker to DockerGuest-1"""
-    dos = subprocess.run(
-        [
-            'ssh',
-            '-i', SSH_KEY,
-            '-o', 'BatchMode=yes',
-            '-o', 'StrictHostKeyChecking=no',
-            REMOTE,
-            'ping', '-c', '2', '192.168.205.100'
-        ],
-        capture_output=True,
-        text=True,
-    )
-    print(dos.stdout)
+    for line in ATTACKER.stream(['ping', '-c', '2', '192.168.205.100']):
+        print(line, end='')
 
 
 def run_nmap():
     """This method is used to launch a nmap from Attacker to DockerGuest-1"""
-    nmap = subprocess.run(
-        [
-            'ssh',
-            '-i', SSH_KEY,
-            '-o', 'BatchMode=yes',
-            '-o', 'StrictHostKeyChecking=no',
-            REMOTE,
-            'sudo', '-n', 'nmap', '-sS', '--top-ports', '5', '-T5', '192.168.205.100',
-        ],
+    nmap = ATTACKER.run(
+        ['sudo', '-n', 'nmap', '-sS', '--top-ports', '5', '-T5', '192.168.205.100'],
         capture_output=True,
         text=True,
         check=True,
@@ -98,15 +80,8 @@ def run_nmap():
 
 def run_dos():
     """This method is used to launch a DoS attack from Attacker to DockerGuest-1"""
-    dos = subprocess.run(
-        [
-            'ssh',
-            '-i', SSH_KEY,
-            '-o', 'BatchMode=yes',
-            '-o', 'StrictHostKeyChecking=no',
-            REMOTE,
-            'sudo', '-n', 'timeout', '10s', 'hping3', '-S', '-p', '80', '--flood', '-q', '192.168.205.100',
-        ],
+    dos = ATTACKER.run(
+        ['sudo', '-n', 'timeout', '10s', 'hping3', '-S', '-p', '80', '--flood', '-q', '192.168.205.100'],
         capture_output=True,
         text=True,
     )
@@ -115,33 +90,28 @@ def run_dos():
 
 
 def ping_and_dos():
-    """This method combines both PING and DoS and runs them in separate Threads"""
-    t1 = threading.Thread(target=run_ping_1)
-    t2 = threading.Thread(target=run_dos)
-    t1.start()
-    time.sleep(3.5)
-    print("Incoming DOS...")
-    t2.start()
-    t1.join()
-    t2.join()
+    """This method runs the PING and, 3.5 seconds in, the DoS as one timed scenario and measures the DoS impact"""
+    log_path, records = play(PING_AND_DOS, ATTACKER)
+    csv_path = os.path.splitext(log_path)[0] + '.csv'
+    phases = analyse_scenario(records, duration=PING_AND_DOS[1].duration, csv_path=csv_path)
+    print(format_report(phases))
+    for first, last, start, end, lost in phases['loss_windows']:
+        print(f'lost icmp_seq {first}-{last} ({lost}) between {start:.1f}s and {end:.1f}s')
+    print(f'Scenario log written to {log_path}, probes to {csv_path}')
 
 
 def run_all_pings():
-    """This method is used to PING every device from main container"""
-    threads = []
-    for ip in IPS:
-        t = threading.Thread(target=ping, args=(ip,))
-        threads.append(t)
-    for t in threads:
-        t.start()
-    for t in threads:
-        t.join()
+    """This method is used to PING every device from main container, all at once, and print loss and RTT"""
+    results = run_sweep(ping_targets())
+    print(format_table(results))
+    return results
 
 
 def test_all_ssh_acl():
-    """This method is used to test the SSH ACL made on IOU1, IOSv and CSR"""
+    """This method is used to test the SSH ACL made on IOU1, IOSv and CSR, all over one connection to Attacker"""
+    ATTACKER.start()
     threads = []
-    for ip in SSH_IPS:
+    for ip in ssh_targets():
         t = threading.Thread(target=test_ssh_acl, args=(ip,))
         threads.append(t)
     for t in threads:
@@ -0,0 +1,197 @@
+"""Dependency-aware scheduler that runs independent provisioning tasks in parallel"""
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from lib.connectors.timing import span
+
+DONE = ('passed', 'resumed')
+
+
+class Task:
+    """One provisioning task, the tasks it waits for and the device it configures"""
+
+    def __init__(self, name: str, func, after=(), device: str = None, inputs=(), journaled: bool = True):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.device = device
+        self.inputs = inputs
+        self.journaled = journaled
+        self.fingerprint = None
+
+    def source(self) -> str:
+        """Return the code of the task, so editing a step also invalidates its checkpoint"""
+        try:
+            return inspect.getsource(getattr(self.func, 'func', self.func))
+        except (OSError, TypeError):
+            return getattr(self.func, '__qualname__', repr(self.func))
+
+
+class ProvisioningJournal:
+    """Checkpoint file recording which tasks completed and the fingerprint of their inputs
+
+    It is rewritten atomically after every completed task, so a run that dies halfway
+    leaves a journal the next run can resume from.
+    """
+
+    def __init__(self, path: str = 'provisioning_journal.json'):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            self.entries = {}
+
+    def completed(self, name: str, fingerprint: str):
+        """Return the journal entry if the task completed with these inputs, otherwise None"""
+        entry = self.entries.get(name)
+        return entry if entry and entry['fingerprint'] == fingerprint else None
+
+    def record(self, task: Task, seconds: float):
+        """Mark a task as completed and save the journal"""
+        self.entries[task.name] = {
+            'fingerprint': task.fingerprint,
+            'device': task.device,
+            'completed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seconds': round(seconds, 3),
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(self.entries, file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class ProvisioningScheduler:
+    """Run tasks on a thread pool as soon as everything they depend on has passed
+
+    Tasks of the same device are usually chained, so each device is configured by one
+    session at a time while the pipelines of different devices overlap. A failed task
+    blocks everything that depends on it, the rest of the lab keeps going.
+
+    With a journal, a task whose fingerprint (its code, its inputs and the fingerprints of
+    its dependencies) matches a completed entry is resumed instead of run again, unless
+    its name or device is listed in force, or force contains 'all'. Tasks added with
+    journaled=False, such as ones setting up state that does not survive a restart, always run.
+    """
+
+    def __init__(self, max_workers: int = 8, journal: ProvisioningJournal = None, force=()):
+        self.max_workers = max_workers
+        self.journal = journal
+        self.force = set(force)
+        self.tasks = {}
+
+    def add(self, name: str, func, after=(), device: str = None, inputs=(), journaled: bool = True) -> str:
+        """Add a task that starts once every task named in after has passed"""
+        if name in self.tasks:
+            raise ValueError(f'Duplicate task {name}')
+        self.tasks[name] = Task(name, func, after, device, inputs, journaled)
+        return name
+
+    def chain(self, device: str, steps, after=(), journaled: bool = True) -> tuple:
+        """Add (name, func[, inputs]) steps that run one after another and return the last one as a dependency"""
+        previous = tuple(after)
+        for name, func, *inputs in steps:
+            previous = (self.add(name, func, previous, device, inputs, journaled),)
+        return previous
+
+    def order(self) -> list:
+        """Return the task names in a valid run order, rejecting unknown dependencies and cycles"""
+        for task in self.tasks.values():
+            unknown = [name for name in task.after if name not in self.tasks]
+            if unknown:
+                raise ValueError(f"Task {task.name} depends on unknown task(s) {', '.join(unknown)}")
+        waiting = {name: set(task.after) for name, task in self.tasks.items()}
+        ordered = []
+        while waiting:
+            ready = [name for name, after in waiting.items() if not after]
+            if not ready:
+                raise ValueError(f"Dependency cycle between {', '.join(sorted(waiting))}")
+            for name in ready:
+                del waiting[name]
+                ordered.append(name)
+            for after in waiting.values():
+                after.difference_update(ready)
+        return ordered
+
+    def fingerprint(self):
+        """Compute every task's fingerprint, chained through its dependencies"""
+        for name in self.order():
+            task = self.tasks[name]
+            payload = json.dumps([name, task.source(), task.inputs,
+                                  [self.tasks[dep].fingerprint for dep in task.after]],
+                                 sort_keys=True, default=str)
+            task.fingerprint = hashlib.sha256(payload.encode()).hexdigest()
+
+    def _resumable(self, task: Task):
+        if self.journal is None or not task.journaled or 'all' in self.force or {task.name, task.device} & self.force:
+            return None
+        return self.journal.completed(task.name, task.fingerprint)
+
+    @staticmethod
+    def _run_task(task: Task) -> dict:
+        start = time.perf_counter()
+        try:
+            with span(f'task.{task.name}', task.device):
+                value = task.func()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return {'status': 'failed', 'seconds': time.perf_counter() - start,
+                    'error': f'{type(e).__name__}: {e}', 'value': None}
+        return {'status': 'passed', 'seconds': time.perf_counter() - start, 'error': None, 'value': value}
+
+    @staticmethod
+    def _blocker(task: Task, results: dict):
+        return next((name for name in task.after
+                     if name in results and results[name]['status'] not in DONE), None)
+
+    def run(self, on_done=None) -> dict:
+        """Run every task and return its result by name
+
+        on_done(task, result) is called from the calling thread as each task finishes, is
+        resumed from the journal or is blocked, so it can report to a pyATS step without the
+        steps being shared across threads.
+        """
+        self.fingerprint()
+        pending = dict(self.tasks)
+        running = {}
+        results = {}
+
+        def finish(task, result):
+            results[task.name] = result
+            if self.journal is not None and task.journaled and result['status'] == 'passed':
+                self.journal.record(task, result['seconds'])
+            if on_done:
+                on_done(task, result)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    blocker = self._blocker(task, results)
+                    if blocker:
+                        del pending[name]
+                        finish(task, {'status': 'blocked', 'seconds': 0.0,
+                                      'error': f'{blocker} did not pass', 'value': None})
+                    elif all(dep in results for dep in task.after):
+                        del pending[name]
+                        entry = self._resumable(task)
+                        if entry:
+                            finish(task, {'status': 'resumed', 'seconds': 0.0,
+                                          'error': f"unchanged since {entry['completed']}", 'value': None})
+                        else:
+                            running[executor.submit(self._run_task, task)] = task
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    finish(task, future.result())
+        return results
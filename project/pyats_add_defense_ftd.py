@@ -2,8 +2,9 @@
 This test will configure defence against Attacker.
 """
 from bravado.exception import HTTPError
-from pyats import aetest, topology
+from pyats import aetest
 from lib.connectors.swagger_conn import SwaggerConnector
+from project.testbed_cache import load_testbed
 
 
 
@@ -40,7 +41,7 @@ class CommonSetup(aetest.CommonSetup):
     def load_testbed(self, steps):
         """This method loads the testbed that provides details about whole topology."""
         with steps.start("Load testbed"):
-            self.tb = topology.loader.load('main_testbed.yaml')
+            self.tb = load_testbed()
         self.parent.parameters.update(tb=self.tb)
 
     @aetest.subsection
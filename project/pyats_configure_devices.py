@@ -1,23 +1,29 @@
 """
 This test will configure all devices.
 """
+import argparse
+import sys
 import time
-import subprocess
+import functools
 import asyncio
 
 from bravado.exception import HTTPError
-from pyats import aetest, topology
+from pyats import aetest
 from pyats.topology import Device
-from genie.libs.conf.interface.iosxe import Interface
-from genie.libs.conf.ospf import Ospf
 from lib.connectors.ssh_conn import SSHConnection
 from lib.connectors.swagger_conn import SwaggerConnector
 from lib.connectors.async_telnet_conn import TelnetConnection
+from lib.connectors.timing import RECORDER
 from ssh_config import commands
 from int_config import add_ips
 from dhcp_config import dhcp_commands
 from ospf_config import ospf_commands
 from ssh_acl import acl_commands
+import host_network
+from genie_batch import ConfigBatch, add_interfaces, add_ospf, add_ssh_acl
+from testbed_cache import load_testbed
+from topology_index import TopologyIndex
+from provisioning_scheduler import ProvisioningJournal, ProvisioningScheduler
 
 
 async def telnet_configure_ssh(conn: TelnetConnection, templates, prompt, **kwargs):
@@ -53,6 +59,7 @@ class CommonSetup(aetest.CommonSetup):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.tb = None
+        self.index = None
         self.dev = None
         self._swagger_conn = None
 
@@ -84,10 +91,8 @@ class CommonSetup(aetest.CommonSetup):
         if self._swagger_conn is not None:
             return self._swagger_conn
 
-        for device in self.tb.devices:
+        for device in self.index.with_role('firewall'):
             dev = self.tb.devices[device]
-            if dev.custom.role != 'firewall':
-                continue
             if "swagger" not in dev.connections:
                 continue
 
@@ -102,346 +107,314 @@ class CommonSetup(aetest.CommonSetup):
     def load_testbed(self, steps):
         """This method loads the testbed that provides details about whole topology."""
         with steps.start("Load testbed"):
-            self.tb = topology.loader.load('main_testbed.yaml')
-        self.parent.parameters.update(tb=self.tb)
+            self.tb = load_testbed()
+            self.index = TopologyIndex(self.tb)
+        self.parent.parameters.update(tb=self.tb, index=self.index)
 
     @aetest.subsection
-    def bring_up_server_interface(self, steps):
-        """This method adds an IP address and some routes to the container"""
-        server = self.tb.devices['UbuntuServer']
-        with steps.start("Bring up container interface"):
-            for intf_name, intf in server.interfaces.items():
-                subprocess.run(['sudo', 'ip', 'addr', 'replace',
-                                f'{intf.ipv4}',
-                                'dev', f'{intf_name}'],
-                               check=True)
-                subprocess.run(['sudo', 'ip', 'link', 'set', 'dev',
-                                f'{intf_name}', 'up'],
-                               check=True)
-        with steps.start("Add routes on container"):
-            for device in self.tb.devices:
-                if self.tb.devices[device].type != 'router':
+    def provision_devices(self, steps, max_workers=8, journal='provisioning_journal.json', force=()):
+        """This method runs the per-device pipelines in parallel and reports every task as a step.
+
+        Tasks already completed with the same inputs by an earlier run are resumed from the
+        journal; force lists task or device names to run again anyway, 'all' ignores the journal.
+        """
+        scheduler = self.build_schedule(max_workers, ProvisioningJournal(journal) if journal else None, force)
+
+        def report(task, result):
+            with steps.start(f"{task.name} ({result['seconds']:.1f}s)", continue_=True) as step:
+                if result['status'] == 'blocked':
+                    step.skipped(f"Skipped, {result['error']}")
+                elif result['status'] == 'resumed':
+                    step.skipped(f"Already done, {result['error']}")
+                elif result['status'] == 'failed':
+                    step.failed(result['error'])
+
+        start = time.perf_counter()
+        results = scheduler.run(on_done=report)
+        elapsed = time.perf_counter() - start
+        serial = sum(result['seconds'] for result in results.values())
+        resumed = sum(result['status'] == 'resumed' for result in results.values())
+        print(f'Provisioned {len(results)} tasks ({resumed} resumed) in {elapsed:.1f}s'
+              f' ({serial:.1f}s if run one by one)')
+
+    def testbed_inputs(self, *devices):
+        """This method returns the testbed values of some devices, used to fingerprint the tasks using them."""
+        raw = self.tb.raw_config
+        return [(raw['devices'].get(device), raw.get('topology', {}).get(device)) for device in devices]
+
+    def build_schedule(self, max_workers=8, journal=None, force=()):
+        """This method declares every provisioning task, what it has to wait for and what it depends on."""
+        scheduler = ProvisioningScheduler(max_workers, journal, force)
+        server = self.index.server
+        # kernel addresses and routes are lost when the container restarts, so this step is never resumed
+        network = scheduler.chain(server, [
+            ('Bring up container interfaces and routes', self.bring_up_server_interface,
+             self.testbed_inputs(*self.tb.devices)),
+        ], journaled=False)
+        csr_ready = scheduler.chain('CSR', [('Initial CSR setup', self.initial_setup_csr, self.testbed_inputs('CSR'))])
+        for device in self.index.with_role('router') + self.index.with_role('firewall'):
+            dev = self.tb.devices[device]
+            inputs = self.testbed_inputs(device, server)
+            if dev.custom.role == 'router':
+                ssh_ready = scheduler.chain(device, [
+                    (f"Configure SSH connection on {device}", functools.partial(self.configure_ssh, device),
+                     commands, inputs),
+                ], after=csr_ready if device == 'CSR' else ())
+                if 'unicon' in dev.connections:
+                    scheduler.chain(device, [
+                        ("Configure interfaces, OSPF and SSH ACL on CSR via GENIE", self.genie_configure_csr, inputs),
+                    ], after=ssh_ready + network)
                     continue
-                gateway = self.tb.devices[device].interfaces['initial'].ipv4.ip.compressed
-                csr_gw = self.tb.devices['CSR'].interfaces['initial'].ipv4.ip.compressed
-                for interface in self.tb.devices[device].interfaces:
-                    if self.tb.devices[device].interfaces[interface].link.name == 'management':
-                        continue
-                    subnet = self.tb.devices[device].interfaces[interface].ipv4.network.compressed
-                    subprocess.run(['sudo', 'ip', 'route', 'replace',
-                                    f'{subnet}',
-                                    'via', f'{gateway}'],
-                                   check=True)
-                    if subnet in ['192.168.204.0/24', '192.168.205.0/24']:
-                        subprocess.run(['sudo', 'ip', 'route', 'replace', f'{subnet}', 'via', f'{csr_gw}'],
-                                       check=True)
-
-    @aetest.subsection
-    def initial_setup_csr(self, steps):
+                ssh_steps = [(f"Configure interfaces on {device}",
+                              functools.partial(self.ssh_configure_interfaces, device), add_ips, inputs)]
+                if device == 'IOU1':
+                    ssh_steps.append(("Configure DHCP on IOU1", self.ssh_configure_dhcp_iou1, dhcp_commands, inputs))
+                ssh_steps.append((f"Configure OSPF on {device}", functools.partial(self.ssh_configure_ospf, device),
+                                  ospf_commands, inputs))
+                ssh_steps.append((f"Configure ACL on {device}", functools.partial(self.ssh_configure_acl, device),
+                                  acl_commands, inputs))
+                scheduler.chain(device, ssh_steps, after=ssh_ready + network)
+            elif dev.custom.role == 'firewall':
+                console_ready = scheduler.chain(device, [
+                    ("Bring up FTD management interface", functools.partial(self.bring_up_ftd_interface, device),
+                     inputs),
+                ])
+                scheduler.chain(device, [(name, func, inputs) for name, func in self.swagger_steps()],
+                                after=console_ready + network)
+        return scheduler
+
+    def swagger_steps(self):
+        """This method is used to list the FTD swagger steps in order, shared with the FDM stand-in benchmark"""
+        return [
+            ("Connect to FTD and finish initial setup", self.swagger_connect_and_initial_setup),
+            ("Delete existing DHCP on FTD", self.swagger_delete_existing_dhcp),
+            ("Configure other interfaces on FTD", self.swagger_configure_ftd_interfaces),
+            ("Configure new DHCP on FTD", self.swagger_configure_new_dhcp),
+            ("Configure OSPF on FTD", self.swagger_configure_ospf),
+            ("Add allow rule on FTD", self.swagger_add_allow_rule),
+            ("Deploy FTD configuration", self.swagger_deploy),
+        ]
+
+    def bring_up_server_interface(self):
+        """This method adds the container addresses and routes that are missing, in one ip -batch call"""
+        commands = host_network.sync(self.index)
+        print(''.join(f'{command}\n' for command in commands) or 'Container networking already up to date')
+
+    def initial_setup_csr(self):
         """This method initializes CSR"""
-        with steps.start("Initial CSR setup"):
-            device = self.tb.devices['CSR']
-            conn_class = device.connections.get("telnet", {}).get("class", None)
-            assert conn_class, f"No connection for {device}"
-            ip = device.connections.telnet.ip.compressed
-            port = device.connections.telnet.port
-            try:
-                conn = conn_class(ip, port)
-                asyncio.run(initial_setup_csr(conn))
-            except Exception as e:
-                print(f'Failed to connect to device {device}', e)
-
-    @aetest.subsection
-    def configure_ssh(self, steps):
-        """This method configures the SSH connection."""
-        for device in self.tb.devices:
-            if self.tb.devices[device].custom.role != 'router':
-                continue
-            with steps.start(f"Configure SSH connection on {device}"):
-                for interface in self.tb.devices[device].interfaces:
-                    if self.tb.devices[device].interfaces[interface].link.name != 'management':
-                        continue
-                    intf_obj = self.tb.devices[device].interfaces[interface]
-                    conn_class = self.tb.devices[device].connections.get(
-                        'telnet', {}
-                    ).get('class', None)
-                    assert conn_class, f'No connection for device {device}'
-                    ip = self.tb.devices[device].connections.telnet.ip.compressed
-                    port = self.tb.devices[device].connections.telnet.port
-                    username = self.tb.devices[device].connections.ssh.credentials.login.username
-                    password = self.tb.devices[device].connections.ssh.credentials.login.password.plaintext
-                    domain = self.tb.devices[device].custom.get('domain', None)
-                    try:
-                        conn: TelnetConnection = conn_class(ip, port)
-                        asyncio.run(
-                            telnet_configure_ssh(
-                                conn,
-                                templates=commands,
-                                prompt='#',
-                                interface=interface,
-                                ip=intf_obj.ipv4.ip.compressed,
-                                sm=intf_obj.ipv4.netmask.exploded,
-                                hostname=device,
-                                username=username,
-                                password=password,
-                                domain=domain,
-                            )
-                        )
-                    except Exception as e:
-                        print(f'Failed to connect to device {device}', e)
-                        continue
+        device = self.tb.devices['CSR']
+        conn_class = device.connections.get("telnet", {}).get("class", None)
+        assert conn_class, f"No connection for {device}"
+        ip = device.connections.telnet.ip.compressed
+        port = device.connections.telnet.port
+        try:
+            conn = conn_class(ip, port)
+            asyncio.run(initial_setup_csr(conn))
+        except Exception as e:
+            print(f'Failed to connect to device {device}', e)
+
+    def configure_ssh(self, device):
+        """This method configures the SSH connection of a router over its console."""
+        intf_obj = self.index.management_interface(device)
+        conn_class = self.tb.devices[device].connections.get(
+            'telnet', {}
+        ).get('class', None)
+        assert conn_class, f'No connection for device {device}'
+        ip = self.tb.devices[device].connections.telnet.ip.compressed
+        port = self.tb.devices[device].connections.telnet.port
+        username = self.tb.devices[device].connections.ssh.credentials.login.username
+        password = self.tb.devices[device].connections.ssh.credentials.login.password.plaintext
+        domain = self.tb.devices[device].custom.get('domain', None)
+        try:
+            conn: TelnetConnection = conn_class(ip, port)
+            asyncio.run(
+                telnet_configure_ssh(
+                    conn,
+                    templates=commands,
+                    prompt='#',
+                    interface=intf_obj.name,
+                    ip=intf_obj.ipv4.ip.compressed,
+                    sm=intf_obj.ipv4.netmask.exploded,
+                    hostname=device,
+                    username=username,
+                    password=password,
+                    domain=domain,
+                )
+            )
+        except Exception as e:
+            print(f'Failed to connect to device {device}', e)
 
-    @aetest.subsection
-    def bring_up_ftd_interface(self, steps):
+    def bring_up_ftd_interface(self, device):
         """This method adds an ip address to FTD's management interface."""
-        with steps.start("Bring up FTD management interface"):
-            for device in self.tb.devices:
-                if self.tb.devices[device].custom.role != 'firewall':
-                    continue
-                for interface in self.tb.devices[device].interfaces:
-                    if self.tb.devices[device].interfaces[interface].link.name != 'management':
-                        continue
-
-                    intf_obj = self.tb.devices[device].interfaces[interface]
-                    hostname = self.tb.devices[device].custom.hostname
-                    gateway = self.tb.devices['UbuntuServer'].interfaces['ens4'].ipv4.ip.compressed
-                    conn_class = self.tb.devices[device].connections.get('telnet', {}).get('class', None)
-                    assert conn_class, f'No connection for device {device}'
-                    ip = self.tb.devices[device].connections.telnet.ip.compressed
-                    port = self.tb.devices[device].connections.telnet.port
-                    password = self.tb.devices[device].connections.telnet.credentials.login.password.plaintext
-                    conn: TelnetConnection = conn_class(ip, port)
-
-                    asyncio.run(
-                        telnet_configure_ftd(
-                            conn,
-                            hostname=hostname,
-                            ip=intf_obj.ipv4.ip.compressed,
-                            netmask=intf_obj.ipv4.netmask.exploded,
-                            gateway=gateway,
-                            password=password,
-                        )
-                    )
+        intf_obj = self.index.management_interface(device)
+        hostname = self.tb.devices[device].custom.hostname
+        gateway = self.index.management_ip(self.index.server)
+        conn_class = self.tb.devices[device].connections.get('telnet', {}).get('class', None)
+        assert conn_class, f'No connection for device {device}'
+        ip = self.tb.devices[device].connections.telnet.ip.compressed
+        port = self.tb.devices[device].connections.telnet.port
+        password = self.tb.devices[device].connections.telnet.credentials.login.password.plaintext
+        conn: TelnetConnection = conn_class(ip, port)
+
+        asyncio.run(
+            telnet_configure_ftd(
+                conn,
+                hostname=hostname,
+                ip=intf_obj.ipv4.ip.compressed,
+                netmask=intf_obj.ipv4.netmask.exploded,
+                gateway=gateway,
+                password=password,
+            )
+        )
 
-    @aetest.subsection
-    def ssh_configure_interfaces(self, steps):
+    def ssh_configure_interfaces(self, device):
         """This method is used to configure all other active interfaces on IOU1 and IOSv via SSH"""
-        for device in self.tb.devices:
-            if self.tb.devices[device].custom.role != 'router':
-                continue
-            if 'unicon' in self.tb.devices[device].connections:
-                continue
-            with steps.start(f"Configure interfaces on {device}"):
-                conn = self.ensure_ssh_connection(device)
-                try:
-                    for interface in self.tb.devices[device].interfaces:
-                        if self.tb.devices[device].interfaces[interface].link.name == 'management':
-                            continue
-                        intf_obj = self.tb.devices[device].interfaces[interface]
-                        print(
-                            conn.configure(
-                                add_ips,
-                                interface=interface,
-                                ip=intf_obj.ipv4.ip.compressed,
-                                sm=intf_obj.ipv4.netmask.exploded,
-                            )
-                        )
-                finally:
-                    conn.close()
+        conn = self.ensure_ssh_connection(device)
+        try:
+            for intf_obj in self.index.data_interfaces(device):
+                print(
+                    conn.configure(
+                        add_ips,
+                        interface=intf_obj.name,
+                        ip=intf_obj.ipv4.ip.compressed,
+                        sm=intf_obj.ipv4.netmask.exploded,
+                    )
+                )
+        finally:
+            conn.close()
 
-    @aetest.subsection
-    def ssh_configure_dhcp_iou1(self, steps):
+    def ssh_configure_dhcp_iou1(self):
         """This method is used to configure a new DHCP pool on IOU1 via SSH"""
         device = self.tb.devices['IOU1']
         intf_obj = device.interfaces['Ethernet0/1']
         guest_network = intf_obj.ipv4.network.network_address.exploded
         guest_subnetmask = intf_obj.ipv4.netmask.exploded
         guest_gateway = intf_obj.ipv4.ip.compressed
-        with steps.start("Configure DHCP on IOU1"):
-            conn = self.ensure_ssh_connection('IOU1')
-            try:
-                print(
-                    conn.configure(
-                        dhcp_commands,
-                        guest_nw=guest_network,
-                        guest_gw=guest_gateway,
-                        guest_sm=guest_subnetmask,
-                    )
+        conn = self.ensure_ssh_connection('IOU1')
+        try:
+            print(
+                conn.configure(
+                    dhcp_commands,
+                    guest_nw=guest_network,
+                    guest_gw=guest_gateway,
+                    guest_sm=guest_subnetmask,
                 )
-            finally:
-                conn.close()
+            )
+        finally:
+            conn.close()
 
-    @aetest.subsection
-    def ssh_configure_ospf(self, steps):
+    def ssh_configure_ospf(self, device):
         """This method is used to configure OSPF on IOU1 and IOSv via SSH"""
-        for device in self.tb.devices:
-            if self.tb.devices[device].custom.role != 'router':
-                continue
-            if 'unicon' in self.tb.devices[device].connections:
-                continue
-            with steps.start(f"Configure OSPF on {device}"):
-                conn = self.ensure_ssh_connection(device)
-                try:
-                    for interface in self.tb.devices[device].interfaces:
-                        print(conn.configure(ospf_commands, interface=interface))
-                finally:
-                    conn.close()
-
-    @aetest.subsection
-    def ssh_configure_acl(self, steps):
+        conn = self.ensure_ssh_connection(device)
+        try:
+            for interface in self.tb.devices[device].interfaces:
+                print(conn.configure(ospf_commands, interface=interface))
+        finally:
+            conn.close()
+
+    def ssh_configure_acl(self, device):
         """This method is used to configure an ACL SSH on IOU1 and IOSv via SSH"""
-        for device in self.tb.devices:
-            if self.tb.devices[device].custom.role != 'router':
-                continue
-            if 'unicon' in self.tb.devices[device].connections:
-                continue
-            with steps.start(f"Configure ACL on {device}"):
-                conn = self.ensure_ssh_connection(device)
-                try:
-                    container_ip = self.tb.devices['UbuntuServer'].interfaces['ens4'].ipv4.ip.compressed
-                    print(conn.configure(acl_commands, ssh_container=container_ip))
-                finally:
-                    conn.close()
-
-    @aetest.subsection
-    def genie_configure_other_interfaces(self, steps):
-        """This method is used to configure all other interfaces on CSR via GENIE"""
-        with steps.start("Configure other CSR interfaces via GENIE"):
-            try:
-                dev = self.ensure_csr_connection()
-            except Exception as e:
-                print('Failed to connect with genie to CSR', e)
-            for ifname in ("GigabitEthernet2", "GigabitEthernet3"):
-                intf = Interface(name=ifname)
-                intf.device = dev
-                intf.ipv4 = dev.interfaces[ifname].ipv4
-                intf.enabled = True
-                cfg = intf.build_config(apply=False)
-                dev.configure(cfg.cli_config.data)
-
-    @aetest.subsection
-    def genie_configure_ospf(self, steps):
-        """This method is used to configure OSPF on CSR via GENIE"""
-        with steps.start("Configure OSPF on CSR via GENIE"):
-            try:
-                dev = self.ensure_csr_connection()
-            except Exception as e:
-                print('Failed to connect with genie to CSR', e)
-            ospf = Ospf()
-            da = ospf.device_attr[dev]
-            va = da.vrf_attr['default']
-            va.instance = '1'
-            for ifname in ("GigabitEthernet1", "GigabitEthernet2", "GigabitEthernet3"):
-                ia = va.area_attr['0'].interface_attr[ifname]
-                ia.if_admin_control = True
-            cfg = da.build_config(apply=False)
-            dev.configure(cfg.cli_config.data)
-
-    @aetest.subsection
-    def genie_configure_ssh_acl(self, steps):
-        """This method is used to configure an SSH ACL on CSR via GENIE"""
-        with steps.start("Configure SSH ACL on CSR via GENIE"):
-            try:
-                dev = self.ensure_csr_connection()
-            except Exception as e:
-                print('Failed to connect with genie to CSR', e)
-            container_ip = self.tb.devices['UbuntuServer'].interfaces['ens4'].ipv4.ip.compressed
-            cfg = f"""
-            ip access-list standard SSH
-             permit host {container_ip}
-             deny any
-            line vty 0 4
-             access-class SSH in
-             transport input ssh
-            """
-            dev.configure(cfg)
-
-    @aetest.subsection
-    def swagger_connect_and_initial_setup(self, steps):
+        conn = self.ensure_ssh_connection(device)
+        try:
+            container_ip = self.index.management_ip(self.index.server)
+            print(conn.configure(acl_commands, ssh_container=container_ip))
+        finally:
+            conn.close()
+
+    def genie_configure_csr(self):
+        """This method is used to configure the other interfaces, OSPF and the SSH ACL on CSR via GENIE in one session"""
+        dev = self.ensure_csr_connection()
+        with ConfigBatch(dev) as batch:
+            add_interfaces(batch, dev, self.index.data_interfaces('CSR'))
+            add_ospf(batch, dev, list(dev.interfaces))
+            add_ssh_acl(batch, self.index.management_ip(self.index.server))
+            print(batch.render())
+
+    def swagger_connect_and_initial_setup(self):
         """This method is being used to finish initial FTD setup and continue configuring it."""
-        with steps.start("Connect to FTD and finish initial setup"):
-            connection = self.ensure_swagger_connection()
-            swagger = connection.get_swagger_client()
-            print(swagger)
-            try:
-                connection.finish_initial_setup()
-            except HTTPError as e:
-                print('Initial setup is complete:', e)
-
-    @aetest.subsection
-    def swagger_delete_existing_dhcp(self, steps):
+        connection = self.ensure_swagger_connection()
+        swagger = connection.get_swagger_client()
+        print(swagger)
+        try:
+            connection.finish_initial_setup()
+        except HTTPError as e:
+            print('Initial setup is complete:', e)
+
+    def swagger_delete_existing_dhcp(self):
         """This method deletes existing DHCP configuration on FTD"""
-        with steps.start("Delete existing DHCP on FTD"):
-            connection = self.ensure_swagger_connection()
-            try:
-                print(connection.delete_existing_dhcp_sv())
-            except HTTPError as e:
-                print('No existing DHCP server', e)
+        connection = self.ensure_swagger_connection()
+        try:
+            print(connection.delete_existing_dhcp_sv())
+        except HTTPError as e:
+            print('No existing DHCP server', e)
 
-    @aetest.subsection
-    def swagger_configure_ftd_interfaces(self, steps):
+    def swagger_configure_ftd_interfaces(self):
         """This method configures all other active interfaces on FTD via SWAGGER"""
-        with steps.start("Configure other interfaces on FTD"):
-            connection = self.ensure_swagger_connection()
-            ftd_ep2 = connection.device.interfaces['inside']
-            csr_ftd = connection.device.interfaces['outside']
-            try:
-                print(connection.configure_ftd_interfaces(csr_ftd, ftd_ep2))
-            except HTTPError as e:
-                print('FTD interfaces already configured:', e)
-
-    @aetest.subsection
-    def swagger_configure_new_dhcp(self, steps):
+        connection = self.ensure_swagger_connection()
+        ftd_ep2 = connection.device.interfaces['inside']
+        csr_ftd = connection.device.interfaces['outside']
+        try:
+            print(connection.configure_ftd_interfaces(csr_ftd, ftd_ep2))
+        except HTTPError as e:
+            print('FTD interfaces already configured:', e)
+
+    def swagger_configure_new_dhcp(self):
         """This method configures a new DHCP pool on FTD via SWAGGER"""
-        with steps.start("Configure new DHCP on FTD"):
-            connection = self.ensure_swagger_connection()
-            ftd_ep2 = connection.device.interfaces['inside']
-            try:
-                print(connection.configure_new_dhcp_sv(ftd_ep2))
-            except HTTPError as e:
-                print('Could not configure new DHCP server', e)
-
-    @aetest.subsection
-    def swagger_configure_ospf(self, steps):
+        connection = self.ensure_swagger_connection()
+        ftd_ep2 = connection.device.interfaces['inside']
+        try:
+            print(connection.configure_new_dhcp_sv(ftd_ep2))
+        except HTTPError as e:
+            print('Could not configure new DHCP server', e)
+
+    def swagger_configure_ospf(self):
         """This method configures OSPF on FTD via SWAGGER"""
-        with steps.start("Configure OSPF on FTD"):
-            connection = self.ensure_swagger_connection()
-            try:
-                ospf = connection.configure_ospf(
-                    vrf_id='default',
-                    name='ospf_1',
-                    process_id='1',
-                    area_id='0',
-                    if_to_cidr=[
-                        ('outside', '192.168.204.0/24'),
-                        ('inside', '192.168.205.0/24'),
-                    ],
-                )
-                print(ospf)
-            except HTTPError as e:
-                print('Could not configure OSPF on FTD:', e)
-
-    @aetest.subsection
-    def swagger_add_allow_rule(self, steps):
+        connection = self.ensure_swagger_connection()
+        try:
+            ospf = connection.configure_ospf(
+                vrf_id='default',
+                name='ospf_1',
+                process_id='1',
+                area_id='0',
+                if_to_cidr=[
+                    ('outside', '192.168.204.0/24'),
+                    ('inside', '192.168.205.0/24'),
+                ],
+            )
+            print(ospf)
+        except HTTPError as e:
+            print('Could not configure OSPF on FTD:', e)
+
+    def swagger_add_allow_rule(self):
         """This method is used to add an allow rule on FTD in order to allow traffic to flow through it."""
-        with steps.start("Add allow rule on FTD"):
-            connection = self.ensure_swagger_connection()
-            try:
-                allow_rule = connection.add_allow_rule(inside_interface='inside', outside_interface='outside')
-                print(allow_rule)
-            except HTTPError as e:
-                print('Could not add allow rule on FTD:', e)
+        connection = self.ensure_swagger_connection()
+        try:
+            allow_rule = connection.add_allow_rule(inside_interface='inside', outside_interface='outside')
+            print(allow_rule)
+        except HTTPError as e:
+            print('Could not add allow rule on FTD:', e)
+
+    def swagger_deploy(self):
+        """This method is being used to deploy actual configuration on FTD"""
+        connection = self.ensure_swagger_connection()
+        try:
+            connection.deploy()
+        except HTTPError as e:
+            print('Deployment failed:', e)
 
     @aetest.subsection
-    def swagger_deploy(self, steps):
-        """This method is being used to deploy actual configuration on FTD"""
-        with steps.start("Deploy FTD configuration"):
-            connection = self.ensure_swagger_connection()
-            try:
-                connection.deploy()
-            except HTTPError as e:
-                print('Deployment failed:', e)
+    def export_phase_timings(self, steps):
+        """This method is used to write the duration and traffic of every connector phase of this run"""
+        with steps.start("Export phase timings"):
+            json_path, csv_path = RECORDER.export(f"timing/provisioning_{time.strftime('%Y%m%d_%H%M%S')}")
+            print(f'Phase timings written to {json_path} and {csv_path}')
 
 
 if __name__ == '__main__':
-    aetest.main()
+    parser = argparse.ArgumentParser(description='Configure all devices, resuming from the last run')
+    parser.add_argument('--force', nargs='*', default=[],
+                        help="task or device names to run again even if unchanged, or 'all'")
+    parser.add_argument('--journal', default='provisioning_journal.json',
+                        help="checkpoint file, an empty string disables resuming")
+    args, sys.argv[1:] = parser.parse_known_args(sys.argv[1:])
+    aetest.main(journal=args.journal, force=args.force)
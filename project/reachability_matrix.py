@@ -0,0 +1,212 @@
+"""All-pairs reachability: every testbed address probed from every vantage point at the same time"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import re
+import shlex
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.connectors.ssh_conn import SSHConnection
+from project.icmp_sweep import parse_ping, sweep
+from project.testbed_cache import DEFAULT_TESTBED
+from project.topology_index import MANAGEMENT_LINK, load_index
+
+LOCAL = 'container'
+ATTACKER = 'attacker'
+VTY_LINES = 5
+IOS_SUCCESS_RE = re.compile(r'Success rate is (?P<rate>\d+) percent \((?P<received>\d+)/(?P<sent>\d+)\)'
+                            r'(?:, round-trip min/avg/max = (?P<min>\d+)/(?P<avg>\d+)/(?P<max>\d+) ms)?')
+# every ping runs in the background and prints its whole output in one write, so sections do not interleave
+FAN_OUT = ('for ip; do (out=$(ping -n -c {count} -i 0.2 -W {timeout} -w {deadline} "$ip" 2>&1); '
+           'printf "### %s\\n%s\\n" "$ip" "$out") & done; wait')
+
+
+def destinations(index, extra=()) -> list:
+    """Return every interface address of the testbed, followed by extra addresses such as the guests"""
+    return list(dict.fromkeys([*index.owners, *extra]))
+
+
+def router_targets(index, router: str, targets) -> dict:
+    """Return {address the router pings: [targets it stands for]}, one address per data subnet
+
+    The router's own addresses and the management segment, which the container already probes, are
+    left out. In each remaining subnet an extra address (a guest) is preferred, then the first address.
+    """
+    networks = {}
+    for name, ends in index.links.items():
+        for _, intf in ends:
+            if intf.ipv4 is not None:
+                networks[intf.ipv4.network] = name
+    groups = {}
+    for target in targets:
+        owner = index.owner(target)
+        address = ipaddress.ip_address(target)
+        network = next((net for net in networks if address in net), address)
+        if (owner and owner[0] == router) or networks.get(network) == MANAGEMENT_LINK:
+            continue
+        groups.setdefault(network, []).append(target)
+    picked = {}
+    for members in groups.values():
+        probe = next((t for t in members if index.owner(t) is None), members[0])
+        picked[probe] = members
+    return picked
+
+
+def parse_ios_ping(target: str, output: str) -> dict:
+    """Return the result of an IOS ping in the same form as the container's ping results"""
+    result = parse_ping(target, '')
+    match = IOS_SUCCESS_RE.search(output)
+    if match:
+        sent, received = int(match['sent']), int(match['received'])
+        result.update(sent=sent, received=received, loss=round(100.0 * (sent - received) / sent, 1) if sent else 100.0)
+        if received:
+            result['status'] = 'reachable' if received == sent else 'lossy'
+        if match['avg']:
+            result.update(rtt_min=float(match['min']), rtt_avg=float(match['avg']), rtt_max=float(match['max']))
+    return result
+
+
+def parse_fan_out(output: str) -> dict:
+    """Split the output of the remote fan-out into one parsed result per target"""
+    results = {}
+    for section in output.split('### ')[1:]:
+        target, _, body = section.partition('\n')
+        results[target.strip()] = parse_ping(target.strip(), body)
+    return results
+
+
+async def probe_local(targets, count: int, timeout: float) -> dict:
+    """Probe every target from the automation container"""
+    return {result['target']: result for result in await sweep(targets, count=count, timeout=timeout)}
+
+
+async def probe_remote(host, targets, count: int, timeout: float) -> dict:
+    """Probe every target from a remote host with one ssh channel whose shell runs all pings at once"""
+    script = FAN_OUT.format(count=count, timeout=f'{timeout:g}', deadline=int(timeout + 0.2 * (count - 1)) + 1)
+    proc = await asyncio.create_subprocess_exec(*host.command([shlex.join(['sh', '-c', script, 'sh', *targets])]),
+                                                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+    stdout, _ = await proc.communicate()
+    results = parse_fan_out(stdout.decode(errors='replace'))
+    return {target: results.get(target, {**parse_ping(target, ''), 'status': 'error'}) for target in targets}
+
+
+def router_connection(device) -> SSHConnection:
+    """Return a connected SSH connector for a router of the testbed"""
+    ssh = device.connections.ssh
+    conn = SSHConnection(host=str(ssh['ip']), port=str(ssh['port']), username=ssh.credentials.login['username'],
+                         password=ssh.credentials.login['password'].plaintext)
+    conn.connect()
+    return conn
+
+
+def probe_router(device, targets, count: int, timeout: float, sessions: int = VTY_LINES) -> dict:
+    """Probe every target from a router, one vty session per target up to the number of vty lines
+
+    IOS runs one ping at a time per session, so the targets only fit in one round of count * timeout
+    seconds while there are no more of them than sessions; build_matrix passes router_targets for that.
+    """
+    def run_session(chunk):
+        results = {}
+        conn = router_connection(device)
+        try:
+            for target in chunk:
+                output = conn.execute(f'ping {target} repeat {count} timeout {max(1, round(timeout))}',
+                                      read_timeout=count * timeout + 10)
+                results[target] = parse_ios_ping(target, output)
+        finally:
+            conn.close()
+        return results
+
+    if not targets:
+        return {}
+    sessions = max(1, min(sessions, len(targets)))
+    chunks = [targets[i::sessions] for i in range(sessions)]
+    merged = {}
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        for results in executor.map(run_session, chunks):
+            merged.update(results)
+    return merged
+
+
+async def build_matrix(index, targets, host=None, count: int = 2, timeout: float = 1.0,
+                       sessions: int = VTY_LINES) -> dict:
+    """Probe all targets from every vantage point concurrently and return {source: {target: result}}
+
+    Routers ping one address per data subnet in a single round; the other targets of a router get
+    status 'skipped' with 'via' naming the address that was pinged for their subnet, if any.
+    """
+    probes = {LOCAL: probe_local(targets, count, timeout)}
+    if host is not None:
+        probes[ATTACKER] = probe_remote(host, targets, count, timeout)
+    covered = {}
+    for name in index.with_role('router'):
+        picked = router_targets(index, name, targets)
+        covered[name] = {member: probe for probe, members in picked.items() for member in members if member != probe}
+        probes[name] = asyncio.to_thread(probe_router, index.devices[name], list(picked), count, timeout, sessions)
+    outcomes = await asyncio.gather(*probes.values(), return_exceptions=True)
+    matrix = {}
+    for source, outcome in zip(probes, outcomes):
+        if isinstance(outcome, Exception):
+            print(f'Could not probe from {source}: {type(outcome).__name__}: {outcome}')
+            outcome = {target: {**parse_ping(target, ''), 'status': 'error'} for target in targets}
+        matrix[source] = {target: outcome.get(target) or {**parse_ping(target, ''), 'status': 'skipped',
+                                                          'via': covered.get(source, {}).get(target)}
+                          for target in targets}
+    return matrix
+
+
+def format_matrix(matrix: dict, targets, index=None) -> str:
+    """Return a source x destination table: average RTT in ms, 'x' when unreachable, '-' when skipped, '?' on errors"""
+    def label(target):
+        owner = index.owner(target) if index else None
+        return f'{owner[0]}:{target.rsplit(".", 1)[-1]}' if owner else target
+
+    width = max((len(label(t)) for t in targets), default=0) + 1
+    lines = [f"{'from / to':<14}" + ''.join(f'{label(t):>{width}}' for t in targets)]
+    for source, results in matrix.items():
+        cells = []
+        for target in targets:
+            result = results.get(target, {})
+            if result.get('status') in ('reachable', 'lossy'):
+                cell = f"{result['rtt_avg']:.1f}" if result.get('rtt_avg') is not None else 'ok'
+                cells.append(cell + ('*' if result['status'] == 'lossy' else ''))
+            elif result.get('status') == 'skipped':
+                cells.append('-')
+            else:
+                cells.append('?' if result.get('status') in (None, 'error') else 'x')
+        lines.append(f'{source:<14}' + ''.join(f'{cell:>{width}}' for cell in cells))
+    return '\n'.join(lines)
+
+
+def run_matrix(host=None, extra=(), testbed: str = DEFAULT_TESTBED, count: int = 2, timeout: float = 1.0) -> tuple:
+    """Build the matrix from synchronous code and return it with its destinations"""
+    index = load_index(testbed)
+    targets = destinations(index, extra)
+    return asyncio.run(build_matrix(index, targets, host, count, timeout)), targets, index
+
+
+def main():
+    """Print the reachability matrix of the lab as a table or JSON"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--testbed', default=DEFAULT_TESTBED)
+    parser.add_argument('--count', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=1.0)
+    parser.add_argument('--no-attacker', action='store_true', help='skip the attacker vantage point')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    from project.pings_and_attacks import ATTACKER as HOST, GUEST_IPS  # pylint: disable=import-outside-toplevel
+    start = time.perf_counter()
+    matrix, targets, index = run_matrix(None if args.no_attacker else HOST, GUEST_IPS, args.testbed,
+                                        args.count, args.timeout)
+    if args.json:
+        print(json.dumps(matrix, indent=1))
+    else:
+        print(format_matrix(matrix, targets, index))
+        print(f'{len(matrix)} sources x {len(targets)} destinations in {time.perf_counter() - start:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Persistent multiplexed SSH session to a remote host, so commands skip the handshake and can run together"""
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+CONTROL_DIR = tempfile.gettempdir()
+
+
+class RemoteHost:
+    """One OpenSSH ControlMaster connection to a host, shared by every command run on it
+
+    The master is opened on first use (or by start) and kept for persist seconds after the
+    last command, so each later command is only a new channel of the same connection and
+    several of them can run at the same time.
+    """
+
+    def __init__(self, remote: str, key: str = None, persist: int = 600, connect_timeout: int = 5):
+        self.remote = remote
+        self.key = key
+        self.persist = persist
+        self.connect_timeout = connect_timeout
+        self.control_path = os.path.join(CONTROL_DIR, 'na-ssh-%C')
+
+    def options(self) -> list:
+        """Return the ssh options that attach to, or create, the shared master connection"""
+        options = ['-o', 'BatchMode=yes', '-o', 'StrictHostKeyChecking=no',
+                   '-o', f'ConnectTimeout={self.connect_timeout}',
+                   '-o', 'ControlMaster=auto', '-o', f'ControlPath={self.control_path}',
+                   '-o', f'ControlPersist={self.persist}']
+        return ['-i', self.key] + options if self.key else options
+
+    def command(self, args) -> list:
+        """Return the ssh command line that runs args on the remote host over the shared connection"""
+        return ['ssh', *self.options(), self.remote, *args]
+
+    def start(self) -> bool:
+        """Open the master connection in the background, return whether it is up"""
+        if self.is_alive():
+            return True
+        subprocess.run(['ssh', *self.options(), '-f', '-N', self.remote], capture_output=True, check=False)
+        return self.is_alive()
+
+    def is_alive(self) -> bool:
+        """Return whether a master connection is currently open"""
+        check = subprocess.run(['ssh', '-o', f'ControlPath={self.control_path}', '-O', 'check', self.remote],
+                               capture_output=True, check=False)
+        return check.returncode == 0
+
+    def run(self, args, **kwargs) -> subprocess.CompletedProcess:
+        """Run a command on the remote host and wait for it, with the keyword arguments of subprocess.run"""
+        return subprocess.run(self.command(args), **kwargs)  # pylint: disable=subprocess-run-check
+
+    def stream(self, args):
+        """Run a command on the remote host and yield its output lines as they arrive"""
+        with subprocess.Popen(self.command(args), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              stdin=subprocess.DEVNULL, text=True) as proc:
+            yield from proc.stdout
+            proc.wait()
+
+    def run_many(self, commands, **kwargs) -> list:
+        """Run several commands at once, each on its own channel of the shared connection"""
+        self.start()
+        commands = list(commands)
+        with ThreadPoolExecutor(max_workers=max(len(commands), 1)) as executor:
+            return list(executor.map(lambda args: self.run(args, **kwargs), commands))
+
+    def close(self):
+        """Close the master connection and every channel still using it"""
+        subprocess.run(['ssh', '-o', f'ControlPath={self.control_path}', '-O', 'exit', self.remote],
+                       capture_output=True, check=False)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,138 @@
+"""Offline dry run that renders the configuration of every device without connecting to any of them"""
+import argparse
+import copy
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from genie import testbed as genie_testbed
+
+from lib.connectors.templates import compile_template, render_commands
+from project.dhcp_config import dhcp_commands
+from project.fdm_stand_in import FdmStandIn, run_provisioning
+from project.genie_batch import ConfigBatch, add_interfaces, add_ospf, add_ssh_acl
+from project.int_config import add_ips
+from project.ospf_config import ospf_commands
+from project.ssh_acl import acl_commands
+from project.ssh_config import commands
+from project.testbed_cache import DEFAULT_TESTBED, snapshot
+from project.topology_index import load_index
+
+SECRET = '********'
+
+
+def render_ssh_bootstrap(device, index, show_secrets: bool = False) -> list:
+    """Render the console commands that enable SSH on a router"""
+    intf_obj = index.management_interface(device.name)
+    login = device.connections.ssh.credentials.login
+    return render_commands(
+        commands,
+        interface=intf_obj.name,
+        ip=intf_obj.ipv4.ip.compressed,
+        sm=intf_obj.ipv4.netmask.exploded,
+        hostname=device.name,
+        username=login.username,
+        password=login.password.plaintext if show_secrets else SECRET,
+        domain=device.custom.get('domain', None),
+    )
+
+
+def render_ssh_config(device, index) -> list:
+    """Render the interface, DHCP, OSPF and ACL commands pushed to an IOS router over SSH"""
+    lines = compile_template(add_ips).render_many(
+        {'interface': intf_obj.name, 'ip': intf_obj.ipv4.ip.compressed, 'sm': intf_obj.ipv4.netmask.exploded}
+        for intf_obj in index.data_interfaces(device.name))
+    if device.name == 'IOU1':
+        intf_obj = device.interfaces['Ethernet0/1']
+        lines += render_commands(dhcp_commands, guest_nw=intf_obj.ipv4.network.network_address.exploded,
+                                 guest_gw=intf_obj.ipv4.ip.compressed, guest_sm=intf_obj.ipv4.netmask.exploded)
+    lines += compile_template(ospf_commands).render_many({'interface': interface} for interface in device.interfaces)
+    lines += render_commands(acl_commands, ssh_container=index.management_ip(index.server))
+    return lines
+
+
+def render_genie_config(device, index) -> list:
+    """Render the single Genie configure session sent to CSR"""
+    batch = ConfigBatch(device)
+    add_interfaces(batch, device, index.data_interfaces(device.name))
+    add_ospf(batch, device, list(device.interfaces))
+    add_ssh_acl(batch, index.management_ip(index.server))
+    return list(batch.lines)
+
+
+def render_ftd_config(device, index, show_secrets: bool = False) -> tuple:
+    """Render the FTD console bootstrap and the FDM request bodies, recorded from a local stand-in"""
+    intf_obj = index.management_interface(device.name)
+    password = device.connections.telnet.credentials.login.password.plaintext
+    console = [
+        f'hostname={device.custom.hostname}',
+        f'ip={intf_obj.ipv4.ip.compressed}',
+        f'netmask={intf_obj.ipv4.netmask.exploded}',
+        f'gateway={index.management_ip(index.server)}',
+        f'password={password if show_secrets else SECRET}',
+    ]
+    with FdmStandIn() as stand_in:
+        stand_in.point_device(device)
+        run_provisioning(device, defence=False)
+        requests = list(stand_in.state.requests)
+    return console, requests
+
+
+def render_device(device, index, out_dir: str, show_secrets: bool = False) -> dict:
+    """Render one device into <out_dir>/<device>.txt and return its render time and command count"""
+    start = time.perf_counter()
+    sections = []
+    count = 0
+    role = device.custom.get('role')
+    if role == 'router':
+        bootstrap = render_ssh_bootstrap(device, index, show_secrets)
+        config = (render_genie_config(device, index) if 'unicon' in device.connections
+                  else render_ssh_config(device, index))
+        sections += [('console bootstrap', bootstrap), ('configuration', config)]
+        count = len(bootstrap) + len(config)
+    elif role == 'firewall':
+        console, requests = render_ftd_config(device, index, show_secrets)
+        sections += [('console bootstrap', console),
+                     ('fdm requests', [json.dumps(request, sort_keys=True) for request in requests])]
+        count = len(console) + len(requests)
+    else:
+        return None
+    path = os.path.join(out_dir, f'{device.name}.txt')
+    with open(path, 'w', encoding='utf-8') as file:
+        for title, lines in sections:
+            file.write(f'! --- {title} ---\n')
+            file.writelines(f'{line}\n' for line in lines)
+    return {'device': device.name, 'path': path, 'commands': count, 'seconds': time.perf_counter() - start}
+
+
+def render_all(out_dir: str, testbed: str = DEFAULT_TESTBED, max_workers: int = 8, show_secrets: bool = False) -> list:
+    """Render every router and firewall of a testbed in parallel"""
+    os.makedirs(out_dir, exist_ok=True)
+    index = load_index(testbed)
+    tb = genie_testbed.load(copy.deepcopy(snapshot(testbed)[1]))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda dev: render_device(dev, index, out_dir, show_secrets), tb.devices.values())
+        return [result for result in results if result]
+
+
+def main():
+    """Render every device config to a directory and report the time and command count of each"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('out_dir', nargs='?', default='rendered_configs')
+    parser.add_argument('--testbed', default=DEFAULT_TESTBED)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--show-secrets', action='store_true', help='write the real passwords instead of a mask')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = render_all(args.out_dir, args.testbed, args.workers, args.show_secrets)
+    total = time.perf_counter() - start
+    for result in results:
+        print(f"{result['device']:<12}{result['commands']:6d} commands{result['seconds'] * 1000:10.1f} ms  "
+              f"{result['path']}")
+    print(f"{'total':<12}{sum(r['commands'] for r in results):6d} commands{total * 1000:10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Vectorised RTT and loss analysis of a ping stream, split into before, during and after an attack"""
+import csv
+import re
+
+import numpy as np
+
+REPLY_RE = re.compile(r'icmp_seq=(?P<seq>\d+) .*time=(?P<rtt>[\d.]+) ms')
+NO_ANSWER_RE = re.compile(r'no answer yet for icmp_seq=(?P<seq>\d+)')
+TRANSMITTED_RE = re.compile(r'(?P<sent>\d+) packets transmitted')
+PERCENTILES = (50, 90, 99)
+PHASES = ('before', 'during', 'after')
+
+
+def parse_ping_stream(entries):
+    """Turn (seconds, line) pairs of a ping run into seq, RTT (NaN when lost) and time arrays
+
+    Sequence numbers that never got a reply, up to the transmitted count of the summary line,
+    are counted as lost; their time comes from ping -O "no answer yet" lines when present,
+    otherwise it is interpolated from the replies.
+    """
+    replies, missing, sent = {}, {}, 0
+    for seconds, line in entries:
+        match = REPLY_RE.search(line)
+        if match:
+            replies[int(match['seq'])] = (seconds, float(match['rtt']))
+            continue
+        match = NO_ANSWER_RE.search(line)
+        if match:
+            missing.setdefault(int(match['seq']), seconds)
+            continue
+        match = TRANSMITTED_RE.search(line)
+        if match:
+            sent = int(match['sent'])
+    if not replies and not missing:
+        return np.array([], dtype=int), np.array([]), np.array([])
+    seq = np.arange(1, max([*replies, *missing, sent]) + 1)
+    rtt = np.full(seq.shape, np.nan)
+    times = np.full(seq.shape, np.nan)
+    for number, (seconds, value) in replies.items():
+        rtt[number - 1], times[number - 1] = value, seconds
+    for number, seconds in missing.items():
+        if number not in replies:
+            times[number - 1] = seconds
+    known = ~np.isnan(times)
+    if known.sum() >= 2:
+        step = float(np.median(np.diff(times[known]) / np.diff(seq[known])))
+        first, last = seq[known][0], seq[known][-1]
+        times[~known] = np.interp(seq[~known], seq[known], times[known])
+        times[~known & (seq > last)] = times[known][-1] + (seq[~known & (seq > last)] - last) * step
+        times[~known & (seq < first)] = times[known][0] - (first - seq[~known & (seq < first)]) * step
+    elif known.any():
+        times[~known] = times[known][0] + (seq[~known] - seq[known][0])
+    return seq, rtt, times
+
+
+def summarize(rtt) -> dict:
+    """Return loss, percentiles and jitter of an RTT array where lost probes are NaN"""
+    rtt = np.asarray(rtt, dtype=float)
+    received = rtt[~np.isnan(rtt)]
+    summary = {'sent': int(rtt.size), 'received': int(received.size),
+               'loss': round(100.0 * (rtt.size - received.size) / rtt.size, 1) if rtt.size else None}
+    if received.size:
+        summary.update(min=received.min(), mean=received.mean(), max=received.max(), stdev=received.std(),
+                       jitter=np.abs(np.diff(received)).mean() if received.size > 1 else 0.0)
+        summary.update({f'p{p}': value for p, value in zip(PERCENTILES, np.percentile(received, PERCENTILES))})
+        summary.update({key: round(float(value), 3) for key, value in summary.items()
+                        if key not in ('sent', 'received', 'loss')})
+    else:
+        summary.update(dict.fromkeys(['min', 'mean', 'max', 'stdev', 'jitter'] + [f'p{p}' for p in PERCENTILES]))
+    return summary
+
+
+def loss_windows(seq, rtt, times) -> list:
+    """Return (first seq, last seq, start s, end s, lost) for every run of consecutive lost probes"""
+    lost = np.isnan(np.asarray(rtt, dtype=float)).astype(int)
+    edges = np.diff(np.concatenate(([0], lost, [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    return [(int(seq[s]), int(seq[e]), float(times[s]), float(times[e]), int(e - s + 1)) for s, e in zip(starts, ends)]
+
+
+def phase_of(times, attack_start: float, attack_end: float):
+    """Label every probe time as before, during or after the attack window"""
+    return np.select([times < attack_start, times <= attack_end], PHASES[:2], PHASES[2])
+
+
+def compare_phases(times, rtt, attack_start: float, attack_end: float) -> dict:
+    """Summarize each phase and the attack impact: extra loss and how much the median and p90 RTT grew"""
+    labels = phase_of(times, attack_start, attack_end)
+    phases = {name: summarize(rtt[labels == name]) for name in PHASES}
+    before, during = phases['before'], phases['during']
+
+    def ratio(key):
+        return round(during[key] / before[key], 2) if during.get(key) and before.get(key) else None
+
+    phases['impact'] = {
+        'loss_increase': (round(during['loss'] - before['loss'], 1)
+                          if during['loss'] is not None and before['loss'] is not None else None),
+        'p50_ratio': ratio('p50'),
+        'p90_ratio': ratio('p90'),
+    }
+    return phases
+
+
+def export_csv(path: str, seq, times, rtt, labels=None) -> str:
+    """Write one row per probe: seq, seconds, RTT in ms (empty when lost) and its phase"""
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['seq', 'seconds', 'rtt_ms', 'lost', 'phase'])
+        for i, number in enumerate(seq):
+            lost = bool(np.isnan(rtt[i]))
+            writer.writerow([int(number), f'{times[i]:.3f}', '' if lost else f'{rtt[i]:.3f}', int(lost),
+                             labels[i] if labels is not None else ''])
+    return path
+
+
+def _cell(value) -> str:
+    if value is None:
+        return f"{'-':>9}"
+    return f'{value:9.2f}' if isinstance(value, float) else f'{value:9d}'
+
+
+def format_report(phases: dict) -> str:
+    """Return the per-phase table followed by the impact numbers"""
+    keys = ['sent', 'loss', 'min', 'p50', 'p90', 'p99', 'max', 'jitter']
+    lines = [f"{'phase':<8}" + ''.join(f'{key:>9}' for key in keys)]
+    lines += [f"{name:<8}{''.join(_cell(phases[name][key]) for key in keys)}" for name in PHASES]
+    impact = phases['impact']
+    lines.append(f"impact: loss +{impact['loss_increase']} points, p50 x{impact['p50_ratio']}, "
+                 f"p90 x{impact['p90_ratio']}")
+    return '\n'.join(lines)
+
+
+def analyse_scenario(records, probe: str = 'ping', attack: str = 'dos', duration: float = None,
+                     csv_path: str = None) -> dict:
+    """Analyse the ping action of a scenario log around the attack action's start and end"""
+    attack_lines = [(seconds, line) for seconds, name, line in records if name == attack]
+    attack_start = attack_lines[0][0]
+    attack_end = attack_start + duration if duration is not None else attack_lines[-1][0]
+    seq, rtt, times = parse_ping_stream((seconds, line) for seconds, name, line in records if name == probe)
+    phases = compare_phases(times, rtt, attack_start, attack_end)
+    phases['loss_windows'] = loss_windows(seq, rtt, times)
+    if csv_path:
+        export_csv(csv_path, seq, times, rtt, phase_of(times, attack_start, attack_end))
+    return phases
@@ -1,29 +1,46 @@
 """Self-diagnose module for network devices using telnet"""
 import asyncio
+import os
 import time
 
-from project.config_helper import ParseConfig
+from project.config_helper import ParseCache, ParseConfig, diff_block, negate, normalize
+from project.golden_store import GoldenStore
 from lib.connectors.async_telnet_conn import TelnetConnection
+from lib.connectors.timing import RECORDER, span
 
 DEVICES = {
-    'IOU1': {'host': '92.81.55.146', 'port': 5021},
-    'IOSv': {'host': '92.81.55.146', 'port': 5012},
+    'IOU1': {'host': '92.81.55.146', 'port': 5021, 'file_system': 'unix:'},
+    'IOSv': {'host': '92.81.55.146', 'port': 5012, 'file_system': 'flash0:'},
 }
+MAX_CONCURRENT = 4
+PER_HOST_LIMIT = 2
+PARSE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parse_cache')
+PARSE_CACHE = ParseCache(max_entries=64, directory=PARSE_CACHE_DIR)
+GOLDEN_STORE = GoldenStore('golden_store')
+TIMING_DIR = 'timing'
 
 
 class SelfDiagnose:
     """Class to handle self-diagnosis of network devices"""
 
-    def __init__(self, host: str, port: int, device_name: str = None):
+    def __init__(self, host: str, port: int, device_name: str = None, file_system: str = 'flash:'):
         """Initialize SelfDiagnose with device connection parameters"""
         self.host = host
         self.port = port
         self.device_name = device_name
+        self.device_golden_path = f'{file_system}golden.cfg'
         self.golden_config_path = f'golden_running_config_{self.device_name}.txt'
         self.current_config_path = f'current_running_config_{self.device_name}.txt'
+        self.started = None
 
-    def compare_configs(self, golden_config: str, current_config: str) -> dict:
-        """Compare two configuration files and return missing configuration blocks"""
+    def compare_configs(self, golden_config: str, current_config: str, cache: ParseCache = None) -> dict:
+        """Compare two configuration files and return the patch blocks that restore the golden one
+
+        Sections present in both files only carry their missing child lines and the `no` negations
+        of extra ones; tracked global lines and sections only present in the current file are negated.
+        Parsed trees go to the module's PARSE_CACHE unless another cache is given.
+        """
+        cache = PARSE_CACHE if cache is None else cache
         missing_blocks = {
             'hostname': [],
             'dhcp': [],
@@ -36,60 +53,83 @@ class SelfDiagnose:
             'line': []
         }
 
-        with ParseConfig(golden_config) as old_config, ParseConfig(current_config) as new_config:
+        with ParseConfig(golden_config, cache=cache) as old_config, \
+                ParseConfig(current_config, cache=cache) as new_config:
             old_config.reduce_config()
             new_config.reduce_config()
+            old_lines = old_config.line_set()
+            new_lines = new_config.line_set()
+
+            for node in new_config.sections():
+                if normalize(node.text) in old_lines:
+                    continue
+                if node.text.startswith("username "):
+                    if not self._is_overridden(node.text, old_lines, 2):
+                        missing_blocks['username'].append(negate(node.text))
+                elif node.text.startswith("ip domain"):
+                    if not self._is_overridden(node.text, old_lines, 3):
+                        missing_blocks['ip_domain'].append(negate(node.text))
+                elif node.text.startswith("ip dhcp excluded"):
+                    missing_blocks['dhcp excluded'].append(negate(node.text))
+                elif node.text.startswith("ip dhcp pool "):
+                    missing_blocks['dhcp'].append(negate(node.text))
+                elif node.text.startswith("router ospf"):
+                    missing_blocks['router_ospf'].append(negate(node.text))
+                elif node.text.startswith("ip access-list"):
+                    missing_blocks['access_list'].append(negate(node.text))
 
-            for line in old_config.lines:
+            for node in old_config.sections():
+                line = node.line
                 if line.startswith("hostname "):
-                    if line not in new_config.lines:
+                    if normalize(node.text) not in new_lines:
                         missing_blocks['hostname'].append(line.strip())
 
                 elif line.startswith("username "):
-                    if line not in new_config.lines:
+                    if normalize(node.text) not in new_lines:
                         missing_blocks['username'].append(line.strip())
 
                 elif line.startswith("ip domain"):
-                    if line not in new_config.lines:
+                    if normalize(node.text) not in new_lines:
                         missing_blocks['ip_domain'].append(line.strip())
 
                 elif line.startswith("ip dhcp excluded"):
-                    if line not in new_config.lines:
+                    if normalize(node.text) not in new_lines:
                         missing_blocks['dhcp excluded'].append(line.strip())
 
                 elif line.startswith("ip dhcp pool "):
-                    block = old_config.get_config_block(line.strip())
-                    block_in_new = new_config.get_config_block(line.strip())
-                    if not block_in_new or block != block_in_new:
-                        missing_blocks['dhcp'].append(block)
+                    patch = diff_block(node, new_config.get_node(node.text))
+                    if patch:
+                        missing_blocks['dhcp'].append(patch)
 
                 elif line.startswith("interface "):
-                    block = old_config.get_config_block(line.strip())
-                    if self._is_configured_interface(block):
-                        block_in_new = new_config.get_config_block(line.strip())
-                        if not block_in_new or block != block_in_new:
-                            missing_blocks['interfaces'].append(block)
+                    if self._is_configured_interface(node.to_config()):
+                        patch = diff_block(node, new_config.get_node(node.text))
+                        if patch:
+                            missing_blocks['interfaces'].append(patch)
 
                 elif line.startswith("router ospf"):
-                    block = old_config.get_config_block(line.strip())
-                    block_in_new = new_config.get_config_block(line.strip())
-                    if not block_in_new or block != block_in_new:
-                        missing_blocks['router_ospf'].append(block)
+                    patch = diff_block(node, new_config.get_node(node.text))
+                    if patch:
+                        missing_blocks['router_ospf'].append(patch)
 
                 elif line.startswith("ip access-list"):
-                    block = old_config.get_config_block(line.strip())
-                    block_in_new = new_config.get_config_block(line.strip())
-                    if not block_in_new or block != block_in_new:
-                        missing_blocks['access_list'].append(block)
+                    patch = diff_block(node, new_config.get_node(node.text), ordered=True)
+                    if patch:
+                        missing_blocks['access_list'].append(patch)
 
                 elif line.startswith(("line vty", "line con")):
-                    block = old_config.get_config_block(line.strip())
-                    block_in_new = new_config.get_config_block(line.strip())
-                    if not block_in_new or block != block_in_new:
-                        missing_blocks['line'].append(block)
+                    patch = diff_block(node, new_config.get_node(node.text))
+                    if patch:
+                        missing_blocks['line'].append(patch)
 
         return missing_blocks
 
+    @staticmethod
+    def _is_overridden(text: str, golden_lines: set, key_words: int) -> bool:
+        """Check if a golden line sets the same command, so the extra line needs no negation"""
+        key = ' '.join(text.split()[:key_words]) + ' '
+        return any(line.startswith(key) for line in golden_lines)
+
     def _is_configured_interface(self, block: str) -> bool:
         """Check if interface has meaningful configuration (not just shutdown)"""
         lines = [l.strip() for l in block.splitlines() if l.strip() and not l.strip().startswith('!')]
@@ -98,43 +138,168 @@ class SelfDiagnose:
                 return True
         return False
 
-    async def run_self_diagnose(self, dev_name):
-        """Run the complete self-diagnose process"""
-        print("Restoring to default settings...")
-        conn = TelnetConnection(self.host, self.port)
-        await conn.connect()
+    def _progress(self, message: str):
+        """Print a progress line tagged with the device name and the elapsed time"""
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        print(f"[{self.device_name} +{elapsed:6.1f}s] {message}")
+
+    async def capture_golden_config(self, conn: TelnetConnection) -> dict:
+        """Store the device's running-config as its golden config, skipping the capture if its checksum is known"""
+        checksum = await conn.get_config_checksum()
+        entry = GOLDEN_STORE.find(self.device_name, checksum)
+        if entry:
+            self._progress(f"Running-config unchanged since golden v{entry['version']}, skipping capture")
+            entry = GOLDEN_STORE.put(self.device_name, GOLDEN_STORE.get(self.device_name, entry['version']), checksum)
+            GOLDEN_STORE.checkout(self.device_name, self.golden_config_path, entry['version'])
+            return entry
         await conn.get_running_config(self.golden_config_path)
         with ParseConfig(self.golden_config_path) as config:
             config.reduce_config()
             config.rewrite_file()
+        with open(self.golden_config_path, 'r', encoding='utf-8') as file:
+            entry = GOLDEN_STORE.put(self.device_name, file.read(), checksum)
+        self._progress(f"Stored golden config v{entry['version']}")
+        return entry
+
+    def export_timing(self) -> tuple:
+        """Write this device's phase timings to timing/<device>_<timestamp>.json/.csv and reset them"""
+        prefix = os.path.join(TIMING_DIR, f"{self.device_name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        paths = RECORDER.export(prefix, device=self.device_name)
+        RECORDER.clear(self.device_name)
+        self._progress(f"Phase timings written to {paths[0]}")
+        return paths
+
+    async def run_self_diagnose(self, dev_name):
+        """Run the complete self-diagnose process and return the number of restored blocks
+
+        A copy of the golden config is saved to the device's flash before the erase, so the restore
+        is one configure replace; the line-by-line replay is only the fallback.
+        Every phase is timed and the report is exported at the end of the run, even a failed one.
+        """
+        self.started = time.monotonic()
+        try:
+            with span('diagnose.run', self.device_name):
+                return await self._self_diagnose(dev_name)
+        finally:
+            self.export_timing()
+
+    async def _self_diagnose(self, dev_name):
+        self._progress("Restoring to default settings...")
+        conn = TelnetConnection(self.host, self.port)
+        await conn.connect()
+        await self.capture_golden_config(conn)
+        saved = await conn.save_running_config(self.device_golden_path)
+        self._progress("Erasing startup-config and reloading...")
         await conn.erase_and_reload()
-        if dev_name == "IOSv":
-            time.sleep(50)
-        print("Diagnosing...")
-        time.sleep(5)
+        with span('diagnose.reload_wait'):
+            if dev_name == "IOSv":
+                await asyncio.sleep(50)
+            self._progress("Diagnosing...")
+            await asyncio.sleep(5)
         conn = TelnetConnection(self.host, self.port)
         await conn.connect()
         await conn.initialize()
         await conn.get_running_config(self.current_config_path)
+        with span('diagnose.compare'):
+            missing_blocks = self.compare_configs(self.golden_config_path, self.current_config_path)
+        restored = sum(len(blocks) for blocks in missing_blocks.values())
+        if restored:
+            self._progress("Restoring to original settings...")
+            if saved and await conn.configure_replace(self.device_golden_path):
+                self._progress(f"Configuration replaced from {self.device_golden_path}")
+            else:
+                self._progress("configure replace unavailable, replaying missing lines...")
+                await conn.apply_missing_config(missing_blocks)
+            self._progress("Configuration restored successfully!")
+        else:
+            self._progress("Device configuration is already correct!")
+        return restored
+
+    def replace_from_store(self, ssh_conn, version: int = None):
+        """Upload a stored golden config over SCP and apply it with configure replace, for reachable devices
+
+        The device needs 'ip scp server enable'; unlike the line-by-line replay the replace is atomic.
+        """
+        if GOLDEN_STORE.latest(self.device_name):
+            GOLDEN_STORE.checkout(self.device_name, self.golden_config_path, version)
+        file_system, _, dest_file = self.device_golden_path.partition(':')
+        self._progress(f"Uploading golden config to {self.device_golden_path}...")
+        transfer, output = ssh_conn.replace_config(self.golden_config_path, dest_file, f'{file_system}:')
+        self._progress("Configuration replaced" if 'Rollback Done' in output else "configure replace failed")
+        return transfer, output
+
+    async def run_drift_check(self, apply_delta: bool = False, version: int = None, ssh_conn=None) -> dict:
+        """Compare the live running-config with the stored golden config, without erasing or reloading
+
+        The missing and extra sections are printed; with apply_delta the patch is pushed to the running-config.
+        When a connected ssh_conn is given the golden config is applied with an atomic configure replace instead,
+        and the delta is only replayed over telnet if the replace fails.
+        Passing an older golden version together with apply_delta rolls the device back to it.
+        """
+        self.started = time.monotonic()
+        if GOLDEN_STORE.latest(self.device_name):
+            GOLDEN_STORE.checkout(self.device_name, self.golden_config_path, version)
+        elif not os.path.exists(self.golden_config_path):
+            raise FileNotFoundError(f"No golden config for {self.device_name}: {self.golden_config_path}")
+        self._progress("Capturing running-config...")
+        conn = TelnetConnection(self.host, self.port)
+        await conn.connect()
+        await conn.get_running_config(self.current_config_path)
         missing_blocks = self.compare_configs(self.golden_config_path, self.current_config_path)
-        if missing_blocks:
-            print("Restoring to original settings...")
+        if not any(missing_blocks.values()):
+            self._progress("No drift from the golden config")
+            return missing_blocks
+        for section, blocks in missing_blocks.items():
+            for block in blocks:
+                kind = 'extra' if block.startswith('no ') and len(block.splitlines()) == 1 else 'missing'
+                self._progress(f"{kind} {section}: {block.splitlines()[0]}")
+        if apply_delta and ssh_conn is not None:
+            _, output = await asyncio.to_thread(self.replace_from_store, ssh_conn, version)
+            if 'Rollback Done' in output:
+                return missing_blocks
+        if apply_delta:
+            self._progress("Pushing the delta to running-config...")
             await conn.apply_missing_config(missing_blocks)
-            print("Configuration restored successfully!")
-        else:
-            print("Device configuration is already correct!")
+            self._progress("Delta applied")
+        return missing_blocks
 
 
 async def run_device_diagnose(device_name, device_info):
     """Run self-diagnose for a single device"""
     print(f"\n=== Self-diagnose for {device_name} ===")
-    diagnose = SelfDiagnose(device_info['host'], device_info['port'], device_name)
-    await diagnose.run_self_diagnose(device_name)
+    diagnose = SelfDiagnose(device_info['host'], device_info['port'], device_name,
+                            device_info.get('file_system', 'flash:'))
+    return await diagnose.run_self_diagnose(device_name)
+
+
+async def run_fleet_diagnose(devices: dict, max_concurrent: int = MAX_CONCURRENT, per_host: int = PER_HOST_LIMIT):
+    """Diagnose every device concurrently, capped globally and per console server, then print a summary"""
+    overall = asyncio.Semaphore(max_concurrent)
+    hosts = {info['host']: asyncio.Semaphore(per_host) for info in devices.values()}
+
+    async def diagnose_one(device_name, device_info):
+        async with hosts[device_info['host']], overall:
+            start = time.monotonic()
+            try:
+                restored = await run_device_diagnose(device_name, device_info)
+                status = 'restored' if restored else 'clean'
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                restored = 0
+                status = f'failed: {e}'
+            return device_name, status, restored, time.monotonic() - start
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(diagnose_one(name, info) for name, info in devices.items()))
+    print(f"\n{'Device':<12}{'Status':<30}{'Blocks':>8}{'Time':>10}")
+    for device_name, status, restored, duration in results:
+        print(f"{device_name:<12}{status[:29]:<30}{restored:>8}{duration:>9.1f}s")
+    print(f"{len(results)} devices in {time.monotonic() - start:.1f}s")
+    return results
+
 
 async def main():
     """Main function to run self-diagnose"""
-    for device_name, device_info in DEVICES.items():
-        await run_device_diagnose(device_name, device_info)
+    await run_fleet_diagnose(DEVICES)
 
 
 if __name__ == '__main__':
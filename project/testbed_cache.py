@@ -0,0 +1,55 @@
+"""Compiled testbed snapshots, so scripts and menu actions skip the YAML parse after the first load"""
+import copy
+import hashlib
+import marshal
+import os
+import tempfile
+
+from pyats import topology
+
+DEFAULT_TESTBED = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main_testbed.yaml')
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.testbed_cache')
+_SNAPSHOTS = {}
+
+
+def snapshot(path: str = DEFAULT_TESTBED, cache_dir: str = CACHE_DIR) -> tuple:
+    """Return (sha256, validated raw config) of a testbed file
+
+    The file is only re-read when its mtime or size changed, and only re-parsed when its
+    content hash has no snapshot on disk yet.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    memo = _SNAPSHOTS.get(path)
+    if memo and memo[0] == (stat.st_mtime_ns, stat.st_size):
+        return memo[1], memo[2]
+    with open(path, 'rb') as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    if memo and memo[1] == digest:
+        _SNAPSHOTS[path] = ((stat.st_mtime_ns, stat.st_size), digest, memo[2])
+        return digest, memo[2]
+    snapshot_path = os.path.join(cache_dir, f'{digest}.tb')
+    try:
+        with open(snapshot_path, 'rb') as file:
+            raw = marshal.load(file)
+    except (FileNotFoundError, EOFError, ValueError, TypeError):
+        raw = topology.loader.load(path).raw_config
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                marshal.dump(raw, file)
+            os.replace(tmp_path, snapshot_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    _SNAPSHOTS[path] = ((stat.st_mtime_ns, stat.st_size), digest, raw)
+    return digest, raw
+
+
+def load_testbed(path: str = DEFAULT_TESTBED, cache_dir: str = CACHE_DIR):
+    """Return a new Testbed built from the snapshot of a testbed file
+
+    Every call gets its own Testbed, so connections opened by one run never leak into the next.
+    """
+    return topology.loader.load(copy.deepcopy(snapshot(path, cache_dir)[1]))
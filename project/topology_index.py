@@ -0,0 +1,144 @@
+"""Graph index of the testbed topology, built once and then queried without rescanning the testbed"""
+from collections import defaultdict, deque
+
+from project.testbed_cache import DEFAULT_TESTBED, load_testbed, snapshot
+
+MANAGEMENT_LINK = 'management'
+_INDEXES = {}
+
+
+class TopologyIndex:
+    """Roles, management interfaces, addressing and shortest paths of a loaded testbed
+
+    The graph only holds the data links: the management segment reaches every device in one
+    hop and would hide the forwarding paths between them.
+    """
+
+    def __init__(self, tb):
+        self.devices = tb.devices
+        self.roles = defaultdict(list)
+        self.management = {}
+        self.links = defaultdict(list)
+        self.owners = {}
+        graph = defaultdict(list)
+        for name, device in tb.devices.items():
+            self.roles[device.custom.get('role')].append(name)
+            for intf in device.interfaces.values():
+                if intf.link.name == MANAGEMENT_LINK:
+                    self.management[name] = intf
+                self.links[intf.link.name].append((name, intf))
+                if intf.ipv4 is not None:
+                    self.owners[intf.ipv4.ip.compressed] = (name, intf)
+        for link, ends in self.links.items():
+            if link == MANAGEMENT_LINK:
+                continue
+            for name, _ in ends:
+                graph[name].extend(other for other, _ in ends if other != name and other not in graph[name])
+        self.next_hops = {name: self._shortest_paths(graph, name) for name in tb.devices}
+        self.host_gateways = self._host_gateways()
+
+    @staticmethod
+    def _shortest_paths(graph, source) -> dict:
+        """Breadth-first search returning the first hop from source towards every reachable device"""
+        first_hops = {source: None}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for neighbour in graph[current]:
+                if neighbour not in first_hops:
+                    first_hops[neighbour] = neighbour if current == source else first_hops[current]
+                    queue.append(neighbour)
+        del first_hops[source]
+        return first_hops
+
+    def _host_gateways(self) -> dict:
+        """Map every data subnet to the management address of the router that routes it for the container
+
+        A subnet shared by several routers goes via the last of them in testbed order, as the original
+        per-router 'ip route replace' loop left it; a subnet without a router goes via the nearest one.
+        """
+        gateways = {}
+        routers = [name for name in self.roles['router'] if name in self.management]
+        for link, ends in self.links.items():
+            if link == MANAGEMENT_LINK:
+                continue
+            attached = [name for name, _ in ends]
+            candidates = [name for name in routers if name in attached]
+            if not candidates:
+                reachable = [(len(self.path(start, name)), name) for start in attached for name in routers
+                             if name in self.next_hops[start]]
+                candidates = [min(reachable)[1]] if reachable else []
+            for _, intf in ends:
+                if candidates and intf.ipv4 is not None:
+                    gateways[intf.ipv4.network.compressed] = self.management_ip(candidates[-1])
+        return gateways
+
+    def with_role(self, role: str) -> list:
+        """Return the names of the devices with a role, in testbed order"""
+        return self.roles.get(role, [])
+
+    @property
+    def server(self) -> str:
+        """Return the name of the automation container"""
+        return self.with_role('container')[0]
+
+    def management_interface(self, device: str):
+        """Return the management interface of a device"""
+        return self.management[device]
+
+    def management_ip(self, device: str) -> str:
+        """Return the management address of a device"""
+        return self.management[device].ipv4.ip.compressed
+
+    def data_interfaces(self, device: str) -> list:
+        """Return every interface of a device that is not on the management segment"""
+        return [intf for intf in self.devices[device].interfaces.values() if intf.link.name != MANAGEMENT_LINK]
+
+    def owner(self, ip: str):
+        """Return the (device, interface) an address belongs to, or None"""
+        return self.owners.get(ip)
+
+    def next_hop(self, source: str, destination: str):
+        """Return the neighbour of source on a shortest data path to destination, None if unreachable"""
+        return self.next_hops[source].get(destination)
+
+    def path(self, source: str, destination: str) -> list:
+        """Return the devices on a shortest data path, both ends included"""
+        if source == destination:
+            return [source]
+        if destination not in self.next_hops[source]:
+            return []
+        hops = [source]
+        while hops[-1] != destination:
+            hops.append(self.next_hops[hops[-1]][destination])
+        return hops
+
+    def ingress_address(self, device: str, subnet: str) -> str:
+        """Return the address of device that traffic coming from a data subnet arrives on"""
+        attached = [name for link in self.links.values() for name, intf in link
+                    if intf.ipv4 is not None and intf.ipv4.network.compressed == subnet]
+        if device in attached:
+            return next(intf.ipv4.ip.compressed for intf in self.data_interfaces(device)
+                        if intf.ipv4.network.compressed == subnet)
+        previous = min((self.path(device, start) for start in attached if self.path(device, start)), key=len)[1]
+        return next(intf.ipv4.ip.compressed for intf in self.data_interfaces(device)
+                    if any(name == previous for name, _ in self.links[intf.link.name]))
+
+    def data_addresses(self, skip_firewall_only: bool = True) -> list:
+        """Return the data addresses of every device, leaving out subnets only a firewall is attached to"""
+        addresses = []
+        for link, ends in self.links.items():
+            if link == MANAGEMENT_LINK:
+                continue
+            if skip_firewall_only and all(self.devices[name].custom.get('role') == 'firewall' for name, _ in ends):
+                continue
+            addresses.extend(intf.ipv4.ip.compressed for _, intf in ends if intf.ipv4 is not None)
+        return addresses
+
+
+def load_index(testbed: str = DEFAULT_TESTBED) -> TopologyIndex:
+    """Return the index of a testbed file, rebuilt only when the file content changes"""
+    digest = snapshot(testbed)[0]
+    if digest not in _INDEXES:
+        _INDEXES[digest] = TopologyIndex(load_testbed(testbed))
+    return _INDEXES[digest]